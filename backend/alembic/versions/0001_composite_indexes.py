@@ -0,0 +1,50 @@
+"""Composite indexes for encounter, creature and preset access paths
+
+The tables themselves are created by Base.metadata.create_all on startup;
+this is the first migration on top of that schema.
+
+On PostgreSQL the indexes are built CONCURRENTLY (outside a transaction)
+so the tables stay writable while they build.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_encounters_user_id_created_at", "encounters", ["user_id", sa.text("created_at DESC")]),
+    ("ix_presets_user_id_created_at", "presets", ["user_id", sa.text("created_at DESC")]),
+    ("ix_creatures_encounter_id_initiative", "creatures", ["encounter_id", sa.text("initiative DESC")]),
+    ("ix_preset_creatures_preset_id_initiative", "preset_creatures", ["preset_id", sa.text("initiative DESC")]),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _ in INDEXES:
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,37 @@
+"""Persist the current turn of an encounter
+
+Databases created by create_all after this change already have the
+column, so the upgrade only adds it where it is missing.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _has_current_turn() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns("encounters")
+    return any(column["name"] == "current_turn" for column in columns)
+
+
+def upgrade() -> None:
+    if not _has_current_turn():
+        op.add_column(
+            "encounters",
+            sa.Column("current_turn", sa.Integer(), server_default="0", nullable=False)
+        )
+
+
+def downgrade() -> None:
+    if _has_current_turn():
+        with op.batch_alter_table("encounters") as batch_op:
+            batch_op.drop_column("current_turn")
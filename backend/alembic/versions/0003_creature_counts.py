@@ -0,0 +1,72 @@
+"""Denormalized creature counts on encounters and presets
+
+Adds encounters.creature_count and presets.creature_count, fills them
+from the creature tables, and on PostgreSQL rebuilds the encounter
+listing index to INCLUDE the listing's columns. Databases created by
+create_all after this change already have the columns.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (parent table, child table, child foreign key)
+COUNTED = [
+    ("encounters", "creatures", "encounter_id"),
+    ("presets", "preset_creatures", "preset_id"),
+]
+
+LISTING_INDEX = "ix_encounters_user_id_created_at"
+LISTING_COLUMNS = ["user_id", sa.text("created_at DESC")]
+
+
+def _has_creature_count(table: str) -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns(table)
+    return any(column["name"] == "creature_count" for column in columns)
+
+
+def _rebuild_listing_index(include) -> None:
+    """Swap the PostgreSQL listing index for one with the given INCLUDE columns.
+
+    The new index is built CONCURRENTLY under a temporary name before the
+    old one is dropped, so listings always have an index to use.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            f"{LISTING_INDEX}_new", "encounters", LISTING_COLUMNS,
+            postgresql_include=include, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(LISTING_INDEX, table_name="encounters", postgresql_concurrently=True, if_exists=True)
+        op.execute(f"ALTER INDEX {LISTING_INDEX}_new RENAME TO {LISTING_INDEX}")
+
+
+def upgrade() -> None:
+    for parent, child, foreign_key in COUNTED:
+        if not _has_creature_count(parent):
+            op.add_column(parent, sa.Column("creature_count", sa.Integer(), server_default="0", nullable=False))
+        op.execute(
+            f"UPDATE {parent} SET creature_count = "
+            f"(SELECT count(*) FROM {child} WHERE {child}.{foreign_key} = {parent}.id)"
+        )
+    
+    if op.get_bind().dialect.name == "postgresql":
+        _rebuild_listing_index(["id", "name", "background_image", "creature_count"])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _rebuild_listing_index([])
+    
+    for parent, _, _ in COUNTED:
+        if _has_creature_count(parent):
+            with op.batch_alter_table(parent) as batch_op:
+                batch_op.drop_column("creature_count")
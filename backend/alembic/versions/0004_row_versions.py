@@ -0,0 +1,40 @@
+"""Version counters on encounters and presets
+
+Adds encounters.version and presets.version, which every change bumps
+and which the ETags of single encounter and preset reads are built from.
+Existing rows start at 1. Databases created by create_all after this
+change already have the columns.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+VERSIONED = ["encounters", "presets"]
+
+
+def _has_version(table: str) -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns(table)
+    return any(column["name"] == "version" for column in columns)
+
+
+def upgrade() -> None:
+    for table in VERSIONED:
+        if not _has_version(table):
+            op.add_column(table, sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade() -> None:
+    for table in VERSIONED:
+        if _has_version(table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column("version")
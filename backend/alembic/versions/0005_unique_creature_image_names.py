@@ -0,0 +1,59 @@
+"""Unique creature image names
+
+creature_images.creature_name becomes unique, which the catalog's
+INSERT ... ON CONFLICT upsert relies on. Duplicate names left by older
+writers are removed first, keeping the newest row of each name. The
+existing non-unique index is replaced by a unique one of the same name;
+databases created by create_all after this change already have it.
+
+On PostgreSQL the index is built CONCURRENTLY, as in 0001.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_creature_images_creature_name"
+TABLE = "creature_images"
+
+
+def _index_is_unique() -> bool:
+    for index in sa.inspect(op.get_bind()).get_indexes(TABLE):
+        if index["name"] == INDEX:
+            return bool(index["unique"])
+    return False
+
+
+def _replace_index(unique: bool) -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(INDEX, table_name=TABLE, if_exists=True, postgresql_concurrently=True)
+            op.create_index(INDEX, TABLE, ["creature_name"], unique=unique, postgresql_concurrently=True)
+    else:
+        op.drop_index(INDEX, table_name=TABLE, if_exists=True)
+        op.create_index(INDEX, TABLE, ["creature_name"], unique=unique)
+
+
+def upgrade() -> None:
+    if _index_is_unique():
+        return
+    op.execute(
+        "DELETE FROM creature_images WHERE id < "
+        "(SELECT MAX(newer.id) FROM creature_images AS newer "
+        "WHERE newer.creature_name = creature_images.creature_name)"
+    )
+    _replace_index(unique=True)
+
+
+def downgrade() -> None:
+    if _index_is_unique():
+        _replace_index(unique=False)
@@ -0,0 +1,60 @@
+"""Store the current creature of an encounter instead of its turn position
+
+encounters.current_turn was a position in initiative order, so adding,
+removing or reordering creatures handed the turn to someone else.
+encounters.current_creature_id names the creature instead; it is filled
+from the creature at each encounter's current_turn, which is then
+dropped. Databases created by create_all after this change already have
+the new column.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Each creature's position in its encounter's turn order, as the models sort them
+POSITIONS = (
+    "SELECT id, encounter_id, row_number() OVER ("
+    "PARTITION BY encounter_id ORDER BY initiative DESC, created_at, id) - 1 AS position FROM creatures"
+)
+
+
+def _columns() -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns("encounters")}
+
+
+def upgrade() -> None:
+    columns = _columns()
+    if "current_creature_id" not in columns:
+        uuid_type = postgresql.UUID(as_uuid=True) if op.get_bind().dialect.name == "postgresql" else sa.CHAR(36)
+        op.add_column("encounters", sa.Column("current_creature_id", uuid_type, nullable=True))
+    if "current_turn" in columns:
+        op.execute(
+            f"UPDATE encounters SET current_creature_id = (SELECT positions.id FROM ({POSITIONS}) AS positions "
+            "WHERE positions.encounter_id = encounters.id AND positions.position = encounters.current_turn)"
+        )
+        with op.batch_alter_table("encounters") as batch_op:
+            batch_op.drop_column("current_turn")
+
+
+def downgrade() -> None:
+    columns = _columns()
+    if "current_turn" not in columns:
+        op.add_column("encounters", sa.Column("current_turn", sa.Integer(), server_default="0", nullable=False))
+    if "current_creature_id" in columns:
+        op.execute(
+            f"UPDATE encounters SET current_turn = COALESCE((SELECT positions.position FROM ({POSITIONS}) AS positions "
+            "WHERE positions.id = encounters.current_creature_id), 0)"
+        )
+        with op.batch_alter_table("encounters") as batch_op:
+            batch_op.drop_column("current_creature_id")
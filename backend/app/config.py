@@ -7,13 +7,29 @@ import sys
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = True  # asyncpg/aiosqlite sessions; False falls back to the sync driver
     
+    # Cross-worker change notifications: auto (LISTEN/NOTIFY on PostgreSQL, in-memory otherwise), postgres, memory
+    PUBSUB_BACKEND: str = "auto"
+    
+    # Live combat sessions: write-behind store shared by the workers on a host, flushed every N seconds
+    LIVE_SESSION_STORE: str = "/tmp/live_sessions.db"
+    LIVE_SESSION_FLUSH_INTERVAL: float = 5.0
+
     # JWT - No defaults for security
     JWT_SECRET: str
     SECRET_KEY: Optional[str] = None  # Will be set from JWT_SECRET if not provided
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 24
     
+    # Authenticated-user cache (per worker); 0 disables it
+    AUTH_CACHE_SIZE: int = 1024
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    
+    # bcrypt worker pool (per worker); requests beyond workers + queue get 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 16
+    
     # File Upload
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 10485760  # 10MB
@@ -7,7 +7,7 @@ class CreatureImageDB(Base):
     __tablename__ = "creature_images"
 
     id = Column(Integer, primary_key=True, index=True)
-    creature_name = Column(String(255), index=True, nullable=False)
+    creature_name = Column(String(255), unique=True, index=True, nullable=False)  # Stored lowercase
     creature_type = Column(String(50), index=True, default="other")  # player, enemy, ally, other
     image_url = Column(Text, nullable=False)
     image_source = Column(String(255))  # Attribution/source info
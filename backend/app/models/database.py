@@ -1,11 +1,40 @@
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from pathlib import Path
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Async drivers used for each sync dialect in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(database_url: str) -> str:
+    """Translate a sync DATABASE_URL into its async-driver equivalent."""
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    query = dict(url.query)
+    # asyncpg spells libpq's sslmode as ssl
+    if drivername == "postgresql+asyncpg" and "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername=drivername, query=query).render_as_string(hide_password=False)
+
+def _connect_args(database_url: str, timeout_key: str) -> dict:
+    """Driver connect-timeout argument (sqlite has no connect timeout)."""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {timeout_key: 10}
+
 # Create database engine with error handling
 try:
     logger.info(f"Connecting to database: {settings.DATABASE_URL[:30]}...")
@@ -13,7 +42,7 @@ try:
         settings.DATABASE_URL,
         pool_pre_ping=True,  # Verify connections before using
         pool_recycle=3600,   # Recycle connections after 1 hour
-        connect_args={"connect_timeout": 10}
+        connect_args=_connect_args(settings.DATABASE_URL, "connect_timeout")
     )
     logger.info("Database engine created successfully")
 except Exception as e:
@@ -21,15 +50,119 @@ except Exception as e:
     raise
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Create async engine and session factory (the default request path)
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    try:
+        async_url = async_database_url(settings.DATABASE_URL)
+        async_engine = create_async_engine(
+            async_url,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            connect_args=_connect_args(async_url, "timeout")
+        )
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        logger.info("Async database engine created successfully")
+    except Exception as e:
+        logger.error(f"Failed to create async database engine: {e}")
+        raise
 
 # Create base class for models
 Base = declarative_base()
 
-# Dependency to get database session
-def get_db():
-    db = SessionLocal()
+class SyncSessionAdapter:
+    """Exposes a sync Session through the AsyncSession API used by the routers.
+
+    Used when DATABASE_ASYNC is disabled; queries run on the calling thread,
+    exactly as they did before the async engine was introduced.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def get_bind(self, *args, **kwargs):
+        return self.sync_session.get_bind(*args, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return self.sync_session.execute(statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return self.sync_session.scalar(statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return self.sync_session.scalars(statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident, **kwargs)
+
+    async def merge(self, instance, load=True, **kwargs):
+        return self.sync_session.merge(instance, load=load, **kwargs)
+
+    async def delete(self, instance):
+        self.sync_session.delete(instance)
+
+    async def flush(self, objects=None):
+        self.sync_session.flush(objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        self.sync_session.refresh(instance, attribute_names)
+
+    async def commit(self):
+        self.sync_session.commit()
+
+    async def rollback(self):
+        self.sync_session.rollback()
+
+    async def close(self):
+        self.sync_session.close()
+
+# Directory holding alembic.ini and the alembic/ migrations
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2]
+
+def upgrade_schema(database_url: Optional[str] = None, configure_logger: bool = True) -> None:
+    """Bring a database up to the current schema: create missing tables, then run the migrations.
+
+    create_all only creates tables that do not exist, so columns and
+    indexes added to existing tables come from the Alembic migrations,
+    which skip whatever create_all already built. Run once before the
+    workers start (see migrations/upgrade_database.py).
+    """
+    from alembic import command
+    from alembic.config import Config
+    from app.models import models  # Registers every table on Base.metadata
+
+    database_url = database_url or settings.DATABASE_URL
+    schema_engine = create_engine(database_url)
     try:
-        yield db
+        models.Base.metadata.create_all(bind=schema_engine)
     finally:
-        db.close()
\ No newline at end of file
+        schema_engine.dispose()
+
+    config = Config(str(MIGRATIONS_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(MIGRATIONS_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    config.attributes["configure_logger"] = configure_logger
+    command.upgrade(config, "head")
+
+# Dependency to get database session
+async def get_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SyncSessionAdapter(SessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Enum, TypeDecorator, CHAR
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Enum, Index, TypeDecorator, CHAR
 from sqlalchemy.dialects.postgresql import UUID as PostgreSQL_UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 import uuid
 
 from .database import Base
@@ -46,6 +48,36 @@ class UUID(TypeDecorator):
             else:
                 return value
 
+class new_uuid(FunctionElement):
+    """A random UUID generated by the database, for rows created by INSERT ... SELECT."""
+    type = UUID()
+    inherit_cache = True
+
+@compiles(new_uuid, "postgresql")
+def _new_uuid_postgresql(element, compiler, **kw):
+    return "gen_random_uuid()"
+
+@compiles(new_uuid)
+def _new_uuid_default(element, compiler, **kw):
+    # Version 4 UUID text in the form str(uuid.uuid4()) gives, as UUID stores it on SQLite
+    return (
+        "lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || substr(hex(randomblob(2)), 2) || '-' || "
+        "substr('89ab', 1 + (abs(random()) % 4), 1) || substr(hex(randomblob(2)), 2) || '-' || hex(randomblob(6)))"
+    )
+
+class roll_d20(FunctionElement):
+    """A d20 roll (1-20) made by the database, once per row."""
+    type = Integer()
+    inherit_cache = True
+
+@compiles(roll_d20, "postgresql")
+def _roll_d20_postgresql(element, compiler, **kw):
+    return "(floor(random() * 20)::integer + 1)"
+
+@compiles(roll_d20)
+def _roll_d20_default(element, compiler, **kw):
+    return "(abs(random()) % 20 + 1)"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -55,6 +87,10 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Server-generated columns come back with INSERT/UPDATE ... RETURNING,
+    # so written objects can be serialized without a refresh
+    __mapper_args__ = {"eager_defaults": True}
+    
     # Relationships
     encounters = relationship("Encounter", back_populates="user", cascade="all, delete-orphan")
     presets = relationship("Preset", back_populates="user", cascade="all, delete-orphan")
@@ -67,12 +103,35 @@ class Encounter(Base):
     name = Column(String(255), nullable=False)
     background_image = Column(String(255), nullable=True)
     round_number = Column(Integer, default=1, nullable=False)
+    # Whose turn it is; unset (or a creature no longer there) means the first creature's.
+    # Not a foreign key, so encounters and creatures do not reference each other
+    current_creature_id = Column(UUID(), nullable=True)
+    creature_count = Column(Integer, default=0, server_default="0", nullable=False)  # See app.utils.creature_counts
+    version = Column(Integer, server_default="1", nullable=False)  # Bumped by every change; see app.utils.responses
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # One user's encounters, newest first; on PostgreSQL it covers the
+    # listing's columns so the home page is an index-only scan
+    __table_args__ = (
+        Index(
+            "ix_encounters_user_id_created_at", user_id, created_at.desc(),
+            postgresql_include=["id", "name", "background_image", "creature_count"]
+        ),
+    )
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": version}
+    
     # Relationships
     user = relationship("User", back_populates="encounters")
-    creatures = relationship("Creature", back_populates="encounter", cascade="all, delete-orphan")
+    creatures = relationship(
+        "Creature", back_populates="encounter", cascade="all, delete-orphan",
+        order_by="(Creature.initiative.desc(), Creature.created_at, Creature.id)"  # Turn order
+    )
+    
+    @property
+    def current_turn(self) -> int:
+        """Position of the current creature in turn order; needs the creatures loaded."""
+        return turn_position(self.creatures, self.current_creature_id)
 
 class Preset(Base):
     __tablename__ = "presets"
@@ -82,12 +141,23 @@ class Preset(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     background_image = Column(String(255), nullable=True)
+    creature_count = Column(Integer, default=0, server_default="0", nullable=False)  # See app.utils.creature_counts
+    version = Column(Integer, server_default="1", nullable=False)  # Bumped by every change; see app.utils.responses
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # One user's presets, newest first
+    __table_args__ = (
+        Index("ix_presets_user_id_created_at", user_id, created_at.desc()),
+    )
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": version}
+    
     # Relationships
     user = relationship("User", back_populates="presets")
-    preset_creatures = relationship("PresetCreature", back_populates="preset", cascade="all, delete-orphan")
+    preset_creatures = relationship(
+        "PresetCreature", back_populates="preset", cascade="all, delete-orphan",
+        order_by="(PresetCreature.initiative.desc(), PresetCreature.created_at, PresetCreature.id)"
+    )
 
 class Creature(Base):
     __tablename__ = "creatures"
@@ -100,6 +170,12 @@ class Creature(Base):
     image_url = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # An encounter's creatures in turn order
+    __table_args__ = (
+        Index("ix_creatures_encounter_id_initiative", encounter_id, initiative.desc()),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+    
     # Relationships
     encounter = relationship("Encounter", back_populates="creatures")
 
@@ -114,5 +190,22 @@ class PresetCreature(Base):
     image_url = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # A preset's creatures in turn order
+    __table_args__ = (
+        Index("ix_preset_creatures_preset_id_initiative", preset_id, initiative.desc()),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+    
     # Relationships
-    preset = relationship("Preset", back_populates="preset_creatures")
\ No newline at end of file
+    preset = relationship("Preset", back_populates="preset_creatures")
+
+def in_turn_order(creatures):
+    """Sort creatures or preset creatures as their relationships order them."""
+    return sorted(creatures, key=lambda c: (-c.initiative, c.created_at, c.id))
+
+def turn_position(creatures_in_order, current_creature_id) -> int:
+    """Position of the current creature among creatures in turn order; 0 if it is not there."""
+    for position, creature in enumerate(creatures_in_order):
+        if str(creature.id) == str(current_creature_id):
+            return position
+    return 0
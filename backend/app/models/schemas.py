@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, List
+from typing import Any, Literal, Optional, List
 from datetime import datetime
 import uuid
 from .enums import CreatureType
@@ -47,6 +47,15 @@ class CreatureUpdate(BaseModel):
     creature_type: Optional[CreatureType] = None
     image_url: Optional[str] = None
 
+class CreatureBatchUpdate(CreatureUpdate):
+    id: uuid.UUID
+
+class CreatureBatch(BaseModel):
+    """Creatures to add, change and remove in one transaction."""
+    create: List[CreatureCreateNested] = Field([], max_length=500)
+    update: List[CreatureBatchUpdate] = Field([], max_length=500)
+    delete: List[uuid.UUID] = Field([], max_length=500)
+
 class CreatureResponse(CreatureBase):
     id: uuid.UUID
     encounter_id: uuid.UUID
@@ -69,10 +78,18 @@ class EncounterUpdate(BaseModel):
 class EncounterRoundUpdate(BaseModel):
     round_number: int = Field(..., ge=1)
 
+class EncounterTurnState(BaseModel):
+    id: uuid.UUID
+    round_number: int
+    current_turn: int
+    current_creature_id: Optional[uuid.UUID] = None
+
 class EncounterResponse(EncounterBase):
     id: uuid.UUID
     user_id: uuid.UUID
     round_number: int
+    current_turn: int = 0
+    live: bool = False  # Turn, round and initiatives come from a live session
     created_at: datetime
     updated_at: datetime
     creatures: List[CreatureResponse] = []
@@ -95,21 +112,48 @@ class PresetBase(BaseModel):
 class PresetCreate(PresetBase):
     creatures: List[CreatureCreateNested] = []
 
+class PresetCreatureUpdate(CreatureCreateNested):
+    """A preset creature in an update; send the id of an existing creature to keep it."""
+    id: Optional[uuid.UUID] = None
+
 class PresetUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     description: Optional[str] = None
     background_image: Optional[str] = None
-    creatures: Optional[List[CreatureCreateNested]] = None
+    creatures: Optional[List[PresetCreatureUpdate]] = None  # The full list; missing creatures are removed
+
+class PresetDocument(PresetBase):
+    """A preset as edited by JSON Patch."""
+    creatures: List[PresetCreatureUpdate] = []
+
+class JsonPatchOperation(BaseModel):
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(None, alias="from")
+    
+    model_config = ConfigDict(populate_by_name=True)
+
+class PresetCreatureResponse(CreatureCreateNested):
+    id: uuid.UUID
+    
+    model_config = ConfigDict(from_attributes=True)
 
 class PresetResponse(PresetBase):
     id: uuid.UUID
     user_id: uuid.UUID
     created_at: datetime
     updated_at: datetime
-    creatures: List[CreatureCreateNested] = []  # Using CreatureCreateNested since presets are templates without encounters
+    creatures: List[PresetCreatureResponse] = []  # Templates: no encounter_id
     
     model_config = ConfigDict(from_attributes=True)
 
+class PresetInstantiate(BaseModel):
+    """Encounter to create from a preset; name and background default to the preset's."""
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    background_image: Optional[str] = None
+    reroll_initiative: bool = False  # Roll a d20 for every creature instead of copying initiative
+
 class PresetSummary(PresetBase):
     id: uuid.UUID
     created_at: datetime
@@ -117,6 +161,15 @@ class PresetSummary(PresetBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+# Creature Image Schemas
+class CreatureImageLookup(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    user_image_url: Optional[str] = None
+
+class CreatureImageBatchRequest(BaseModel):
+    creatures: List[CreatureImageLookup] = Field(..., max_length=500)
+    candidates: int = Field(0, ge=0, le=20)
+
 # File Upload Schemas
 class FileUpload(BaseModel):
     filename: str
@@ -1,4 +1,4 @@
 # Routers package initialization
-from . import auth, users, encounters, creatures, uploads, presets, simple_creature_images
+from . import auth, users, encounters, creatures, uploads, presets, simple_creature_images, encounter_events
 
-__all__ = ["auth", "users", "encounters", "creatures", "uploads", "presets", "simple_creature_images"]
\ No newline at end of file
+__all__ = ["auth", "users", "encounters", "creatures", "uploads", "presets", "simple_creature_images", "encounter_events"]
\ No newline at end of file
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from app.models.database import get_db
 from app.models.models import User
 from app.models.schemas import UserCreate, UserLogin, UserResponse, Token, ErrorResponse
-from app.utils.auth import hash_password, verify_password, create_access_token
+from app.utils.auth import hash_password_async, verify_password_async, create_access_token
 from app.utils.dependencies import get_current_user
 import logging
 
@@ -12,7 +13,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/register", response_model=Token, responses={400: {"model": ErrorResponse}})
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
     try:
         # Check if passwords match
@@ -24,7 +25,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         
         # Check if user already exists
         try:
-            existing_user = db.query(User).filter(User.email == user_data.email).first()
+            existing_user = await db.scalar(select(User).where(User.email == user_data.email))
         except OperationalError as e:
             logger.error(f"Database connection error during user lookup: {e}")
             raise HTTPException(
@@ -39,7 +40,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
             )
         
         # Create new user
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         db_user = User(
             email=user_data.email,
             password_hash=hashed_password
@@ -47,18 +48,17 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         
         try:
             db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
+            await db.commit()
         except OperationalError as e:
             logger.error(f"Database connection error during user creation: {e}")
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Database connection error. Please try again later."
             )
         except SQLAlchemyError as e:
             logger.error(f"Database error during user creation: {e}")
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create user. Please try again."
@@ -83,12 +83,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=Token, responses={401: {"model": ErrorResponse}})
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login user."""
     try:
         # Find user by email
         try:
-            user = db.query(User).filter(User.email == user_data.email).first()
+            user = await db.scalar(select(User).where(User.email == user_data.email))
         except OperationalError as e:
             logger.error(f"Database connection error during login: {e}")
             raise HTTPException(
@@ -96,7 +96,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
                 detail="Database connection error. Please try again later."
             )
         
-        if not user or not verify_password(user_data.password, user.password_hash):
+        if not user or not await verify_password_async(user_data.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
@@ -1,40 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.models.database import get_db
 from app.models.models import User, Creature, Encounter
 from app.models.schemas import CreatureCreate, CreatureUpdate, CreatureResponse, ErrorResponse
+from app.utils.creature_counts import apply_creature_update, record_creature_change
 from app.utils.dependencies import get_current_user
+from app.utils.live_sessions import live_sessions
+from app.utils.pagination import PageParams
+from app.utils.realtime import encounter_events, CREATURE_ADDED, CREATURE_UPDATED, CREATURE_REMOVED
 import uuid
 
 router = APIRouter()
 
 @router.get("", response_model=List[CreatureResponse])
 async def get_creatures(
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all creatures for the current user across all encounters."""
-    creatures = db.query(Creature).join(Encounter).filter(
-        Encounter.user_id == current_user.id
-    ).order_by(Creature.initiative.desc()).all()
+    """Get the current user's creatures across all encounters, highest initiative first.
+
+    Optionally one page at a time. Creatures of live encounters show their
+    live initiative; the order and page boundaries follow the initiatives
+    last flushed to the database.
+    """
+    columns = {
+        "id": Creature.id,
+        "encounter_id": Creature.encounter_id,
+        "name": Creature.name,
+        "initiative": Creature.initiative,
+        "creature_type": Creature.creature_type,
+        "image_url": Creature.image_url,
+        "created_at": Creature.created_at
+    }
+    live = await live_sessions.initiatives(current_user.id)
+
+    def overlay_live(row):
+        row["initiative"] = live.get(str(row["id"]), row["initiative"])
+
+    rows = await page.fetch(
+        db,
+        select(Creature).join(Encounter).where(Encounter.user_id == current_user.id),
+        columns,
+        keys=["initiative", "id"],
+        response=response,
+        adjust=overlay_live if live else None
+    )
     
-    return [CreatureResponse.model_validate(c) for c in creatures]
+    return page.render(rows, CreatureResponse, response)
 
 @router.post("", response_model=CreatureResponse, status_code=status.HTTP_201_CREATED)
 async def create_creature(
     creature_data: CreatureCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new creature and add it to an encounter."""
-    # Verify the encounter exists and belongs to the user
-    encounter = db.query(Encounter).filter(
-        Encounter.id == creature_data.encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
-    
-    if not encounter:
+    # Verify the encounter exists and belongs to the user while counting the creature
+    if not await record_creature_change(db, creature_data.encounter_id, current_user.id, 1):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Encounter not found"
@@ -50,22 +76,27 @@ async def create_creature(
     )
     
     db.add(db_creature)
-    db.commit()
-    db.refresh(db_creature)
+    await db.commit()
+    await live_sessions.sync_creatures(db_creature.encounter_id, added=[db_creature])
+    
+    response = CreatureResponse.model_validate(db_creature)
+    await encounter_events.publish(db_creature.encounter_id, CREATURE_ADDED, response.model_dump(mode="json"))
     
-    return CreatureResponse.model_validate(db_creature)
+    return response
 
 @router.get("/{creature_id}", response_model=CreatureResponse)
 async def get_creature(
     creature_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific creature by ID."""
-    creature = db.query(Creature).join(Encounter).filter(
-        Creature.id == creature_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    creature = await db.scalar(
+        select(Creature).join(Encounter).where(
+            Creature.id == creature_id,
+            Encounter.user_id == current_user.id
+        )
+    )
     
     if not creature:
         raise HTTPException(
@@ -73,21 +104,23 @@ async def get_creature(
             detail="Creature not found"
         )
     
-    return CreatureResponse.model_validate(creature)
+    return await live_sessions.creature_response(creature, current_user.id)
 
 @router.put("/{creature_id}", response_model=CreatureResponse)
 async def update_creature(
     creature_id: uuid.UUID,
     creature_data: CreatureUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a creature by ID."""
     # Get creature and verify ownership
-    creature = db.query(Creature).join(Encounter).filter(
-        Creature.id == creature_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    creature = await db.scalar(
+        select(Creature).join(Encounter).where(
+            Creature.id == creature_id,
+            Encounter.user_id == current_user.id
+        )
+    )
     
     if not creature:
         raise HTTPException(
@@ -95,33 +128,25 @@ async def update_creature(
             detail="Creature not found"
         )
     
-    # Update fields if provided
-    if creature_data.name is not None:
-        creature.name = creature_data.name
-    if creature_data.initiative is not None:
-        creature.initiative = creature_data.initiative
-    if creature_data.creature_type is not None:
-        creature.creature_type = creature_data.creature_type
-    if creature_data.image_url is not None:
-        creature.image_url = creature_data.image_url
-    
-    db.commit()
-    db.refresh(creature)
+    response = await apply_creature_update(db, creature, current_user.id, creature_data)
+    await encounter_events.publish(creature.encounter_id, CREATURE_UPDATED, response.model_dump(mode="json"))
     
-    return CreatureResponse.model_validate(creature)
+    return response
 
 @router.delete("/{creature_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_creature(
     creature_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a creature."""
     # Get creature and verify ownership
-    creature = db.query(Creature).join(Encounter).filter(
-        Creature.id == creature_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    creature = await db.scalar(
+        select(Creature).join(Encounter).where(
+            Creature.id == creature_id,
+            Encounter.user_id == current_user.id
+        )
+    )
     
     if not creature:
         raise HTTPException(
@@ -129,7 +154,12 @@ async def delete_creature(
             detail="Creature not found"
         )
     
-    db.delete(creature)
-    db.commit()
+    # Pass the turn on first; the creature must still be there to find the next one
+    await record_creature_change(db, creature.encounter_id, current_user.id, -1, removed=[creature_id])
+    await db.delete(creature)
+    await db.commit()
+    await live_sessions.sync_creatures(creature.encounter_id, removed=[creature_id])
+    
+    await encounter_events.publish(creature.encounter_id, CREATURE_REMOVED, {"id": str(creature_id)})
     
     return {"message": "Creature deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+import asyncio
+import json
+import uuid
+
+from app.models.database import get_db
+from app.models.models import Encounter
+from app.models.schemas import EncounterResponse
+from app.utils.dependencies import get_user_from_token
+from app.utils.live_sessions import live_sessions
+from app.utils.realtime import SNAPSHOT, encounter_events, make_event
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle SSE stream
+SSE_KEEPALIVE_SECONDS = 15.0
+
+async def _encounter_snapshot(db: AsyncSession, encounter_id: uuid.UUID, token: str) -> dict:
+    """Authenticate the token and return the encounter as a snapshot event.
+
+    The database session is closed before returning so a long-lived push
+    connection does not hold a pooled connection.
+    """
+    try:
+        user = await get_user_from_token(token, db)
+        encounter = await db.scalar(
+            select(Encounter).where(
+                Encounter.id == encounter_id,
+                Encounter.user_id == user.id
+            ).options(selectinload(Encounter.creatures))
+        )
+        if not encounter:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Encounter not found"
+            )
+        response = EncounterResponse.model_validate(encounter)
+        live = await live_sessions.get(encounter_id, user.id)
+        if live is not None:
+            response = live.apply_to(response)
+        data = response.model_dump(mode="json")
+    finally:
+        await db.close()
+
+    return make_event(SNAPSHOT, encounter_id, data)
+
+def _format_sse(event: dict) -> str:
+    """Encode an event as a server-sent event frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+async def sse_stream(encounter_id: uuid.UUID, snapshot: dict, queue: asyncio.Queue,
+                     keepalive: float = SSE_KEEPALIVE_SECONDS):
+    """Yield the snapshot, then each published event, until the client goes away."""
+    try:
+        yield _format_sse(snapshot)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _format_sse(event)
+    finally:
+        encounter_events.unsubscribe(encounter_id, queue)
+
+@router.websocket("/{encounter_id}/ws")
+async def encounter_websocket(
+    websocket: WebSocket,
+    encounter_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Push encounter changes over a WebSocket. Authenticate with ?token=<jwt>."""
+    # Subscribe before reading the snapshot so no change falls in between
+    queue = encounter_events.subscribe(encounter_id)
+    try:
+        snapshot = await _encounter_snapshot(db, encounter_id, websocket.query_params.get("token", ""))
+    except HTTPException as e:
+        encounter_events.unsubscribe(encounter_id, queue)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    await websocket.accept()
+
+    async def forward_events():
+        await websocket.send_json(snapshot)
+        while True:
+            await websocket.send_json(await queue.get())
+
+    sender = asyncio.create_task(forward_events())
+    try:
+        # Messages from the client are ignored; this only waits for it to leave
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        encounter_events.unsubscribe(encounter_id, queue)
+
+@router.get("/{encounter_id}/events")
+async def encounter_event_stream(
+    encounter_id: uuid.UUID,
+    token: str = Query(..., description="JWT access token (EventSource cannot send headers)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Push encounter changes as server-sent events (fallback for the WebSocket)."""
+    queue = encounter_events.subscribe(encounter_id)
+    try:
+        snapshot = await _encounter_snapshot(db, encounter_id, token)
+    except HTTPException:
+        encounter_events.unsubscribe(encounter_id, queue)
+        raise
+
+    return StreamingResponse(
+        sse_stream(encounter_id, snapshot, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
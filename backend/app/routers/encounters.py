@@ -1,52 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Optional
 from app.models.database import get_db
-from app.models.models import User, Encounter, Creature
+from app.models.models import User, Encounter, Creature, in_turn_order
 from app.models.schemas import (
-    EncounterCreate, EncounterUpdate, EncounterRoundUpdate, EncounterResponse, 
-    EncounterSummary, CreatureCreate, CreatureCreateNested, CreatureUpdate, CreatureResponse, ErrorResponse
+    EncounterCreate, EncounterUpdate, EncounterRoundUpdate, EncounterTurnState, EncounterResponse, 
+    EncounterSummary, CreatureCreate, CreatureCreateNested, CreatureUpdate, CreatureBatch, CreatureBatchUpdate,
+    CreatureResponse, ErrorResponse
 )
+from app.utils.bulk import case_update_values
+from app.utils.creature_counts import apply_creature_update, record_creature_change
 from app.utils.dependencies import get_current_user
+from app.utils.live_sessions import LiveState, LiveVersionConflict, live_sessions
+from app.utils.pagination import PageParams
+from app.utils.preconditions import check_if_match, commit_versioned, precondition_failed
+from app.utils.responses import etag_headers, etag_matches, fast_json_response, not_modified, row_etag, validate_rows
+from app.utils.realtime import (
+    encounter_events, ENCOUNTER_UPDATED, ENCOUNTER_DELETED,
+    CREATURE_ADDED, CREATURE_UPDATED, CREATURE_REMOVED, CREATURES_CHANGED
+)
 import uuid
 
 router = APIRouter()
 
+async def _get_user_encounter(
+    db: AsyncSession,
+    encounter_id: uuid.UUID,
+    user_id: uuid.UUID,
+    with_creatures: bool = True
+) -> Encounter:
+    """Load an encounter owned by the user, raising 404 if it does not exist."""
+    query = select(Encounter).where(
+        Encounter.id == encounter_id,
+        Encounter.user_id == user_id
+    )
+    if with_creatures:
+        query = query.options(selectinload(Encounter.creatures))
+    encounter = await db.scalar(query.execution_options(populate_existing=True))
+    
+    if not encounter:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Encounter not found"
+        )
+    
+    return encounter
+
+async def _get_user_creature(
+    db: AsyncSession,
+    encounter_id: uuid.UUID,
+    creature_id: uuid.UUID,
+    user_id: uuid.UUID
+) -> Creature:
+    """Load a creature of an encounter owned by the user, raising 404 if missing."""
+    creature = await db.scalar(
+        select(Creature).join(Encounter).where(
+            Creature.id == creature_id,
+            Creature.encounter_id == encounter_id,
+            Encounter.user_id == user_id
+        )
+    )
+    
+    if not creature:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Creature not found"
+        )
+    
+    return creature
+
+def _encounter_etag(version: int, updated_at, live: Optional[LiveState]) -> str:
+    """ETag of an encounter: its row version, plus its live session's version while live."""
+    return row_etag(version, updated_at, *([f"live{live.version}"] if live is not None else []))
+
+def _encounter_json(encounter: Encounter, live: Optional[LiveState], status_code: int = status.HTTP_200_OK) -> Response:
+    """Serialize an encounter with its ETag, overlaying the live session state if it has one."""
+    response = EncounterResponse.model_validate(encounter)
+    if live is not None:
+        live.apply_to(response)
+    return fast_json_response(
+        response, EncounterResponse, status_code=status_code,
+        headers=etag_headers(_encounter_etag(encounter.version, encounter.updated_at, live))
+    )
+
+async def _creature_responses(creatures, encounter_id: uuid.UUID, user_id: uuid.UUID) -> List[CreatureResponse]:
+    """Serialize an encounter's creatures in turn order, with live initiatives if it is live."""
+    responses = validate_rows(CreatureResponse, creatures)
+    live = await live_sessions.get(encounter_id, user_id)
+    if live is not None:
+        for response in responses:
+            response.initiative = live.initiative_of(response.id, response.initiative)
+        responses.sort(key=lambda c: (-c.initiative, c.created_at.isoformat(), str(c.id)))
+    return responses
+
 @router.get("", response_model=List[EncounterSummary])
 async def get_user_encounters(
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all encounters for the current user."""
-    encounters = db.query(
-        Encounter.id,
-        Encounter.name,
-        Encounter.background_image,
-        Encounter.created_at,
-        func.count(Creature.id).label("creature_count")
-    ).outerjoin(Creature).filter(
-        Encounter.user_id == current_user.id
-    ).group_by(
-        Encounter.id, Encounter.name, Encounter.background_image, Encounter.created_at
-    ).order_by(Encounter.created_at.desc()).all()
-    
-    return [
-        EncounterSummary(
-            id=enc.id,
-            name=enc.name,
-            background_image=enc.background_image,
-            created_at=enc.created_at,
-            creature_count=enc.creature_count
-        )
-        for enc in encounters
-    ]
+    """Get the current user's encounters, newest first, optionally one page at a time."""
+    columns = {
+        "id": Encounter.id,
+        "name": Encounter.name,
+        "background_image": Encounter.background_image,
+        "created_at": Encounter.created_at,
+        "creature_count": Encounter.creature_count
+    }
+    rows = await page.fetch(
+        db,
+        select(Encounter).where(Encounter.user_id == current_user.id),
+        columns,
+        keys=["created_at", "id"],
+        response=response
+    )
+    
+    return page.render(rows, EncounterSummary, response)
 
 @router.post("", response_model=EncounterResponse, status_code=status.HTTP_201_CREATED)
 async def create_encounter(
     encounter_data: EncounterCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new encounter."""
     try:
@@ -57,78 +136,83 @@ async def create_encounter(
             background_image=encounter_data.background_image
         )
         
-        db.add(db_encounter)
-        db.flush()  # Get the ID without committing
-        
         # Create creatures
+        creatures = []
         for idx, creature_data in enumerate(encounter_data.creatures):
             try:
-                db_creature = Creature(
-                    encounter_id=db_encounter.id,
+                creatures.append(Creature(
                     name=creature_data.name,
                     initiative=creature_data.initiative,
                     creature_type=creature_data.creature_type,
                     image_url=creature_data.image_url
-                )
-                db.add(db_creature)
+                ))
             except Exception as creature_error:
-                db.rollback()
+                await db.rollback()
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Error creating creature {idx + 1} '{creature_data.name}': {str(creature_error)}"
                 )
+        db_encounter.creatures = creatures
+        db_encounter.creature_count = len(creatures)
         
-        db.commit()
-        db.refresh(db_encounter)
+        # One INSERT for the encounter and one for its creatures; RETURNING
+        # fills in created_at, so the response needs no reload
+        db.add(db_encounter)
+        await db.commit()
+        set_committed_value(db_encounter, "creatures", in_turn_order(creatures))
         
-        return EncounterResponse.model_validate(db_encounter)
+        return _encounter_json(db_encounter, None, status_code=status.HTTP_201_CREATED)
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create encounter: {str(e)}"
         )
 
-@router.get("/{encounter_id}", response_model=EncounterResponse)
+@router.get("/{encounter_id}", response_model=EncounterResponse, responses={304: {"description": "Not modified"}})
 async def get_encounter(
     encounter_id: uuid.UUID,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get a specific encounter."""
-    encounter = db.query(Encounter).filter(
-        Encounter.id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    """Get a specific encounter; 304 if it still matches the If-None-Match ETag."""
+    live = await live_sessions.get(encounter_id, current_user.id)
+    if if_none_match is not None:
+        # One indexed lookup; the creatures are only loaded if the client's copy is stale
+        row = (await db.execute(
+            select(Encounter.version, Encounter.updated_at).where(
+                Encounter.id == encounter_id,
+                Encounter.user_id == current_user.id
+            )
+        )).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Encounter not found"
+            )
+        etag = _encounter_etag(row.version, row.updated_at, live)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
     
-    if not encounter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Encounter not found"
-        )
+    encounter = await _get_user_encounter(db, encounter_id, current_user.id)
     
-    return EncounterResponse.model_validate(encounter)
+    return _encounter_json(encounter, live)
 
-@router.put("/{encounter_id}", response_model=EncounterResponse)
+@router.put("/{encounter_id}", response_model=EncounterResponse, responses={412: {"model": ErrorResponse}})
 async def update_encounter(
     encounter_id: uuid.UUID,
     encounter_data: EncounterUpdate,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update an encounter."""
-    encounter = db.query(Encounter).filter(
-        Encounter.id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
-    
-    if not encounter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Encounter not found"
-        )
+    """Update an encounter; with If-Match, only if it still has that ETag."""
+    encounter = await _get_user_encounter(db, encounter_id, current_user.id)
+    live = await live_sessions.get(encounter_id, current_user.id)
+    check_if_match(if_match, _encounter_etag(encounter.version, encounter.updated_at, live), "Encounter")
     
     # Update fields
     if encounter_data.name is not None:
@@ -136,56 +220,192 @@ async def update_encounter(
     if encounter_data.background_image is not None:
         encounter.background_image = encounter_data.background_image
     
-    db.commit()
-    db.refresh(encounter)
+    await commit_versioned(db, if_match, "Encounter")
     
-    return EncounterResponse.model_validate(encounter)
+    await encounter_events.publish(
+        encounter_id, ENCOUNTER_UPDATED, encounter_data.model_dump(mode="json", exclude_none=True)
+    )
+    
+    return _encounter_json(encounter, live)
 
-@router.patch("/{encounter_id}/round", response_model=EncounterResponse)
+@router.patch("/{encounter_id}/round", response_model=EncounterResponse, responses={412: {"model": ErrorResponse}})
 async def update_encounter_round(
     encounter_id: uuid.UUID,
     round_data: EncounterRoundUpdate,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update the round number of an encounter."""
-    encounter = db.query(Encounter).filter(
-        Encounter.id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    """Update the round number of an encounter; with If-Match, only if it still has that ETag."""
+    encounter = await _get_user_encounter(db, encounter_id, current_user.id)
+    live = await live_sessions.get(encounter_id, current_user.id)
+    check_if_match(if_match, _encounter_etag(encounter.version, encounter.updated_at, live), "Encounter")
     
-    if not encounter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Encounter not found"
+    if live is not None:
+        def set_round(state):
+            state.round_number = round_data.round_number
+        try:
+            live = await live_sessions.modify(
+                encounter_id, set_round, expected_version=live.version if if_match is not None else None
+            )
+        except LiveVersionConflict:
+            raise precondition_failed("Encounter")
+    else:
+        encounter.round_number = round_data.round_number
+        await commit_versioned(db, if_match, "Encounter")
+    
+    await encounter_events.publish(encounter_id, ENCOUNTER_UPDATED, {"round_number": round_data.round_number})
+    
+    return _encounter_json(encounter, live)
+
+def _turn_statement(encounter_id: uuid.UUID, user_id: uuid.UUID, step: int):
+    """Build the UPDATE that moves an encounter one turn forward (step=1) or back (step=-1).
+
+    The creature count and the creatures' positions in turn order are
+    subqueries, so the whole move is a single statement.
+    """
+    # Correlated explicitly: these are also nested inside subqueries on the positions
+    creature_count = select(func.count(Creature.id)).where(
+        Creature.encounter_id == Encounter.id
+    ).correlate(Encounter).scalar_subquery()
+    # Rank the creatures instead of OFFSET, which SQLite does not allow a column in;
+    # SQLite does not qualify RETURNING columns either, so the subquery is keyed by
+    # encounter_id rather than correlated
+    def positions():
+        return select(
+            Creature.id,
+            (func.row_number().over(
+                order_by=(Creature.initiative.desc(), Creature.created_at, Creature.id)
+            ) - 1).label("position")
+        ).where(Creature.encounter_id == encounter_id).subquery()
+    # An unset current creature, or one no longer there, is the first
+    current = positions()
+    current_position = func.coalesce(
+        select(current.c.position).where(
+            current.c.id == Encounter.current_creature_id
+        ).correlate(Encounter).scalar_subquery(),
+        0
+    )
+    turn = (current_position + step + creature_count) % func.nullif(creature_count, 0)
+    following = positions()
+    next_creature_id = select(following.c.id).where(following.c.position == turn).scalar_subquery()
+    if step > 0:
+        # Wrapping back to the first creature starts the next round
+        round_number = case((turn == 0, Encounter.round_number + 1), else_=Encounter.round_number)
+    else:
+        # Stepping back past the first creature returns to the previous round, never below 1
+        round_number = case(
+            (current_position == 0, case((Encounter.round_number > 1, Encounter.round_number - 1), else_=1)),
+            else_=Encounter.round_number
         )
+
+    # Both CASEs leave an encounter without creatures untouched
+    return update(Encounter).where(
+        Encounter.id == encounter_id,
+        Encounter.user_id == user_id
+    ).values(
+        current_creature_id=case((creature_count == 0, Encounter.current_creature_id), else_=next_creature_id),
+        round_number=case((creature_count == 0, Encounter.round_number), else_=round_number),
+        version=Encounter.version + 1
+    ).returning(
+        Encounter.id, Encounter.round_number, Encounter.current_creature_id, current_position.label("current_turn")
+    ).execution_options(synchronize_session=False)
+
+async def _move_turn(db: AsyncSession, encounter_id: uuid.UUID, user_id: uuid.UUID, step: int) -> EncounterTurnState:
+    """Apply a turn move, publish it and return the new turn state."""
+    live = await live_sessions.get(encounter_id, user_id)
+    if live is not None:
+        live = await live_sessions.modify(encounter_id, lambda state: state.move(step))
+    if live is not None:
+        state = EncounterTurnState(
+            id=encounter_id,
+            round_number=live.round_number,
+            current_turn=live.current_turn(),
+            current_creature_id=live.current_creature()
+        )
+    else:
+        row = (await db.execute(_turn_statement(encounter_id, user_id, step))).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Encounter not found"
+            )
+        await db.commit()
+        state = EncounterTurnState.model_validate(row, from_attributes=True)
+    
+    await encounter_events.publish(
+        encounter_id, ENCOUNTER_UPDATED, state.model_dump(mode="json", exclude={"id"})
+    )
+    
+    return state
+
+@router.post("/{encounter_id}/advance", response_model=EncounterTurnState)
+async def advance_turn(
+    encounter_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Move to the next creature in initiative order, starting a new round after the last."""
+    return await _move_turn(db, encounter_id, current_user.id, 1)
+
+@router.post("/{encounter_id}/rewind", response_model=EncounterTurnState)
+async def rewind_turn(
+    encounter_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Move back to the previous creature in initiative order."""
+    return await _move_turn(db, encounter_id, current_user.id, -1)
+
+@router.post("/{encounter_id}/live", response_model=EncounterResponse)
+async def start_live_session(
+    encounter_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Start live session mode: turn, round and initiative changes are written behind.
+
+    See app.utils.live_sessions for the durability guarantees.
+    """
+    encounter = await _get_user_encounter(db, encounter_id, current_user.id)
+    await live_sessions.start(encounter)
     
-    encounter.round_number = round_data.round_number
-    db.commit()
-    db.refresh(encounter)
+    return _encounter_json(encounter, await live_sessions.get(encounter_id, current_user.id))
+
+@router.delete("/{encounter_id}/live", response_model=EncounterResponse)
+async def end_live_session(
+    encounter_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Flush the live session to the database and leave live session mode."""
+    await _get_user_encounter(db, encounter_id, current_user.id, with_creatures=False)
+    if await live_sessions.get(encounter_id, current_user.id) is not None:
+        try:
+            await live_sessions.end(db, encounter_id)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Live session could not be flushed; it is still live: {str(e)}"
+            )
     
-    return EncounterResponse.model_validate(encounter)
+    encounter = await _get_user_encounter(db, encounter_id, current_user.id)
+    return _encounter_json(encounter, None)
 
 @router.delete("/{encounter_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_encounter(
     encounter_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an encounter."""
-    encounter = db.query(Encounter).filter(
-        Encounter.id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    encounter = await _get_user_encounter(db, encounter_id, current_user.id)
     
-    if not encounter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Encounter not found"
-        )
+    await db.delete(encounter)
+    await commit_versioned(db, None, "Encounter")
+    await live_sessions.discard(encounter_id)
     
-    db.delete(encounter)
-    db.commit()
+    await encounter_events.publish(encounter_id, ENCOUNTER_DELETED)
     
     return {"message": "Encounter deleted successfully"}
 
@@ -193,64 +413,42 @@ async def delete_encounter(
 async def get_encounter_creatures(
     encounter_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get creatures for a specific encounter."""
-    encounter = db.query(Encounter).filter(
-        Encounter.id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
-    
-    if not encounter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Encounter not found"
-        )
+    await _get_user_encounter(db, encounter_id, current_user.id, with_creatures=False)
     
     # Return creatures sorted by initiative (highest first)
-    creatures = db.query(Creature).filter(
-        Creature.encounter_id == encounter_id
-    ).order_by(Creature.initiative.desc()).all()
+    creatures = await db.scalars(
+        select(Creature).where(
+            Creature.encounter_id == encounter_id
+        ).order_by(Creature.initiative.desc(), Creature.created_at, Creature.id)
+    )
     
-    return [CreatureResponse.model_validate(creature) for creature in creatures]
+    return fast_json_response(await _creature_responses(creatures, encounter_id, current_user.id), List[CreatureResponse])
 
 @router.get("/{encounter_id}/creatures/{creature_id}", response_model=CreatureResponse)
 async def get_creature(
     encounter_id: uuid.UUID,
     creature_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific creature from an encounter."""
     # Verify encounter ownership and creature belongs to encounter
-    creature = db.query(Creature).join(Encounter).filter(
-        Creature.id == creature_id,
-        Creature.encounter_id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    creature = await _get_user_creature(db, encounter_id, creature_id, current_user.id)
     
-    if not creature:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Creature not found"
-        )
-    
-    return CreatureResponse.model_validate(creature)
+    return await live_sessions.creature_response(creature, current_user.id)
 
 @router.post("/{encounter_id}/creatures", response_model=CreatureResponse, status_code=status.HTTP_201_CREATED)
 async def add_creature_to_encounter(
     encounter_id: uuid.UUID,
     creature_data: CreatureCreateNested,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Add a creature to an encounter."""
-    encounter = db.query(Encounter).filter(
-        Encounter.id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
-
-    if not encounter:
+    if not await record_creature_change(db, encounter_id, current_user.id, 1):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Encounter not found"
@@ -265,70 +463,136 @@ async def add_creature_to_encounter(
     )
 
     db.add(db_creature)
-    db.commit()
-    db.refresh(db_creature)
+    await db.commit()
+    await live_sessions.sync_creatures(encounter_id, added=[db_creature])
 
-    return CreatureResponse.model_validate(db_creature)
+    response = CreatureResponse.model_validate(db_creature)
+    await encounter_events.publish(encounter_id, CREATURE_ADDED, response.model_dump(mode="json"))
 
-@router.put("/{encounter_id}/creatures/{creature_id}", response_model=CreatureResponse)
-async def update_creature(
+    return response
+
+def _batch_update_statement(encounter_id: uuid.UUID, updates: List[CreatureBatchUpdate]):
+    """One UPDATE for many creatures: each changed column is a CASE on the creature id."""
+    ids = [creature.id for creature in updates]
+    columns = case_update_values(Creature, {
+        creature.id: creature.model_dump(exclude={"id"}, exclude_none=True) for creature in updates
+    })
+    
+    if not columns:
+        # Nothing to change; only confirm the creatures exist
+        return select(Creature).where(Creature.encounter_id == encounter_id, Creature.id.in_(ids))
+    return update(Creature).where(
+        Creature.encounter_id == encounter_id,
+        Creature.id.in_(ids)
+    ).values(**columns).returning(Creature).execution_options(synchronize_session=False)
+
+@router.post("/{encounter_id}/creatures/batch", response_model=List[CreatureResponse])
+async def batch_update_creatures(
     encounter_id: uuid.UUID,
-    creature_id: uuid.UUID,
-    creature_data: CreatureUpdate,
+    batch: CreatureBatch,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update a creature in an encounter."""
-    # Verify encounter ownership and creature belongs to encounter
-    creature = db.query(Creature).join(Encounter).filter(
-        Creature.id == creature_id,
-        Creature.encounter_id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    """Add, update and delete many creatures of an encounter in one transaction.
+
+    Returns the encounter's creatures in initiative order. If any creature to
+    update or delete is not in the encounter, nothing is changed.
+    """
+    update_ids = {creature.id for creature in batch.update}
+    if len(update_ids) != len(batch.update) or len(set(batch.delete)) != len(batch.delete):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each creature can only be updated or deleted once per batch"
+        )
+    if update_ids & set(batch.delete):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A creature cannot be both updated and deleted"
+        )
     
-    if not creature:
+    # Recording the change also checks ownership; a mismatch below rolls it back
+    if not await record_creature_change(
+        db, encounter_id, current_user.id, len(batch.create) - len(batch.delete), removed=batch.delete
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Encounter not found"
+        )
+    
+    removed, updated, added = [], [], []
+    if batch.delete:
+        removed = (await db.scalars(
+            delete(Creature).where(
+                Creature.encounter_id == encounter_id,
+                Creature.id.in_(batch.delete)
+            ).returning(Creature.id).execution_options(synchronize_session=False)
+        )).all()
+    if batch.update:
+        updated = (await db.scalars(_batch_update_statement(encounter_id, batch.update))).all()
+    if len(removed) != len(batch.delete) or len(updated) != len(batch.update):
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Creature not found"
         )
+    if batch.create:
+        # A single multi-row INSERT ... RETURNING
+        added = (await db.scalars(
+            insert(Creature).returning(Creature),
+            [{"encounter_id": encounter_id, **creature.model_dump()} for creature in batch.create]
+        )).all()
+    await db.commit()
+    await live_sessions.sync_creatures(encounter_id, added=added, updated=updated, removed=removed)
     
-    # Update fields
-    if creature_data.name is not None:
-        creature.name = creature_data.name
-    if creature_data.initiative is not None:
-        creature.initiative = creature_data.initiative
-    if creature_data.creature_type is not None:
-        creature.creature_type = creature_data.creature_type
-    if creature_data.image_url is not None:
-        creature.image_url = creature_data.image_url
+    creatures = await db.scalars(
+        select(Creature).where(
+            Creature.encounter_id == encounter_id
+        ).order_by(Creature.initiative.desc(), Creature.created_at, Creature.id)
+    )
+    responses = await _creature_responses(creatures, encounter_id, current_user.id)
     
-    db.commit()
-    db.refresh(creature)
+    await encounter_events.publish(encounter_id, CREATURES_CHANGED, {
+        "added": [CreatureResponse.model_validate(c).model_dump(mode="json") for c in added],
+        "updated": [CreatureResponse.model_validate(c).model_dump(mode="json") for c in updated],
+        "removed": [str(creature_id) for creature_id in removed]
+    })
     
-    return CreatureResponse.model_validate(creature)
+    return fast_json_response(responses, List[CreatureResponse])
+
+@router.put("/{encounter_id}/creatures/{creature_id}", response_model=CreatureResponse)
+async def update_creature(
+    encounter_id: uuid.UUID,
+    creature_id: uuid.UUID,
+    creature_data: CreatureUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Update a creature in an encounter."""
+    # Verify encounter ownership and creature belongs to encounter
+    creature = await _get_user_creature(db, encounter_id, creature_id, current_user.id)
+    
+    response = await apply_creature_update(db, creature, current_user.id, creature_data)
+    await encounter_events.publish(encounter_id, CREATURE_UPDATED, response.model_dump(mode="json"))
+    
+    return response
 
 @router.delete("/{encounter_id}/creatures/{creature_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_creature(
     encounter_id: uuid.UUID,
     creature_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a creature from an encounter."""
     # Verify encounter ownership and creature belongs to encounter
-    creature = db.query(Creature).join(Encounter).filter(
-        Creature.id == creature_id,
-        Creature.encounter_id == encounter_id,
-        Encounter.user_id == current_user.id
-    ).first()
+    creature = await _get_user_creature(db, encounter_id, creature_id, current_user.id)
     
-    if not creature:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Creature not found"
-        )
+    # Pass the turn on first; the creature must still be there to find the next one
+    await record_creature_change(db, encounter_id, current_user.id, -1, removed=[creature_id])
+    await db.delete(creature)
+    await db.commit()
+    await live_sessions.sync_creatures(encounter_id, removed=[creature_id])
     
-    db.delete(creature)
-    db.commit()
+    await encounter_events.publish(encounter_id, CREATURE_REMOVED, {"id": str(creature_id)})
     
     return {"message": "Creature deleted successfully"}
\ No newline at end of file
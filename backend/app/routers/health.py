@@ -1,6 +1,6 @@
 """Health check and monitoring router."""
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from datetime import datetime
 from typing import Dict, Any
@@ -16,7 +16,7 @@ VERSION = os.getenv("APP_VERSION", "1.0.0")
 
 
 @router.get("", status_code=status.HTTP_200_OK)
-async def health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def health_check(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     """
     Comprehensive health check endpoint.
     
@@ -37,7 +37,7 @@ async def health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
     
     # Check database connectivity
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         health_status["database"] = {
             "status": "connected",
             "message": "Database is accessible"
@@ -53,14 +53,14 @@ async def health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
 
 
 @router.get("/ready", status_code=status.HTTP_200_OK)
-async def readiness_check(db: Session = Depends(get_db)) -> Dict[str, str]:
+async def readiness_check(db: AsyncSession = Depends(get_db)) -> Dict[str, str]:
     """
     Readiness probe for Kubernetes/container orchestration.
     
     Returns 200 if the application is ready to serve requests.
     """
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "ready"}
     except Exception as e:
         return {"status": "not ready", "error": str(e)}
@@ -1,54 +1,201 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, Dict, List, Optional, Tuple
 from app.models.database import get_db
-from app.models.models import User, Preset, PresetCreature
+from app.models.models import User, Preset, PresetCreature, Encounter, Creature, in_turn_order, new_uuid, roll_d20
 from app.models.schemas import (
-    PresetCreate, PresetUpdate, PresetResponse, 
-    PresetSummary, CreatureCreate, CreatureCreateNested, ErrorResponse
+    PresetCreate, PresetUpdate, PresetResponse, PresetInstantiate, PresetDocument,
+    PresetCreatureUpdate, PresetCreatureResponse, JsonPatchOperation,
+    PresetSummary, EncounterResponse, ErrorResponse
 )
+from app.utils.bulk import case_update_values
 from app.utils.dependencies import get_current_user
+from app.utils.json_patch import JsonPatchError, JsonPatchTestFailed, apply_patch
+from app.utils.pagination import PageParams
+from app.utils.preconditions import check_if_match, commit_versioned
+from app.utils.responses import etag_headers, etag_matches, fast_json_response, not_modified, row_etag, validate_rows
 import uuid
 
 router = APIRouter()
 
+# Preset creature fields compared when diffing an update
+PRESET_CREATURE_FIELDS = ("name", "initiative", "creature_type", "image_url")
+
+async def _get_user_preset(
+    db: AsyncSession,
+    preset_id: uuid.UUID,
+    user_id: uuid.UUID
+) -> Preset:
+    """Load a preset and its creatures owned by the user, raising 404 if missing."""
+    preset = await db.scalar(
+        select(Preset).where(
+            Preset.id == preset_id,
+            Preset.user_id == user_id
+        ).options(
+            selectinload(Preset.preset_creatures)
+        ).execution_options(populate_existing=True)
+    )
+    
+    if not preset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Preset not found"
+        )
+    
+    return preset
+
+def _preset_response(preset: Preset) -> PresetResponse:
+    """Build the response for a preset with its creatures loaded."""
+    return PresetResponse(
+        id=preset.id,
+        user_id=preset.user_id,
+        name=preset.name,
+        description=preset.description,
+        background_image=preset.background_image,
+        created_at=preset.created_at,
+        updated_at=preset.updated_at,
+        creatures=validate_rows(PresetCreatureResponse, preset.preset_creatures)
+    )
+
+def _preset_json(preset: Preset, status_code: int = status.HTTP_200_OK) -> Response:
+    """Serialize a preset with its creatures loaded, with its ETag."""
+    return fast_json_response(
+        _preset_response(preset), PresetResponse, status_code=status_code,
+        headers=etag_headers(row_etag(preset.version, preset.updated_at))
+    )
+
+def _diff_preset_creatures(
+    existing: List[PresetCreature],
+    desired: List[PresetCreatureUpdate]
+) -> Tuple[List[Dict[str, Any]], Dict[uuid.UUID, Dict[str, Any]], List[uuid.UUID]]:
+    """Work out the inserts, updates and deletes turning ``existing`` into ``desired``.
+
+    Creatures sent with an id keep that row. Creatures sent without one reuse
+    an unclaimed row with identical fields, so clients that resend the whole
+    list unchanged cause no writes; anything else is inserted. Rows not
+    claimed by either are deleted.
+    """
+    rows = {pc.id: pc for pc in existing}
+    claimed = set()
+    inserts: List[Dict[str, Any]] = []
+    updates: Dict[uuid.UUID, Dict[str, Any]] = {}
+    
+    for creature in desired:
+        if creature.id is None:
+            continue
+        row = rows.get(creature.id)
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Creature not found"
+            )
+        if creature.id in claimed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Creature listed more than once"
+            )
+        claimed.add(creature.id)
+        changed = {
+            field: getattr(creature, field)
+            for field in PRESET_CREATURE_FIELDS
+            if getattr(creature, field) != getattr(row, field)
+        }
+        if changed:
+            updates[creature.id] = changed
+    
+    # Rows not claimed by id, grouped by content for matching id-less creatures
+    unclaimed: Dict[tuple, List[uuid.UUID]] = {}
+    for pc in existing:
+        if pc.id not in claimed:
+            unclaimed.setdefault(tuple(getattr(pc, f) for f in PRESET_CREATURE_FIELDS), []).append(pc.id)
+    
+    for creature in desired:
+        if creature.id is not None:
+            continue
+        matches = unclaimed.get(tuple(getattr(creature, f) for f in PRESET_CREATURE_FIELDS))
+        if matches:
+            claimed.add(matches.pop(0))
+        else:
+            inserts.append(creature.model_dump(include=set(PRESET_CREATURE_FIELDS)))
+    
+    deletes = [pc.id for pc in existing if pc.id not in claimed]
+    return inserts, updates, deletes
+
+async def _apply_creature_diff(
+    db: AsyncSession,
+    preset: Preset,
+    desired: List[PresetCreatureUpdate]
+) -> None:
+    """Write the creature changes with at most one DELETE, one UPDATE and one INSERT.
+
+    ``preset.preset_creatures`` is brought up to date from the diff and the
+    INSERT's RETURNING rows, without reloading it.
+    """
+    inserts, updates, deletes = _diff_preset_creatures(preset.preset_creatures, desired)
+    
+    if deletes:
+        await db.execute(delete(PresetCreature).where(PresetCreature.id.in_(deletes)))
+    if updates:
+        await db.execute(
+            update(PresetCreature)
+            .where(PresetCreature.id.in_(list(updates)))
+            .values(case_update_values(PresetCreature, updates))
+            .execution_options(synchronize_session=False)
+        )
+        for pc in preset.preset_creatures:
+            for field, value in updates.get(pc.id, {}).items():
+                set_committed_value(pc, field, value)
+    added = []
+    if inserts:
+        added = (await db.scalars(
+            insert(PresetCreature).returning(PresetCreature),
+            [{"id": uuid.uuid4(), "preset_id": preset.id, **values} for values in inserts]
+        )).all()
+    
+    if inserts or updates or deletes:
+        # Written with the preset's own UPDATE at commit, which also bumps its version
+        preset.creature_count = Preset.creature_count + len(inserts) - len(deletes)
+    
+    deleted = set(deletes)
+    kept = [pc for pc in preset.preset_creatures if pc.id not in deleted]
+    set_committed_value(preset, "preset_creatures", in_turn_order(kept + added))
+
 @router.get("", response_model=List[PresetSummary])
 async def get_user_presets(
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all presets for the current user."""
-    presets = db.query(
-        Preset.id,
-        Preset.name,
-        Preset.description,
-        Preset.background_image,
-        Preset.created_at,
-        func.count(PresetCreature.id).label("creature_count")
-    ).outerjoin(PresetCreature).filter(
-        Preset.user_id == current_user.id
-    ).group_by(
-        Preset.id, Preset.name, Preset.description, Preset.background_image, Preset.created_at
-    ).order_by(Preset.created_at.desc()).all()
-    
-    return [
-        PresetSummary(
-            id=preset.id,
-            name=preset.name,
-            description=preset.description,
-            background_image=preset.background_image,
-            created_at=preset.created_at,
-            creature_count=preset.creature_count
-        )
-        for preset in presets
-    ]
+    """Get the current user's presets, newest first, optionally one page at a time."""
+    columns = {
+        "id": Preset.id,
+        "name": Preset.name,
+        "description": Preset.description,
+        "background_image": Preset.background_image,
+        "created_at": Preset.created_at,
+        "creature_count": Preset.creature_count
+    }
+    rows = await page.fetch(
+        db,
+        select(Preset).where(Preset.user_id == current_user.id),
+        columns,
+        keys=["created_at", "id"],
+        response=response
+    )
+    
+    return page.render(rows, PresetSummary, response)
 
 @router.post("", response_model=PresetResponse, status_code=status.HTTP_201_CREATED)
 async def create_preset(
     preset_data: PresetCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new preset."""
     # Create preset
@@ -59,103 +206,68 @@ async def create_preset(
         background_image=preset_data.background_image
     )
     
-    db.add(db_preset)
-    db.flush()  # Get the ID without committing
-    
     # Create preset creatures
-    for creature_data in preset_data.creatures:
-        db_creature = PresetCreature(
-            preset_id=db_preset.id,
+    creatures = [
+        PresetCreature(
             name=creature_data.name,
             initiative=creature_data.initiative,
             creature_type=creature_data.creature_type,
             image_url=creature_data.image_url
         )
-        db.add(db_creature)
-    
-    db.commit()
-    db.refresh(db_preset)
-    
-    # Convert preset creatures to CreatureCreateNested format for response
-    creatures = [
-        CreatureCreateNested(
-            name=pc.name,
-            initiative=pc.initiative,
-            creature_type=pc.creature_type,
-            image_url=pc.image_url
-        )
-        for pc in db_preset.preset_creatures
+        for creature_data in preset_data.creatures
     ]
+    db_preset.preset_creatures = creatures
+    db_preset.creature_count = len(creatures)
     
-    return PresetResponse(
-        id=db_preset.id,
-        user_id=db_preset.user_id,
-        name=db_preset.name,
-        description=db_preset.description,
-        background_image=db_preset.background_image,
-        created_at=db_preset.created_at,
-        updated_at=db_preset.updated_at,
-        creatures=creatures
-    )
+    db.add(db_preset)
+    await db.commit()
+    set_committed_value(db_preset, "preset_creatures", in_turn_order(creatures))
+    
+    return _preset_json(db_preset, status_code=status.HTTP_201_CREATED)
 
-@router.get("/{preset_id}", response_model=PresetResponse)
+@router.get("/{preset_id}", response_model=PresetResponse, responses={304: {"description": "Not modified"}})
 async def get_preset(
     preset_id: uuid.UUID,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get a specific preset."""
-    preset = db.query(Preset).filter(
-        Preset.id == preset_id,
-        Preset.user_id == current_user.id
-    ).first()
-    
-    if not preset:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Preset not found"
-        )
-    
-    # Convert preset creatures to CreatureCreateNested format
-    creatures = [
-        CreatureCreateNested(
-            name=pc.name,
-            initiative=pc.initiative,
-            creature_type=pc.creature_type,
-            image_url=pc.image_url
-        )
-        for pc in preset.preset_creatures
-    ]
+    """Get a specific preset; 304 if it still matches the If-None-Match ETag."""
+    if if_none_match is not None:
+        # One indexed lookup; the creatures are only loaded if the client's copy is stale
+        row = (await db.execute(
+            select(Preset.version, Preset.updated_at).where(
+                Preset.id == preset_id,
+                Preset.user_id == current_user.id
+            )
+        )).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Preset not found"
+            )
+        etag = row_etag(row.version, row.updated_at)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
     
-    return PresetResponse(
-        id=preset.id,
-        user_id=preset.user_id,
-        name=preset.name,
-        description=preset.description,
-        background_image=preset.background_image,
-        created_at=preset.created_at,
-        updated_at=preset.updated_at,
-        creatures=creatures
-    )
+    preset = await _get_user_preset(db, preset_id, current_user.id)
+    return _preset_json(preset)
 
-@router.put("/{preset_id}", response_model=PresetResponse)
+@router.put("/{preset_id}", response_model=PresetResponse, responses={412: {"model": ErrorResponse}})
 async def update_preset(
     preset_id: uuid.UUID,
     preset_data: PresetUpdate,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update a preset."""
-    preset = db.query(Preset).filter(
-        Preset.id == preset_id,
-        Preset.user_id == current_user.id
-    ).first()
-    
-    if not preset:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Preset not found"
-        )
+    """Update a preset; with If-Match, only if it still has that ETag.
+
+    Creatures are diffed against the stored ones, so unchanged creatures keep
+    their ids and only the changed rows are written.
+    """
+    preset = await _get_user_preset(db, preset_id, current_user.id)
+    check_if_match(if_match, row_etag(preset.version, preset.updated_at), "Preset")
     
     # Update fields
     if preset_data.name is not None:
@@ -167,64 +279,134 @@ async def update_preset(
     
     # Update creatures if provided
     if preset_data.creatures is not None:
-        # Delete existing creatures
-        db.query(PresetCreature).filter(PresetCreature.preset_id == preset_id).delete()
-        
-        # Add new creatures
-        for creature_data in preset_data.creatures:
-            db_creature = PresetCreature(
-                preset_id=preset_id,
-                name=creature_data.name,
-                initiative=creature_data.initiative,
-                creature_type=creature_data.creature_type,
-                image_url=creature_data.image_url
-            )
-            db.add(db_creature)
+        await _apply_creature_diff(db, preset, preset_data.creatures)
     
-    db.commit()
-    db.refresh(preset)
+    await commit_versioned(db, if_match, "Preset")
     
-    # Convert preset creatures to CreatureCreateNested format
-    creatures = [
-        CreatureCreateNested(
-            name=pc.name,
-            initiative=pc.initiative,
-            creature_type=pc.creature_type,
-            image_url=pc.image_url
+    return _preset_json(preset)
+
+@router.patch("/{preset_id}", response_model=PresetResponse, responses={412: {"model": ErrorResponse}})
+async def patch_preset(
+    preset_id: uuid.UUID,
+    operations: List[JsonPatchOperation],
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply a JSON Patch (RFC 6902) to a preset.
+
+    The patch is applied to the preset as returned by GET (name, description,
+    background_image and creatures), e.g. ``{"op": "replace", "path":
+    "/creatures/2/initiative", "value": 14}``. A failed ``test`` operation
+    returns 409; If-Match guards the whole preset instead.
+    """
+    preset = await _get_user_preset(db, preset_id, current_user.id)
+    check_if_match(if_match, row_etag(preset.version, preset.updated_at), "Preset")
+    document = _preset_response(preset).model_dump(
+        mode="json", include={"name", "description", "background_image", "creatures"}
+    )
+    
+    try:
+        patched = apply_patch(document, [op.model_dump(by_alias=True, exclude_unset=True) for op in operations])
+    except JsonPatchTestFailed as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    try:
+        preset_data = PresetDocument.model_validate(patched)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(e.errors(include_url=False, include_context=False))
         )
-        for pc in preset.preset_creatures
-    ]
     
-    return PresetResponse(
-        id=preset.id,
-        user_id=preset.user_id,
-        name=preset.name,
-        description=preset.description,
-        background_image=preset.background_image,
-        created_at=preset.created_at,
-        updated_at=preset.updated_at,
-        creatures=creatures
-    )
+    if preset_data.name != preset.name:
+        preset.name = preset_data.name
+    if preset_data.description != preset.description:
+        preset.description = preset_data.description
+    if preset_data.background_image != preset.background_image:
+        preset.background_image = preset_data.background_image
+    await _apply_creature_diff(db, preset, preset_data.creatures)
+    
+    await commit_versioned(db, if_match, "Preset")
+    
+    return _preset_json(preset)
 
-@router.delete("/{preset_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_preset(
+@router.post("/{preset_id}/instantiate", response_model=EncounterResponse, status_code=status.HTTP_201_CREATED)
+async def instantiate_preset(
     preset_id: uuid.UUID,
+    options: Optional[PresetInstantiate] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete a preset."""
-    preset = db.query(Preset).filter(
-        Preset.id == preset_id,
-        Preset.user_id == current_user.id
-    ).first()
+    """Create an encounter from a preset, copying its creatures on the server.
+
+    The encounter and its creatures are each created by one INSERT ... SELECT,
+    so the preset never round-trips through the client.
+    """
+    options = options or PresetInstantiate()
+    encounter_id = uuid.uuid4()
     
-    if not preset:
+    # Selecting from the user's preset doubles as the ownership check
+    encounter = await db.scalar(
+        insert(Encounter).from_select(
+            ["id", "user_id", "name", "background_image", "creature_count"],
+            select(
+                literal(encounter_id, Encounter.id.type),
+                Preset.user_id,
+                literal(options.name) if options.name is not None else Preset.name,
+                literal(options.background_image) if options.background_image is not None else Preset.background_image,
+                Preset.creature_count
+            ).where(
+                Preset.id == preset_id,
+                Preset.user_id == current_user.id
+            )
+        ).returning(Encounter)
+    )
+    
+    if not encounter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Preset not found"
         )
     
-    db.delete(preset)
-    db.commit()
+    initiative = roll_d20() if options.reroll_initiative else PresetCreature.initiative
+    creatures = (await db.scalars(
+        insert(Creature).from_select(
+            ["id", "encounter_id", "name", "initiative", "creature_type", "image_url"],
+            select(
+                new_uuid(),
+                literal(encounter_id, Creature.encounter_id.type),
+                PresetCreature.name,
+                initiative,
+                PresetCreature.creature_type,
+                PresetCreature.image_url
+            ).where(PresetCreature.preset_id == preset_id)
+        ).returning(Creature)
+    )).all()
+    # Only written if the preset's count had drifted
+    encounter.creature_count = len(creatures)
+    
+    await db.commit()
+    
+    set_committed_value(encounter, "creatures", in_turn_order(creatures))
+    
+    return fast_json_response(
+        EncounterResponse.model_validate(encounter), EncounterResponse, status_code=status.HTTP_201_CREATED,
+        headers=etag_headers(row_etag(encounter.version, encounter.updated_at))
+    )
+
+@router.delete("/{preset_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_preset(
+    preset_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a preset."""
+    preset = await _get_user_preset(db, preset_id, current_user.id)
+    
+    await db.delete(preset)
+    await commit_versioned(db, None, "Preset")
     
     return {"message": "Preset deleted successfully"}
\ No newline at end of file
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File, Form, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any, List
-import json
 import os
 import shutil
 from uuid import uuid4
 import logging
-from pathlib import Path
+
+from app.models.creature_image import CreatureImageDB
+from app.models.database import get_db
+from app.models.schemas import CreatureImageBatchRequest
+from app.utils.creature_catalog import (
+    CreatureCatalog, creature_catalog, upsert_creature_image,
+    CATALOG_TOPIC, DATABASE_IMAGES_DIR, LOCAL_IMAGE_SOURCE
+)
+from app.utils.pubsub import pubsub
+from app.utils.responses import etag_headers, etag_matches, not_modified
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -13,88 +23,69 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["creature_images"])
 
-# Path to the creature database JSON file
-CREATURE_DB_PATH = os.getenv("CREATURE_DB_PATH", "./creature_database.json")
-DATABASE_IMAGES_DIR = os.getenv("DATABASE_IMAGES_DIR", "./database_images")
+async def get_catalog(db: AsyncSession) -> CreatureCatalog:
+    """Return the process-wide creature catalog, reloading it if stale."""
+    await creature_catalog.refresh_if_stale(db)
+    return creature_catalog
 
-def load_creature_database() -> Dict[str, str]:
-    """Load the creature database from JSON file."""
-    try:
-        if os.path.exists(CREATURE_DB_PATH):
-            with open(CREATURE_DB_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            logger.warning(f"Creature database file not found: {CREATURE_DB_PATH}")
-            return {}
-    except Exception as e:
-        logger.error(f"Error loading creature database: {e}")
-        return {}
-
-def save_creature_database(creature_db: Dict[str, str]) -> bool:
-    """Save the creature database to JSON file."""
-    try:
-        with open(CREATURE_DB_PATH, 'w', encoding='utf-8') as f:
-            json.dump(creature_db, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving creature database: {e}")
-        return False
+DEFAULT_IMAGE_URL = "https://via.placeholder.com/400x400/cccccc/666666?text=No+Image"
+MAX_CANDIDATES = 20
+MAX_SEARCH_RESULTS = 100
 
-def scan_local_images() -> Dict[str, str]:
-    """Scan database images directory and return creature name to image path mapping."""
-    local_creatures = {}
-    
-    if not os.path.exists(DATABASE_IMAGES_DIR):
-        logger.info(f"Database images directory {DATABASE_IMAGES_DIR} does not exist")
-        return local_creatures
-    
-    # Supported image extensions
-    image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-    
-    for file_path in Path(DATABASE_IMAGES_DIR).iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-            # Convert filename to creature name (replace underscores with spaces)
-            creature_name = file_path.stem.replace('_', ' ').lower()
-            image_url = f"/database_images/{file_path.name}"
-            local_creatures[creature_name] = image_url
-            logger.info(f"Found local image: {creature_name} -> {file_path.name}")
-    
-    return local_creatures
-
-def find_creature_image(creature_name: str, creature_db: Dict[str, str]) -> Optional[str]:
+def find_creature_image(creature_name: str, catalog: CreatureCatalog) -> Optional[str]:
     """Find the best matching image for a creature name."""
-    name_lower = creature_name.lower().strip()
-    
-    # 1. Exact match
-    if name_lower in creature_db:
-        return creature_db[name_lower]
+    matches = catalog.match(creature_name)
+    if not matches:
+        return None
+    return catalog.entries[matches[0][0]]
+
+def resolve_creature_image(name: str, catalog: CreatureCatalog, candidates: int = 0) -> Dict[str, Any]:
+    """Build the image resolution for a creature name from the catalog."""
+    matches = catalog.match(name, limit=max(1, candidates))
     
-    # 2. Partial match (contains any word from the creature name)
-    name_words = name_lower.split()
-    for db_creature, image_url in creature_db.items():
-        for word in name_words:
-            if len(word) > 2 and word in db_creature:
-                logger.info(f"Partial match: '{creature_name}' matched '{db_creature}' on word '{word}'")
-                return image_url
+    if matches:
+        matched_name, score = matches[0]
+        result = {
+            "image_url": catalog.entries[matched_name],
+            "source": catalog.sources[matched_name],
+            "name": name,
+            "matched_name": matched_name,
+            "score": score,
+            "found_match": True
+        }
+        logger.debug(f"Found image for '{name}': matched '{matched_name}' (score {score})")
+    else:
+        result = {
+            "image_url": DEFAULT_IMAGE_URL,
+            "source": "default",
+            "name": name,
+            "found_match": False
+        }
+        logger.debug(f"Using default fallback for '{name}'")
     
-    # 3. Reverse partial match (any word from db creature name in input)
-    for db_creature, image_url in creature_db.items():
-        db_words = db_creature.split()
-        for db_word in db_words:
-            if len(db_word) > 2 and db_word in name_lower:
-                logger.info(f"Reverse partial match: '{creature_name}' matched '{db_creature}' on word '{db_word}'")
-                return image_url
+    if candidates:
+        result["candidates"] = [
+            {
+                "name": candidate,
+                "image_url": catalog.entries[candidate],
+                "source": catalog.sources[candidate],
+                "score": candidate_score
+            }
+            for candidate, candidate_score in matches
+        ]
     
-    return None
+    return result
 
 @router.get("/get_creature_image")
 async def get_creature_image(
     name: str,
     creature_type: str = "other",  # Keep for compatibility but not used
-    user_image_url: Optional[str] = None
+    user_image_url: Optional[str] = None,
+    candidates: int = Query(0, ge=0, le=MAX_CANDIDATES, description="Also return the top-k catalog matches"),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
-    Get creature image from JSON database with intelligent matching.
+    Get creature image from the catalog with fuzzy matching.
     """
     logger.info(f"Getting image for creature: {name}")
     
@@ -109,37 +100,8 @@ async def get_creature_image(
                 "found_match": True
             }
         
-        # Load creature database
-        creature_db = load_creature_database()
-        
-        # Scan for local images and merge with database
-        local_creatures = scan_local_images()
-        # Local images override database entries
-        creature_db.update(local_creatures)
-        
-        # Priority 2: Find in database
-        image_url = find_creature_image(name, creature_db)
-        
-        if image_url:
-            source = "local" if name.lower() in local_creatures else "database"
-            logger.info(f"Found image for '{name}': {image_url} (source: {source})")
-            return {
-                "image_url": image_url,
-                "source": source,
-                "name": name,
-                "found_match": True
-            }
-        
-        # Priority 3: Default fallback
-        default_image = "https://via.placeholder.com/400x400/cccccc/666666?text=No+Image"
-        logger.info(f"Using default fallback for '{name}'")
-        
-        return {
-            "image_url": default_image,
-            "source": "default",
-            "name": name,
-            "found_match": False
-        }
+        # Priority 2: Best catalog match, falling back to the default image
+        return resolve_creature_image(name, await get_catalog(db), candidates)
         
     except Exception as e:
         logger.error(f"Error getting image for '{name}': {e}")
@@ -151,30 +113,71 @@ async def get_creature_image(
             "error": str(e)
         }
 
-@router.get("/list_all_creatures")
-async def list_all_creatures() -> Dict[str, Any]:
-    """List all creatures in the database."""
+@router.post("/get_creature_images")
+async def get_creature_images(
+    request: CreatureImageBatchRequest,
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Resolve images for many creatures in one request.
+    
+    Results are returned in request order; repeated names are matched once.
+    """
     try:
-        creature_db = load_creature_database()
-        local_creatures = scan_local_images()
+        catalog = await get_catalog(db)
+        resolved: Dict[Any, Dict[str, Any]] = {}
+        results = []
+        
+        for creature in request.creatures:
+            key = (creature.name.lower().strip(), creature.user_image_url)
+            if key not in resolved:
+                if creature.user_image_url:
+                    resolved[key] = {
+                        "image_url": creature.user_image_url,
+                        "source": "user",
+                        "found_match": True
+                    }
+                else:
+                    resolved[key] = resolve_creature_image(creature.name, catalog, request.candidates)
+            results.append({**resolved[key], "name": creature.name})
         
-        # Merge local and database creatures
-        all_creatures = {**creature_db, **local_creatures}
+        return {
+            "results": results,
+            "total": len(results),
+            "unique": len(resolved)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error resolving creature images: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/list_all_creatures", responses={304: {"description": "Not modified"}})
+async def list_all_creatures(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """List all creatures in the database; 304 if the catalog still matches the If-None-Match ETag."""
+    try:
+        catalog = await get_catalog(db)
+        if etag_matches(if_none_match, catalog.etag):
+            return not_modified(catalog.etag)
+        response.headers.update(etag_headers(catalog.etag))
         
         creature_list = [
             {
                 "name": name,
-                "image_url": image_url,
-                "source": "local" if name in local_creatures else "database"
+                "image_url": catalog.entries[name],
+                "source": catalog.sources[name]
             }
-            for name, image_url in sorted(all_creatures.items())
+            for name in catalog.names
         ]
         
         return {
             "creatures": creature_list,
             "total": len(creature_list),
-            "local_count": len(local_creatures),
-            "database_count": len(creature_db)
+            "local_count": catalog.local_count,
+            "database_count": catalog.database_count
         }
         
     except Exception as e:
@@ -182,25 +185,23 @@ async def list_all_creatures() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/search_creatures")
-async def search_creatures(query: str, limit: int = 10) -> List[Dict[str, Any]]:
-    """Search for creatures by name."""
+async def search_creatures(
+    query: str,
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncSession = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """Search for creatures whose name or tags contain the query, from the catalog's trigram index."""
     try:
-        creature_db = load_creature_database()
-        local_creatures = scan_local_images()
-        all_creatures = {**creature_db, **local_creatures}
-        
-        query_lower = query.lower()
-        results = []
+        catalog = await get_catalog(db)
         
-        for name, image_url in all_creatures.items():
-            if query_lower in name.lower() and len(results) < limit:
-                results.append({
-                    "name": name,
-                    "image_url": image_url,
-                    "source": "local" if name in local_creatures else "database"
-                })
-        
-        return results
+        return [
+            {
+                "name": name,
+                "image_url": catalog.entries[name],
+                "source": catalog.sources[name]
+            }
+            for name in catalog.search(query, limit)
+        ]
         
     except Exception as e:
         logger.error(f"Error searching creatures: {e}")
@@ -210,32 +211,31 @@ async def search_creatures(query: str, limit: int = 10) -> List[Dict[str, Any]]:
 async def add_creature(
     creature_name: str = Form(...),
     image_url: str = Form(...),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """Add a new creature to the database."""
     try:
-        creature_db = load_creature_database()
-        creature_name_lower = creature_name.lower().strip()
-        
-        creature_db[creature_name_lower] = image_url
+        row = await upsert_creature_image(db, creature_name, image_url)
+        await db.commit()
+        await pubsub.publish(CATALOG_TOPIC, {})
         
-        if save_creature_database(creature_db):
-            logger.info(f"Added creature: {creature_name_lower} -> {image_url}")
-            return {
-                "message": "Creature added successfully",
-                "name": creature_name_lower,
-                "image_url": image_url
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save database")
+        logger.info(f"Added creature: {row.creature_name} -> {image_url}")
+        return {
+            "message": "Creature added successfully",
+            "name": row.creature_name,
+            "image_url": image_url
+        }
             
     except Exception as e:
+        await db.rollback()
         logger.error(f"Error adding creature: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/upload_creature_image")
 async def upload_creature_image(
     creature_name: str = Form(...),
-    image: UploadFile = File(...)
+    image: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """Upload and associate a new creature image."""
     try:
@@ -256,8 +256,10 @@ async def upload_creature_image(
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(image.file, buffer)
         
-        # The image will be automatically picked up by scan_local_images()
-        # No need to modify the JSON database
+        image_url = f"/database_images/{filename}"
+        await upsert_creature_image(db, creature_name, image_url, LOCAL_IMAGE_SOURCE)
+        await db.commit()
+        await pubsub.publish(CATALOG_TOPIC, {})
         
         logger.info(f"Uploaded creature image: {creature_name} -> {filename}")
         
@@ -265,32 +267,50 @@ async def upload_creature_image(
             "message": "Creature image uploaded successfully",
             "creature_name": creature_name.lower(),
             "filename": filename,
-            "image_url": f"/local_images/{filename}"
+            "image_url": image_url
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading creature image: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/remove_creature/{creature_name}")
-async def remove_creature(creature_name: str) -> Dict[str, Any]:
+async def remove_creature(creature_name: str, db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     """Remove a creature from the database."""
     try:
-        creature_db = load_creature_database()
         creature_name_lower = creature_name.lower().strip()
+        row = await db.scalar(
+            select(CreatureImageDB).where(CreatureImageDB.creature_name == creature_name_lower)
+        )
         
-        if creature_name_lower in creature_db:
-            del creature_db[creature_name_lower]
-            if save_creature_database(creature_db):
-                logger.info(f"Removed creature: {creature_name_lower}")
-                return {"message": f"Creature '{creature_name_lower}' removed successfully"}
-            else:
-                raise HTTPException(status_code=500, detail="Failed to save database")
-        else:
+        if row is None:
             raise HTTPException(status_code=404, detail=f"Creature '{creature_name_lower}' not found")
+        
+        await db.delete(row)
+        await db.commit()
+        await pubsub.publish(CATALOG_TOPIC, {})
+        
+        logger.info(f"Removed creature: {creature_name_lower}")
+        return {"message": f"Creature '{creature_name_lower}' removed successfully"}
             
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error removing creature: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/reload_catalog")
+async def reload_catalog(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+    """Rebuild the creature catalog from the database."""
+    try:
+        await creature_catalog.load(db)
+        return {
+            "message": "Creature catalog reloaded",
+            "revision": creature_catalog.revision,
+            "total": len(creature_catalog.entries)
+        }
+    except Exception as e:
+        logger.error(f"Error reloading creature catalog: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
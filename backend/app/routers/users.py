@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.models.models import User
 from app.models.schemas import UserResponse, ErrorResponse
 from app.utils.dependencies import get_current_user
+from app.utils.pubsub import pubsub
+from app.utils.user_cache import USER_TOPIC
 
 router = APIRouter()
 
@@ -15,7 +17,7 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
 @router.put("/profile", response_model=UserResponse)
 async def update_user_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user profile."""
     # For now, just return the current user
@@ -25,9 +27,11 @@ async def update_user_profile(
 @router.delete("/account", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_account(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete user account."""
-    db.delete(current_user)
-    db.commit()
+    await db.delete(current_user)
+    await db.commit()
+    # Drop the user's cached tokens in every worker
+    await pubsub.publish(USER_TOPIC, {"user_id": str(current_user.id)})
     return {"message": "Account deleted successfully"}
\ No newline at end of file
@@ -1,12 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 from app.config import settings
+from app.utils.metrics import password_pool_wait, password_pool_in_flight, password_pool_rejections
+import asyncio
+import time
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class PasswordWorkerPool:
+    """Runs bcrypt work off the event loop in a bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    Once ``max_workers + max_queue`` jobs are in flight, further requests
+    are rejected with 503 instead of queueing behind a login storm.
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+    
+    async def run(self, func, *args):
+        """Run ``func(*args)`` on the pool and return its result."""
+        if self.in_flight >= self.max_workers + self.max_queue:
+            password_pool_rejections.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again shortly.",
+                headers={"Retry-After": "1"},
+            )
+        
+        submitted = time.perf_counter()
+        
+        def job():
+            password_pool_wait.observe(time.perf_counter() - submitted)
+            return func(*args)
+        
+        self.in_flight += 1
+        password_pool_in_flight.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self.in_flight -= 1
+            password_pool_in_flight.dec()
+
+# Global password pool instance
+password_pool = PasswordWorkerPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE
+)
+
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     # bcrypt only supports passwords up to 72 bytes
@@ -16,6 +64,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password worker pool."""
+    return await password_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool."""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -0,0 +1,28 @@
+"""
+Set-based UPDATE helpers shared by the batch endpoints.
+"""
+import uuid
+from typing import Any, Dict
+
+from sqlalchemy import case, literal
+
+
+def case_update_values(model, changes: Dict[uuid.UUID, Dict[str, Any]]) -> Dict[str, Any]:
+    """SET clause updating many rows of ``model`` in one UPDATE.
+
+    ``changes`` maps a row id to the columns that change for it. Each column
+    becomes a CASE on the row id that keeps the current value for rows not
+    changing it. The caller restricts the UPDATE to ``changes``' ids.
+    """
+    fields = list(dict.fromkeys(field for values in changes.values() for field in values))
+    columns = {}
+    for field in fields:
+        column = getattr(model, field)
+        columns[field] = case(
+            *[
+                (model.id == row_id, literal(values[field], column.type))
+                for row_id, values in changes.items() if field in values
+            ],
+            else_=column
+        )
+    return columns
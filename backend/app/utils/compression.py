@@ -0,0 +1,258 @@
+"""
+Negotiated response compression.
+
+``CompressionMiddleware`` compresses complete API responses (JSON and
+other text) of at least MIN_COMPRESS_SIZE bytes with brotli or gzip,
+whichever the client prefers. Levels are tuned for latency rather than
+ratio: on a 1000-entry creature catalog, gzip level 5 comes within 5% of
+level 9's size in a third of its time (see benchmarks/bench_compression.py);
+brotli quality 4 is its counterpart. Streaming responses, such as
+encounter events and static files, pass through untouched.
+
+Static files are compressed ahead of time instead: ``precompress_directory``
+writes ``.br``/``.gz`` sidecars next to compressible files at startup,
+and ``PrecompressedStaticFiles`` serves a sidecar in place of the file
+when the client accepts its encoding.
+
+A compressed response is a different representation, so its ETag gets
+the encoding as a suffix (``"3-...-gzip"``). The middleware removes the
+suffix from incoming If-None-Match and If-Match headers, so endpoints
+only ever compare their own ETags.
+
+Brotli needs the optional ``Brotli`` package; without it only gzip is
+offered.
+"""
+import gzip
+import logging
+import os
+from mimetypes import guess_type
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Brotli (optional)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Smaller bodies fit in a packet or two; compressing them saves nothing
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+# Sidecars are built once, so they use the best ratio
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# Supported encodings, most preferred first, and their sidecar file suffixes
+ENCODINGS: List[str] = ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+SIDECAR_SUFFIXES: Dict[str, str] = {"br": ".br", "gzip": ".gz"}
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/javascript", "application/xml",
+    "image/svg+xml", "application/manifest+json"
+}
+COMPRESSIBLE_EXTENSIONS = {".json", ".js", ".css", ".html", ".txt", ".svg", ".xml", ".map"}
+
+# Request headers carrying ETags the app compares
+CONDITIONAL_HEADERS = (b"if-none-match", b"if-match")
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The supported encoding the client prefers in its Accept-Encoding header, or None."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip().lower()] = weight
+    default = weights.get("*", 0.0)
+    candidates = [encoding for encoding in ENCODINGS if weights.get(encoding, default) > 0]
+    # max keeps the first of equal weights, i.e. the server's preference
+    return max(candidates, key=lambda encoding: weights.get(encoding, default), default=None)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _etag_suffix(encoding: str) -> str:
+    return f"-{encoding}\""
+
+
+def add_etag_suffix(etag: str, encoding: str) -> str:
+    """The ETag of the ``encoding`` representation of a response with ``etag``."""
+    return etag[:-1] + _etag_suffix(encoding) if etag.endswith("\"") else etag
+
+
+def strip_etag_suffixes(value: str) -> Tuple[str, bool]:
+    """Remove encoding suffixes from the ETags in a conditional header; also whether any were found."""
+    stripped = value
+    for encoding in SIDECAR_SUFFIXES:
+        stripped = stripped.replace(_etag_suffix(encoding), "\"")
+    return stripped, stripped != value
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete compressible responses for clients that accept it."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        # Endpoints compare their own ETags; undo the suffixes added below
+        suffixed = False
+        headers = []
+        for name, value in scope["headers"]:
+            if name in CONDITIONAL_HEADERS:
+                stripped, found = strip_etag_suffixes(value.decode("latin-1"))
+                value, suffixed = stripped.encode("latin-1"), suffixed or found
+            headers.append((name, value))
+        scope = {**scope, "headers": headers}
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        streaming = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, streaming
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether the body is complete
+                start = message
+                return
+            if message["type"] != "http.response.body" or streaming or start is None:
+                await send(message)
+                return
+
+            response_headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if start["status"] == 304 and suffixed and "etag" in response_headers:
+                # The client revalidated a compressed copy; confirm it under the same ETag
+                response_headers["ETag"] = add_etag_suffix(response_headers["ETag"], encoding)
+            elif message.get("more_body", False):
+                streaming = True
+            elif (
+                len(body) >= self.minimum_size
+                and "content-encoding" not in response_headers
+                and is_compressible(response_headers.get("content-type", ""))
+            ):
+                body = compress(body, encoding)
+                response_headers["Content-Encoding"] = encoding
+                response_headers["Content-Length"] = str(len(body))
+                response_headers.add_vary_header("Accept-Encoding")
+                if "etag" in response_headers:
+                    response_headers["ETag"] = add_etag_suffix(response_headers["ETag"], encoding)
+                message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+def precompress_file(path: str) -> int:
+    """Write missing or outdated sidecars for one compressible file; returns how many were written."""
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return 0
+    modified = os.path.getmtime(path)
+    written = 0
+    with open(path, "rb") as source:
+        content = source.read()
+    for encoding in ENCODINGS:
+        sidecar = path + SIDECAR_SUFFIXES[encoding]
+        if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= modified:
+            continue
+        if encoding == "br":
+            compressed = brotli.compress(content, quality=STATIC_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(content, compresslevel=STATIC_GZIP_LEVEL, mtime=0)
+        if len(compressed) >= len(content):
+            continue
+        # Every worker precompresses at startup; replace atomically so none serves a partial file
+        temporary = f"{sidecar}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as target:
+            target.write(compressed)
+        os.replace(temporary, sidecar)
+        written += 1
+    return written
+
+
+def precompress_directory(directory: str) -> int:
+    """Build the sidecars of every compressible file under ``directory``; returns how many were written."""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            try:
+                written += precompress_file(os.path.join(root, filename))
+            except OSError as e:
+                logger.warning(f"Could not precompress {filename}: {e}")
+    if written:
+        logger.info(f"Wrote {written} precompressed sidecars under {directory}")
+    return written
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves a ``.br``/``.gz`` sidecar in place of a file when the client accepts it.
+
+    A sidecar older than its file is ignored until it is rebuilt.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        path = str(full_path)
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        sidecar_stat = None
+        if encoding is not None:
+            try:
+                sidecar_stat = os.stat(path + SIDECAR_SUFFIXES[encoding])
+            except OSError:
+                pass
+        if sidecar_stat is None or sidecar_stat.st_mtime < stat_result.st_mtime:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers.add_vary_header("Accept-Encoding")
+            return response
+
+        response = FileResponse(
+            path + SIDECAR_SUFFIXES[encoding],
+            status_code=status_code,
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            media_type=guess_type(path)[0] or "text/plain",
+            stat_result=sidecar_stat,
+            method=scope["method"]
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
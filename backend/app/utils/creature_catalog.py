@@ -0,0 +1,344 @@
+"""
+In-memory catalog of creature images backed by the creature_images table,
+plus the one-shot importer from the legacy JSON file and images directory.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.creature_image import CreatureImageDB
+from app.utils.pubsub import pubsub
+
+logger = logging.getLogger(__name__)
+
+# Legacy JSON creature database, read only by the importer
+CREATURE_DB_PATH = os.getenv("CREATURE_DB_PATH", "./creature_database.json")
+DATABASE_IMAGES_DIR = os.getenv("DATABASE_IMAGES_DIR", "./database_images")
+
+# Supported image extensions
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+# image_source recorded for rows imported from DATABASE_IMAGES_DIR
+LOCAL_IMAGE_SOURCE = "database_images"
+
+# Pub/sub topic announcing creature_images writes
+CATALOG_TOPIC = "creature_catalog"
+
+# Words shorter than this are too common to match on ("of", "an", ...)
+MIN_WORD_LENGTH = 3
+# Fuzzy matches scoring below this are treated as no match
+MIN_MATCH_SCORE = 0.2
+# Posting list entries a lookup may walk to find candidates, rarest lists first
+MAX_POSTINGS_WALKED = 5000
+# Candidates scored per lookup, those sharing the most words and trigrams with the query
+MAX_SCORED_NAMES = 50
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# INSERT constructs with ON CONFLICT support, by database dialect
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def load_creature_database(db_path: str = None) -> Dict[str, str]:
+    """Load the creature database from JSON file."""
+    db_path = db_path or CREATURE_DB_PATH
+    try:
+        if os.path.exists(db_path):
+            with open(db_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        else:
+            logger.warning(f"Creature database file not found: {db_path}")
+            return {}
+    except Exception as e:
+        logger.error(f"Error loading creature database: {e}")
+        return {}
+
+
+def scan_local_images(images_dir: str = None) -> Dict[str, str]:
+    """Scan database images directory and return creature name to image path mapping."""
+    images_dir = images_dir or DATABASE_IMAGES_DIR
+    local_creatures = {}
+
+    if not os.path.exists(images_dir):
+        logger.info(f"Database images directory {images_dir} does not exist")
+        return local_creatures
+
+    for file_path in Path(images_dir).iterdir():
+        if file_path.is_file() and file_path.suffix.lower() in IMAGE_EXTENSIONS:
+            # Convert filename to creature name (replace underscores with spaces)
+            creature_name = file_path.stem.replace('_', ' ').lower()
+            local_creatures[creature_name] = f"/database_images/{file_path.name}"
+
+    logger.info(f"Found {len(local_creatures)} local creature images in {images_dir}")
+    return local_creatures
+
+
+async def upsert_creature_image(db, creature_name: str, image_url: str,
+                                image_source: Optional[str] = None) -> CreatureImageDB:
+    """Insert or update the catalog row for a creature name (not committed).
+
+    A single INSERT ... ON CONFLICT on the unique creature_name, so
+    concurrent writers of the same name update one row instead of racing.
+    """
+    insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+    statement = insert(CreatureImageDB).values(
+        creature_name=creature_name.lower().strip(),
+        image_url=image_url,
+        image_source=image_source,
+        is_active=True
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[CreatureImageDB.creature_name],
+        set_={
+            "image_url": statement.excluded.image_url,
+            "image_source": statement.excluded.image_source,
+            "is_active": True,
+            # Set explicitly: onupdate only applies to UPDATE statements, and the catalog watches this stamp
+            "updated_at": func.now()
+        }
+    )
+    return await db.scalar(
+        statement.returning(CreatureImageDB).execution_options(populate_existing=True)
+    )
+
+
+async def import_creature_catalog(db, db_path: str = None, images_dir: str = None) -> Dict[str, int]:
+    """Copy the JSON creature database and local images into creature_images.
+
+    Local images override JSON entries of the same name, as they did when
+    the catalog was read from disk. Safe to run repeatedly.
+    """
+    creature_db = load_creature_database(db_path)
+    local_creatures = scan_local_images(images_dir)
+
+    for name, image_url in creature_db.items():
+        if name.lower().strip() not in local_creatures:
+            await upsert_creature_image(db, name, image_url)
+    for name, image_url in local_creatures.items():
+        await upsert_creature_image(db, name, image_url, LOCAL_IMAGE_SOURCE)
+    await db.commit()
+
+    logger.info(f"Imported {len(creature_db)} database and {len(local_creatures)} local creature images")
+    return {"database": len(creature_db), "local": len(local_creatures)}
+
+
+def tokenize(name: str) -> List[str]:
+    """Split a lowercase name into the words used for matching."""
+    return [word for word in WORD_PATTERN.findall(name) if len(word) >= MIN_WORD_LENGTH]
+
+
+def trigrams(name: str) -> set:
+    """Character trigrams of a name, padded so word edges count."""
+    padded = f" {' '.join(WORD_PATTERN.findall(name))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CreatureIndex:
+    """Inverted word and trigram index over catalog names.
+
+    A name is scored against a query as the mean of the word Jaccard
+    similarity and the trigram Dice coefficient, so whole-word matches
+    rank first and trigrams keep typos matchable.
+
+    Candidates are found by walking the posting lists of the query's words
+    and trigrams, rarest first, until MAX_POSTINGS_WALKED entries have been
+    seen; a trigram like "dra" shared by thousands of names adds little but
+    time. Only the MAX_SCORED_NAMES candidates with the most hits are
+    scored, exactly, against their stored words and trigrams.
+    """
+
+    def __init__(self, names: List[str]):
+        self.words: Dict[str, List[str]] = {}
+        self.grams: Dict[str, List[str]] = {}
+        self.name_words: Dict[str, frozenset] = {}
+        self.name_grams: Dict[str, frozenset] = {}
+        for name in names:
+            self.name_words[name] = frozenset(tokenize(name))
+            self.name_grams[name] = frozenset(trigrams(name))
+            for word in self.name_words[name]:
+                self.words.setdefault(word, []).append(name)
+            for gram in self.name_grams[name]:
+                self.grams.setdefault(gram, []).append(name)
+
+    def search(self, query: str, limit: int = 1) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` (name, score) pairs, best first."""
+        query = query.lower().strip()
+        query_words = set(tokenize(query))
+        query_grams = trigrams(query)
+
+        postings = [self.words.get(word, ()) for word in query_words]
+        postings += [self.grams.get(gram, ()) for gram in query_grams]
+        hits = Counter()
+        walked = 0
+        for posting in sorted((posting for posting in postings if posting), key=len):
+            if walked and walked + len(posting) > MAX_POSTINGS_WALKED:
+                break
+            hits.update(posting)
+            walked += len(posting)
+        candidates = [name for name, _ in hits.most_common(MAX_SCORED_NAMES)]
+        if query in self.name_grams and query not in candidates:
+            candidates.append(query)
+
+        scored = []
+        for name in candidates:
+            name_words, name_grams = self.name_words[name], self.name_grams[name]
+            word_hits = len(query_words & name_words)
+            word_union = len(query_words | name_words)
+            word_score = word_hits / word_union if word_union else 0.0
+            gram_score = 2 * len(query_grams & name_grams) / (len(query_grams) + len(name_grams))
+            score = 1.0 if name == query else (word_score + gram_score) / 2
+            if score >= MIN_MATCH_SCORE:
+                scored.append((name, round(score, 4)))
+
+        # Ties go to the name closest in length to the query, then alphabetical
+        scored.sort(key=lambda item: (-item[1], abs(len(item[0]) - len(query)), item[0]))
+        return scored[:limit]
+
+
+class SubstringIndex:
+    """Trigram index answering "which names contain this text" without scanning every name.
+
+    Each name is indexed with a document (the name, plus its tags) by the
+    trigrams of that document. Names holding every trigram of the query
+    are candidates, and are then checked for the query itself. Queries
+    shorter than a trigram walk the names in order and stop at ``limit``.
+    """
+
+    def __init__(self, documents: Dict[str, str]):
+        self.names = sorted(documents)
+        self.documents = documents
+        self.grams: Dict[str, set] = {}
+        for name, document in documents.items():
+            for i in range(len(document) - 2):
+                self.grams.setdefault(document[i:i + 3], set()).add(name)
+
+    def search(self, text: str, limit: int) -> List[str]:
+        """Up to ``limit`` names whose document contains ``text``, in name order."""
+        if len(text) < 3:
+            candidates = self.names
+        else:
+            postings = sorted((self.grams.get(text[i:i + 3], set()) for i in range(len(text) - 2)), key=len)
+            candidates = sorted(set.intersection(*postings))
+        found = []
+        for name in candidates:
+            if text in self.documents[name]:
+                found.append(name)
+                if len(found) == limit:
+                    break
+        return found
+
+
+class CreatureCatalog:
+    """Per-worker snapshot of the active rows in creature_images.
+
+    The snapshot is rebuilt only when the table changes. Each worker checks
+    a cheap aggregate (row count, highest id, latest update) at most once
+    every ``check_interval`` seconds, so writes made through any worker are
+    visible everywhere within that interval.
+
+    ``etag`` is a hash of the snapshot's contents, so every worker holding
+    the same catalog hands out the same ETag for it.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self.revision = 0
+        self.etag = '""'
+        self.entries: Dict[str, str] = {}
+        self.sources: Dict[str, str] = {}
+        self.names: List[str] = []
+        self.index = CreatureIndex([])
+        self.search_index = SubstringIndex({})
+        self.local_count = 0
+        self.database_count = 0
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    async def _table_signature(db) -> Tuple:
+        """Aggregate that changes whenever a catalog row is added, removed or updated."""
+        result = await db.execute(
+            select(
+                func.count(CreatureImageDB.id),
+                func.max(CreatureImageDB.id),
+                func.count(CreatureImageDB.updated_at),
+                func.max(CreatureImageDB.updated_at)
+            )
+        )
+        return tuple(result.one())
+
+    async def load(self, db) -> None:
+        """Rebuild the catalog from the creature_images table."""
+        signature = await self._table_signature(db)
+        result = await db.execute(
+            select(
+                CreatureImageDB.creature_name,
+                CreatureImageDB.image_url,
+                CreatureImageDB.image_source,
+                CreatureImageDB.tags
+            ).where(CreatureImageDB.is_active.is_(True))
+        )
+
+        entries = {}
+        sources = {}
+        documents = {}
+        for name, image_url, image_source, tags in result.all():
+            name = name.lower().strip()
+            entries[name] = image_url
+            sources[name] = "local" if image_source == LOCAL_IMAGE_SOURCE else "database"
+            # NUL keeps a search from matching across the name and the tags
+            documents[name] = f"{name}\0{tags.lower()}" if tags else name
+
+        self.entries = entries
+        self.sources = sources
+        self.names = sorted(entries)
+        self.index = CreatureIndex(self.names)
+        self.search_index = SubstringIndex(documents)
+        self.local_count = sum(1 for source in sources.values() if source == "local")
+        self.database_count = len(entries) - self.local_count
+        self.etag = '"' + hashlib.blake2b(
+            json.dumps([[name, entries[name], sources[name]] for name in self.names]).encode(), digest_size=16
+        ).hexdigest() + '"'
+        self.revision += 1
+        self._signature = signature
+        self._checked_at = time.monotonic()
+        logger.info(f"Creature catalog loaded: {len(entries)} creatures (revision {self.revision})")
+
+    def match(self, creature_name: str, limit: int = 1) -> List[Tuple[str, float]]:
+        """Best catalog names for a creature name, as (name, score) pairs."""
+        name_lower = creature_name.lower().strip()
+        # Exact names always score 1.0, so skip the index for single lookups
+        if limit == 1 and name_lower in self.entries:
+            return [(name_lower, 1.0)]
+        return self.index.search(name_lower, limit)
+
+    def search(self, text: str, limit: int) -> List[str]:
+        """Up to ``limit`` catalog names containing ``text`` in the name or tags, in name order."""
+        return self.search_index.search(text.lower().strip(), limit)
+
+    async def refresh_if_stale(self, db) -> None:
+        """Reload the catalog if the table changed since the last load."""
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if await self._table_signature(db) != self._signature:
+            await self.load(db)
+
+    def invalidate(self) -> None:
+        """Force the next refresh to reload from the table."""
+        self._signature = None
+
+
+# Global creature catalog instance
+creature_catalog = CreatureCatalog()
+pubsub.subscribe(CATALOG_TOPIC, lambda message: creature_catalog.invalidate(), resync=creature_catalog.invalidate)
@@ -0,0 +1,137 @@
+"""
+Denormalized creature counts on encounters and presets.
+
+``encounters.creature_count`` and ``presets.creature_count`` let the home
+page list encounters and presets without counting their creatures. Every
+path that adds or removes creatures changes the count in the same
+transaction; for encounters this goes through ``record_creature_change``,
+which also bumps the encounter's version so its ETag changes and passes
+the turn on when the creature whose turn it is is removed. Edits to a
+single creature go through ``apply_creature_update``, which also keeps a
+live session's initiatives current. Counts can
+still drift if rows are changed outside the API; ``repair_creature_counts``
+recounts them, run with:
+
+    python migrations/repair_creature_counts.py [--check]
+"""
+import uuid
+from typing import Dict, Sequence
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import aliased
+
+from app.models.models import Creature, Encounter, Preset, PresetCreature
+from app.models.schemas import CreatureResponse, CreatureUpdate
+from app.utils.live_sessions import live_sessions
+
+# (name, parent model, child foreign key) of each counted relationship
+COUNTED = [
+    ("encounters", Encounter, Creature.encounter_id),
+    ("presets", Preset, PresetCreature.preset_id),
+]
+
+
+def _next_creature_id(encounter_id: uuid.UUID, removed: Sequence[uuid.UUID]):
+    """The creature after the current one in turn order, skipping ``removed``; wraps to the first."""
+    current = aliased(Creature)
+    after_current = or_(
+        Creature.initiative < current.initiative,
+        and_(
+            Creature.initiative == current.initiative,
+            or_(
+                Creature.created_at > current.created_at,
+                and_(Creature.created_at == current.created_at, Creature.id > current.id)
+            )
+        )
+    )
+    return select(Creature.id).join(
+        current, and_(current.encounter_id == Creature.encounter_id, current.id == Encounter.current_creature_id)
+    ).where(
+        Creature.encounter_id == encounter_id,
+        Creature.id.not_in(removed)
+    ).order_by(
+        case((after_current, 0), else_=1), Creature.initiative.desc(), Creature.created_at, Creature.id
+    ).limit(1).scalar_subquery()
+
+
+async def record_creature_change(
+    db,
+    encounter_id: uuid.UUID,
+    user_id: uuid.UUID,
+    delta: int = 0,
+    removed: Sequence[uuid.UUID] = ()
+) -> bool:
+    """Note a change to an encounter's creatures: bump its version and add ``delta`` to its count.
+
+    If the creature whose turn it is is among ``removed``, the turn passes
+    to the next remaining creature, so call this before deleting them.
+    Only the user's own encounter is updated, so this doubles as the
+    ownership check; returns False if the user has no such encounter.
+    """
+    values = {
+        "creature_count": Encounter.creature_count + delta,
+        "version": Encounter.version + 1
+    }
+    if removed:
+        values["current_creature_id"] = case(
+            (Encounter.current_creature_id.in_(removed), _next_creature_id(encounter_id, removed)),
+            else_=Encounter.current_creature_id
+        )
+    result = await db.execute(
+        update(Encounter).where(
+            Encounter.id == encounter_id,
+            Encounter.user_id == user_id
+        ).values(**values).returning(Encounter.id).execution_options(synchronize_session=False)
+    )
+    return result.first() is not None
+
+
+async def apply_creature_update(db, creature: Creature, user_id: uuid.UUID, changes: CreatureUpdate) -> CreatureResponse:
+    """Apply an update to a creature of the user's encounter and commit it.
+
+    While the encounter is live, a new initiative is written behind with
+    the rest of its session instead. Returns the creature as the API
+    serves it, with its live initiative.
+    """
+    values = changes.model_dump(exclude_none=True)
+    if "initiative" in values and await live_sessions.set_initiative(
+        creature.encounter_id, creature.id, values["initiative"]
+    ):
+        del values["initiative"]
+    for field, value in values.items():
+        setattr(creature, field, value)
+    if values:
+        await record_creature_change(db, creature.encounter_id, user_id)
+        await db.commit()
+    return await live_sessions.creature_response(creature, user_id)
+
+
+def _actual_count(model, foreign_key):
+    return select(func.count()).where(foreign_key == model.id).scalar_subquery()
+
+
+async def check_creature_counts(db) -> Dict[str, int]:
+    """Number of encounters and presets whose stored count is wrong."""
+    counts = {}
+    for name, model, foreign_key in COUNTED:
+        counts[name] = await db.scalar(
+            select(func.count()).select_from(model).where(model.creature_count != _actual_count(model, foreign_key))
+        )
+    return counts
+
+
+async def repair_creature_counts(db) -> Dict[str, int]:
+    """Recount every wrong creature count; returns how many rows were fixed."""
+    counts = {}
+    for name, model, foreign_key in COUNTED:
+        actual = _actual_count(model, foreign_key)
+        result = await db.execute(
+            update(model).where(
+                model.creature_count != actual
+            ).values(
+                creature_count=actual
+            ).execution_options(synchronize_session=False)
+        )
+        counts[name] = result.rowcount
+    await db.commit()
+    return counts
@@ -1,21 +1,31 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.models.models import User
 from app.utils.auth import verify_token
+from app.utils.user_cache import user_cache
 import uuid
 
 security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get the current authenticated user."""
-    token = credentials.credentials
+    return await get_user_from_token(credentials.credentials, db)
+
+async def get_user_from_token(token: str, db: AsyncSession) -> User:
+    """Resolve a bearer token to its user, raising 401 if it is not valid."""
     payload = verify_token(token)
     
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        # Attach the snapshot to this session without another SELECT
+        return await db.merge(cached_user, load=False)
+    
     user_id_str = payload.get("sub")
     if user_id_str is None:
         raise HTTPException(
@@ -32,11 +42,12 @@ async def get_current_user(
             detail="Invalid user ID format",
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     
+    user_cache.set(token, user, payload.get("exp"))
     return user
\ No newline at end of file
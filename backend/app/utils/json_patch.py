@@ -0,0 +1,110 @@
+"""
+JSON Patch (RFC 6902) applied to plain JSON documents.
+"""
+import copy
+from typing import Any, Dict, List, Tuple
+
+
+class JsonPatchError(ValueError):
+    """The patch is malformed or does not fit the document."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """A ``test`` operation did not match."""
+
+
+def _tokens(pointer: str) -> List[str]:
+    """Split a JSON Pointer (RFC 6901) into unescaped reference tokens."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON Pointer '{pointer}'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index '{token}'")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index {index} out of range")
+    return index
+
+
+def _parent(document: Any, pointer: str) -> Tuple[Any, str]:
+    """The container holding the value at ``pointer`` and its key in it."""
+    tokens = _tokens(pointer)
+    if not tokens:
+        raise JsonPatchError("Operation on the whole document is not supported")
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, dict) and token in target:
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_index(target, token)]
+        else:
+            raise JsonPatchError(f"Path '{pointer}' does not exist")
+    if not isinstance(target, (dict, list)):
+        raise JsonPatchError(f"Path '{pointer}' does not exist")
+    return target, tokens[-1]
+
+
+def _get(document: Any, pointer: str) -> Any:
+    container, key = _parent(document, pointer)
+    if isinstance(container, list):
+        return container[_index(container, key)]
+    if key not in container:
+        raise JsonPatchError(f"Path '{pointer}' does not exist")
+    return container[key]
+
+
+def _add(document: Any, pointer: str, value: Any) -> None:
+    container, key = _parent(document, pointer)
+    if isinstance(container, list):
+        container.insert(_index(container, key, allow_end=True), value)
+    else:
+        container[key] = value
+
+
+def _remove(document: Any, pointer: str) -> Any:
+    container, key = _parent(document, pointer)
+    if isinstance(container, list):
+        return container.pop(_index(container, key))
+    if key not in container:
+        raise JsonPatchError(f"Path '{pointer}' does not exist")
+    return container.pop(key)
+
+
+def apply_patch(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return a patched copy of ``document``; the patch applies entirely or not at all."""
+    patched = copy.deepcopy(document)
+    for operation in operations:
+        op, path = operation.get("op"), operation.get("path")
+        if not isinstance(path, str):
+            raise JsonPatchError("Operation is missing 'path'")
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"'{op}' operation is missing 'value'")
+        if op in ("move", "copy") and not isinstance(operation.get("from"), str):
+            raise JsonPatchError(f"'{op}' operation is missing 'from'")
+
+        if op == "add":
+            _add(patched, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(patched, path)
+        elif op == "replace":
+            _remove(patched, path)
+            _add(patched, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            if path.startswith(operation["from"] + "/"):
+                raise JsonPatchError("Cannot move a value into itself")
+            _add(patched, path, _remove(patched, operation["from"]))
+        elif op == "copy":
+            _add(patched, path, copy.deepcopy(_get(patched, operation["from"])))
+        elif op == "test":
+            if _get(patched, path) != operation["value"]:
+                raise JsonPatchTestFailed(f"Test failed at '{path}'")
+        else:
+            raise JsonPatchError(f"Unknown operation '{op}'")
+    return patched
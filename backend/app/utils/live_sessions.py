@@ -0,0 +1,553 @@
+"""
+Write-behind state for live combat sessions.
+
+While an encounter is live, its round, current turn and creature
+initiatives are read and written in a SQLite file shared by the workers
+on this host instead of being committed to the main database on every
+click. Each worker runs a flusher that writes the coalesced changes to
+the ``encounters`` and ``creatures`` tables every
+LIVE_SESSION_FLUSH_INTERVAL seconds. A session is also flushed when it
+ends and on shutdown.
+
+Durability guarantees:
+
+- Every acknowledged change is in the store file before the response is
+  sent. A worker that crashes or is killed loses nothing: the next flush
+  by any worker (or the next startup) writes it to the database. A
+  session the dead worker was in the middle of flushing is picked up
+  once its FLUSH_LEASE_SECONDS lease runs out.
+- If the store file itself is lost with the host or container, the
+  database holds the state of the last flush, so at most one flush
+  interval of turn, round and initiative changes is lost. Nothing else
+  is written behind: names, images and added or removed creatures are
+  committed immediately as usual.
+- The database lags the live state by up to one flush interval. The API
+  overlays the live state on encounter reads; anything reading the
+  database directly sees it after the next flush.
+
+Every worker serving an encounter must share the store file, i.e. run
+on one host as in the gunicorn deployment.
+
+Each worker keeps the ids of the live encounters in memory, so requests
+for encounters that are not live never touch the store. Workers announce
+sessions starting and ending over pub/sub, and reread the ids from the
+store every LIVE_IDS_REFRESH_SECONDS in case a notification is lost.
+Store calls run in a thread so a busy store does not block the event
+loop.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.models import Creature, Encounter, turn_position
+from app.models.schemas import CreatureResponse, EncounterResponse
+from app.utils.pubsub import pubsub
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker may hold a session while flushing before another worker may take it over
+FLUSH_LEASE_SECONDS = 30.0
+# Seconds a worker trusts its in-memory ids of live encounters before rereading them
+LIVE_IDS_REFRESH_SECONDS = 5.0
+
+# Pub/sub topic announcing sessions that started or ended
+LIVE_SESSION_TOPIC = "live_session"
+
+
+class LiveVersionConflict(Exception):
+    """A conditional change found the session at a different version than expected."""
+
+
+@dataclass
+class LiveCreature:
+    id: str
+    initiative: int
+    created_at: str
+
+
+@dataclass
+class LiveState:
+    """Turn, round and initiatives of a live encounter."""
+
+    round_number: int
+    current_creature_id: Optional[str]  # As Encounter.current_creature_id: None means the first creature
+    creatures: List[LiveCreature]
+    version: int = 0  # Store version the state was read at; not saved with it
+
+    @classmethod
+    def from_encounter(cls, encounter: Encounter) -> "LiveState":
+        return cls(
+            round_number=encounter.round_number,
+            current_creature_id=str(encounter.current_creature_id) if encounter.current_creature_id else None,
+            creatures=[
+                LiveCreature(str(c.id), c.initiative, c.created_at.isoformat() if c.created_at else "")
+                for c in encounter.creatures
+            ]
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "LiveState":
+        values = json.loads(data)
+        state = cls(
+            round_number=values["round_number"],
+            current_creature_id=values.get("current_creature_id"),
+            creatures=[LiveCreature(**c) for c in values["creatures"]]
+        )
+        if "current_turn" in values:
+            # Saved before the turn was stored by creature; the position still names it
+            order = state.order()
+            if values["current_turn"] < len(order):
+                state.current_creature_id = order[values["current_turn"]].id
+        return state
+
+    def to_json(self) -> str:
+        values = asdict(self)
+        del values["version"]
+        return json.dumps(values)
+
+    def order(self) -> List[LiveCreature]:
+        """Creatures in initiative order, as Encounter.creatures sorts them."""
+        return sorted(self.creatures, key=lambda c: (-c.initiative, c.created_at, c.id))
+
+    def current_turn(self) -> int:
+        """Position of the current creature in initiative order."""
+        return turn_position(self.order(), self.current_creature_id)
+
+    def current_creature(self) -> Optional[uuid.UUID]:
+        """The creature whose turn it is; None without creatures."""
+        order = self.order()
+        if not order:
+            return None
+        return uuid.UUID(order[self.current_turn()].id)
+
+    def move(self, step: int) -> None:
+        """Move one turn forward (step=1) or back (step=-1), like POST /advance and /rewind."""
+        order = self.order()
+        if not order:
+            return
+        position = self.current_turn()
+        turn = (position + step) % len(order)
+        if step > 0 and turn == 0:
+            self.round_number += 1
+        elif step < 0 and position == 0:
+            self.round_number = max(1, self.round_number - 1)
+        self.current_creature_id = order[turn].id
+
+    def remove(self, creature_ids: Iterable[str]) -> None:
+        """Drop creatures; if one of them had the turn, it passes to the next creature left."""
+        removed = set(creature_ids)
+        if self.current_creature_id in removed:
+            order = self.order()
+            position = self.current_turn()
+            following = [c for c in order[position + 1:] + order[:position] if c.id not in removed]
+            self.current_creature_id = following[0].id if following else None
+        self.creatures = [c for c in self.creatures if c.id not in removed]
+
+    def initiative_of(self, creature_id: uuid.UUID, default: Optional[int] = None) -> Optional[int]:
+        for creature in self.creatures:
+            if creature.id == str(creature_id):
+                return creature.initiative
+        return default
+
+    def set_initiative(self, creature_id: uuid.UUID, initiative: int) -> None:
+        for creature in self.creatures:
+            if creature.id == str(creature_id):
+                creature.initiative = initiative
+
+    def apply_to(self, encounter: EncounterResponse) -> EncounterResponse:
+        """Overlay the live state on an encounter read from the database."""
+        encounter.round_number = self.round_number
+        encounter.current_turn = self.current_turn()
+        encounter.live = True
+        for creature in encounter.creatures:
+            creature.initiative = self.initiative_of(creature.id, creature.initiative)
+        encounter.creatures.sort(key=lambda c: (-c.initiative, c.created_at.isoformat(), str(c.id)))
+        return encounter
+
+
+# (encounter id, live state, state as of the last flush, version)
+ClaimedSession = Tuple[str, LiveState, LiveState, int]
+
+
+class LiveSessionStore:
+    """Live sessions in a SQLite file shared by the workers on this host.
+
+    Every change is its own small transaction; ``version`` counts changes
+    and ``flushed_version`` records how far the database has caught up.
+    The connection is shared by the threads the store is called from, one
+    call at a time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Autocommit; transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        # WAL with synchronous=NORMAL survives a process crash; only an OS crash can lose commits
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS live_sessions (
+                encounter_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                flushed_state TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0,
+                flushed_version INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL
+            )
+            """
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get(self, encounter_id: str) -> Optional[Tuple[str, LiveState]]:
+        """Return (user id, state) of a live session, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, state, version FROM live_sessions WHERE encounter_id = ?", (encounter_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        state = LiveState.from_json(row[1])
+        state.version = row[2]
+        return row[0], state
+
+    def user_sessions(self, user_id: str) -> List[LiveState]:
+        """The states of every live session of a user."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, version FROM live_sessions WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        states = []
+        for state_json, version in rows:
+            state = LiveState.from_json(state_json)
+            state.version = version
+            states.append(state)
+        return states
+
+    def live_ids(self) -> Set[str]:
+        """The encounter ids of every live session."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT encounter_id FROM live_sessions")}
+
+    def create(self, encounter_id: str, user_id: str, state: LiveState) -> LiveState:
+        """Start a session; an existing session for the encounter is kept."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO live_sessions (encounter_id, user_id, state, flushed_state) VALUES (?, ?, ?, ?)",
+                (encounter_id, user_id, state.to_json(), state.to_json())
+            )
+            row = conn.execute("SELECT state FROM live_sessions WHERE encounter_id = ?", (encounter_id,)).fetchone()
+        return LiveState.from_json(row[0])
+
+    def modify(
+        self,
+        encounter_id: str,
+        change: Callable[[LiveState], None],
+        expected_version: Optional[int] = None
+    ) -> Optional[LiveState]:
+        """Apply ``change`` to a session's state atomically; None if it is not live.
+
+        With ``expected_version``, raise LiveVersionConflict instead if the
+        session has changed since that version was read.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT state, version FROM live_sessions WHERE encounter_id = ?", (encounter_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if expected_version is not None and row[1] != expected_version:
+                raise LiveVersionConflict(encounter_id)
+            state = LiveState.from_json(row[0])
+            change(state)
+            state.version = row[1] + 1
+            conn.execute(
+                "UPDATE live_sessions SET state = ?, version = ? WHERE encounter_id = ?",
+                (state.to_json(), state.version, encounter_id)
+            )
+        return state
+
+    def claim(self, now: float, lease: float = FLUSH_LEASE_SECONDS) -> List[ClaimedSession]:
+        """Lease every session with unflushed changes that no live worker is flushing."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT encounter_id, state, flushed_state, version FROM live_sessions "
+                "WHERE version > flushed_version AND (lease_until IS NULL OR lease_until < ?)",
+                (now,)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE live_sessions SET lease_until = ? WHERE encounter_id = ?",
+                [(now + lease, row[0]) for row in rows]
+            )
+        return [
+            (encounter_id, LiveState.from_json(state), LiveState.from_json(flushed), version)
+            for encounter_id, state, flushed, version in rows
+        ]
+
+    def release(self, claimed: List[ClaimedSession]) -> None:
+        """Record that the claimed states are in the database."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE live_sessions SET flushed_state = ?, flushed_version = MAX(flushed_version, ?), "
+                "lease_until = NULL WHERE encounter_id = ?",
+                [(state.to_json(), version, encounter_id) for encounter_id, state, _, version in claimed]
+            )
+
+    def abandon(self, claimed: List[ClaimedSession]) -> None:
+        """Give up the leases after a failed flush so the next one retries."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE live_sessions SET lease_until = NULL WHERE encounter_id = ?",
+                [(claim[0],) for claim in claimed]
+            )
+
+    def delete(self, encounter_id: str, only_if_flushed: bool = False) -> bool:
+        """Remove a session; with ``only_if_flushed``, only when nothing is pending."""
+        query = "DELETE FROM live_sessions WHERE encounter_id = ?"
+        if only_if_flushed:
+            query += " AND version = flushed_version"
+        with self._transaction() as conn:
+            deleted = conn.execute(query, (encounter_id,)).rowcount
+            remaining = conn.execute(
+                "SELECT 1 FROM live_sessions WHERE encounter_id = ?", (encounter_id,)
+            ).fetchone()
+        return deleted > 0 or remaining is None
+
+
+async def write_sessions(db: AsyncSession, claimed: List[ClaimedSession]) -> None:
+    """Write what changed since each session's last flush; the caller commits."""
+    encounters = []
+    creatures = []
+    for encounter_id, state, flushed, _ in claimed:
+        # Every claimed session changed something, so every encounter gets a new version
+        encounters.append({
+            "row_id": uuid.UUID(encounter_id),
+            "new_round_number": state.round_number,
+            "new_current_creature_id": uuid.UUID(state.current_creature_id) if state.current_creature_id else None
+        })
+        previous = {c.id: c.initiative for c in flushed.creatures}
+        creatures.extend(
+            {"row_id": uuid.UUID(c.id), "new_initiative": c.initiative}
+            for c in state.creatures if previous.get(c.id) != c.initiative
+        )
+
+    # One executemany per table. Core statements rather than ORM bulk updates,
+    # which fail on rows deleted since the session started instead of skipping them
+    if encounters:
+        await db.execute(
+            update(Encounter.__table__).where(Encounter.__table__.c.id == bindparam("row_id")).values(
+                round_number=bindparam("new_round_number"),
+                current_creature_id=bindparam("new_current_creature_id"),
+                version=Encounter.__table__.c.version + 1
+            ),
+            encounters
+        )
+    if creatures:
+        await db.execute(
+            update(Creature.__table__).where(Creature.__table__.c.id == bindparam("row_id")).values(
+                initiative=bindparam("new_initiative")
+            ),
+            creatures
+        )
+
+
+class LiveSessions:
+    """Live session mode for encounters, backed by the host's shared store."""
+
+    def __init__(self, refresh_interval: float = LIVE_IDS_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self._store: Optional[LiveSessionStore] = None
+        # Ids of the live encounters as of _loaded_at; None until read from the store
+        self._live_ids: Optional[Set[str]] = None
+        self._loaded_at = 0.0
+        self._changes = 0
+
+    @property
+    def store(self) -> LiveSessionStore:
+        if self._store is None:
+            self._store = LiveSessionStore(settings.LIVE_SESSION_STORE)
+        return self._store
+
+    def open(self, path: str) -> None:
+        """Use the store at ``path`` instead of LIVE_SESSION_STORE."""
+        self.close()
+        self._store = LiveSessionStore(path)
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+        self._store = None
+        self.forget_ids()
+
+    def forget_ids(self) -> None:
+        """Reread the live encounter ids from the store on next use."""
+        self._live_ids = None
+
+    def on_change(self, message: Dict[str, Any]) -> None:
+        """Handle a LIVE_SESSION_TOPIC message: a session started or ended."""
+        self._changes += 1
+        if self._live_ids is None:
+            return
+        if message["live"]:
+            self._live_ids.add(message["encounter_id"])
+        else:
+            self._live_ids.discard(message["encounter_id"])
+
+    async def _current_ids(self) -> Set[str]:
+        now = time.monotonic()
+        while self._live_ids is None or now - self._loaded_at >= self.refresh_interval:
+            changes = self._changes
+            live_ids = await asyncio.to_thread(self.store.live_ids)
+            # A session that started or ended meanwhile may be missing from what was read
+            if changes == self._changes:
+                self._live_ids, self._loaded_at = live_ids, now
+        return self._live_ids
+
+    async def is_live(self, encounter_id: uuid.UUID) -> bool:
+        """Whether an encounter has a session, from the in-memory ids."""
+        return str(encounter_id) in await self._current_ids()
+
+    async def initiatives(self, user_id: uuid.UUID) -> Dict[str, int]:
+        """Live initiatives of the user's creatures by creature id; empty when nothing is live."""
+        if not await self._current_ids():
+            return {}
+        states = await asyncio.to_thread(self.store.user_sessions, str(user_id))
+        return {creature.id: creature.initiative for state in states for creature in state.creatures}
+
+    async def _announce(self, encounter_id: uuid.UUID, live: bool) -> None:
+        await pubsub.publish(LIVE_SESSION_TOPIC, {"encounter_id": str(encounter_id), "live": live})
+
+    async def get(self, encounter_id: uuid.UUID, user_id: uuid.UUID) -> Optional[LiveState]:
+        """The live state of the user's encounter, or None if it is not live."""
+        if not await self.is_live(encounter_id):
+            return None
+        session = await asyncio.to_thread(self.store.get, str(encounter_id))
+        if session is None or session[0] != str(user_id):
+            return None
+        return session[1]
+
+    async def start(self, encounter: Encounter) -> LiveState:
+        """Make an encounter (loaded with its creatures) live."""
+        state = await asyncio.to_thread(
+            self.store.create, str(encounter.id), str(encounter.user_id), LiveState.from_encounter(encounter)
+        )
+        await self._announce(encounter.id, True)
+        return state
+
+    async def modify(
+        self,
+        encounter_id: uuid.UUID,
+        change: Callable[[LiveState], None],
+        expected_version: Optional[int] = None
+    ) -> Optional[LiveState]:
+        """Apply ``change`` to an encounter's session; None if it is not live."""
+        if not await self.is_live(encounter_id):
+            return None
+        return await asyncio.to_thread(self.store.modify, str(encounter_id), change, expected_version)
+
+    async def sync_creatures(
+        self,
+        encounter_id: uuid.UUID,
+        added: Iterable[Creature] = (),
+        updated: Iterable[Creature] = (),
+        removed: Iterable[uuid.UUID] = ()
+    ) -> None:
+        """Apply creature changes just committed to an encounter, if it is live."""
+        removed_ids = {str(creature_id) for creature_id in removed}
+        initiatives = {str(creature.id): creature.initiative for creature in updated}
+        new_creatures = [
+            LiveCreature(str(c.id), c.initiative, c.created_at.isoformat() if c.created_at else "") for c in added
+        ]
+
+        def sync(state: LiveState) -> None:
+            state.remove(removed_ids)
+            for creature in state.creatures:
+                creature.initiative = initiatives.get(creature.id, creature.initiative)
+            state.creatures.extend(new_creatures)
+        await self.modify(encounter_id, sync)
+
+    async def set_initiative(self, encounter_id: uuid.UUID, creature_id: uuid.UUID, initiative: int) -> bool:
+        """Change a creature's initiative in its encounter's session; False if the encounter is not live."""
+        state = await self.modify(encounter_id, lambda state: state.set_initiative(creature_id, initiative))
+        return state is not None
+
+    async def creature_response(self, creature: Creature, user_id: uuid.UUID) -> CreatureResponse:
+        """Serialize a creature with its live initiative if its encounter is live."""
+        response = CreatureResponse.model_validate(creature)
+        live = await self.get(creature.encounter_id, user_id)
+        if live is not None:
+            response.initiative = live.initiative_of(creature.id, response.initiative)
+        return response
+
+    async def discard(self, encounter_id: uuid.UUID) -> None:
+        """Drop a session without flushing it (the encounter was deleted)."""
+        await asyncio.to_thread(self.store.delete, str(encounter_id))
+        await self._announce(encounter_id, False)
+
+    async def flush(self, db: AsyncSession, now: Optional[float] = None) -> int:
+        """Write every pending session to the database in one transaction; return how many."""
+        claimed = await asyncio.to_thread(self.store.claim, time.time() if now is None else now)
+        if not claimed:
+            return 0
+        try:
+            await write_sessions(db, claimed)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            await asyncio.to_thread(self.store.abandon, claimed)
+            raise
+        await asyncio.to_thread(self.store.release, claimed)
+        return len(claimed)
+
+    async def end(self, db: AsyncSession, encounter_id: uuid.UUID) -> None:
+        """Flush an encounter's session and leave live mode."""
+        deadline = time.monotonic() + FLUSH_LEASE_SECONDS
+        await self.flush(db)
+        # A change that lands mid-flush, or another worker's flush in progress, needs another pass
+        while not await asyncio.to_thread(self.store.delete, str(encounter_id), True):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Live session for encounter {encounter_id} could not be flushed")
+            await asyncio.sleep(0.05)
+            await self.flush(db)
+        await self._announce(encounter_id, False)
+
+
+async def run_flusher(flush: Callable[[], Awaitable[int]], interval: float) -> None:
+    """Call ``flush`` every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush()
+        except Exception as e:
+            logger.warning(f"Live session flush failed; will retry: {e}")
+
+
+# Global live sessions instance
+live_sessions = LiveSessions()
+pubsub.subscribe(LIVE_SESSION_TOPIC, live_sessions.on_change, resync=live_sessions.forget_ids)
@@ -1,15 +1,31 @@
 """Prometheus metrics middleware and endpoint."""
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter, Response
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
-from prometheus_client import CollectorRegistry
-from starlette.middleware.base import BaseHTTPMiddleware
-from time import time
+from prometheus_client import CollectorRegistry, multiprocess
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from time import perf_counter
+import asyncio
+import logging
 import psutil
 import os
 
+logger = logging.getLogger(__name__)
+
 # Create a custom registry
 registry = CollectorRegistry()
 
+# Under gunicorn every worker writes its samples to this directory and
+# /api/metrics aggregates them (see gunicorn.conf.py)
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Seconds between system metric samples
+SYSTEM_METRICS_INTERVAL = float(os.getenv("SYSTEM_METRICS_INTERVAL", "15"))
+
+# Endpoint label for requests that match no route, so scanners probing
+# random paths cannot create new series
+UNMATCHED_ENDPOINT = "<unmatched>"
+
 # Define metrics
 request_count = Counter(
     'http_requests_total',
@@ -29,6 +45,7 @@ request_in_progress = Gauge(
     'http_requests_in_progress',
     'Number of HTTP requests in progress',
     ['method', 'endpoint'],
+    multiprocess_mode='livesum',
     registry=registry
 )
 
@@ -44,6 +61,7 @@ app_info = Gauge(
     'app_info',
     'Application information',
     ['version'],
+    multiprocess_mode='max',
     registry=registry
 )
 
@@ -51,12 +69,14 @@ app_info = Gauge(
 cpu_usage = Gauge(
     'system_cpu_usage_percent',
     'Current CPU usage percentage',
+    multiprocess_mode='max',
     registry=registry
 )
 
 memory_usage = Gauge(
     'system_memory_usage_bytes',
     'Current memory usage in bytes',
+    multiprocess_mode='livesum',
     registry=registry
 )
 
@@ -64,6 +84,28 @@ memory_usage = Gauge(
 db_connections = Gauge(
     'database_connections_active',
     'Number of active database connections',
+    multiprocess_mode='livesum',
+    registry=registry
+)
+
+# Password hashing pool metrics
+password_pool_wait = Histogram(
+    'password_pool_wait_seconds',
+    'Time password hashing jobs wait for a pool worker',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=registry
+)
+
+password_pool_in_flight = Gauge(
+    'password_pool_in_flight',
+    'Password hashing jobs running or queued',
+    multiprocess_mode='livesum',
+    registry=registry
+)
+
+password_pool_rejections = Counter(
+    'password_pool_rejections_total',
+    'Password hashing jobs rejected because the pool was saturated',
     registry=registry
 )
 
@@ -72,68 +114,82 @@ VERSION = os.getenv("APP_VERSION", "1.0.0")
 app_info.labels(version=VERSION).set(1)
 
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    """Middleware to collect Prometheus metrics for all requests."""
+def route_template(scope: Scope) -> str:
+    """Path template of the route serving a request, e.g. /encounters/{encounter_id}."""
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or UNMATCHED_ENDPOINT
+
+
+class PrometheusMiddleware:
+    """ASGI middleware to collect Prometheus metrics for all requests."""
     
-    async def dispatch(self, request: Request, call_next):
-        """Process request and collect metrics."""
-        # Skip metrics endpoint itself
-        if request.url.path == "/api/metrics":
-            return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Skip non-HTTP traffic and the metrics endpoint itself
+        if scope["type"] != "http" or scope["path"] == "/api/metrics":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        path = route_template(scope)
+        status_code = 500
         
-        method = request.method
-        path = request.url.path
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
         # Track request in progress
-        request_in_progress.labels(method=method, endpoint=path).inc()
+        in_progress = request_in_progress.labels(method=method, endpoint=path)
+        in_progress.inc()
         
         # Track request latency
-        start_time = time()
+        start_time = perf_counter()
         
         try:
-            response = await call_next(request)
-            status_code = response.status_code
+            await self.app(scope, receive, send_wrapper)
+            
+        except Exception:
+            # Track exceptions as 500 errors
+            error_count.labels(method=method, endpoint=path, status_code=500).inc()
+            raise
             
+        else:
             # Track request completion
-            request_count.labels(
-                method=method,
-                endpoint=path,
-                status_code=status_code
-            ).inc()
+            request_count.labels(method=method, endpoint=path, status_code=status_code).inc()
             
             # Track errors (4xx and 5xx)
             if status_code >= 400:
-                error_count.labels(
-                    method=method,
-                    endpoint=path,
-                    status_code=status_code
-                ).inc()
-            
-            return response
-            
-        except Exception as e:
-            # Track exceptions as 500 errors
-            error_count.labels(
-                method=method,
-                endpoint=path,
-                status_code=500
-            ).inc()
-            raise e
+                error_count.labels(method=method, endpoint=path, status_code=status_code).inc()
             
         finally:
-            # Record latency
-            duration = time() - start_time
-            request_latency.labels(method=method, endpoint=path).observe(duration)
-            
-            # Decrement in-progress counter
-            request_in_progress.labels(method=method, endpoint=path).dec()
-            
-            # Update system metrics
-            try:
-                cpu_usage.set(psutil.cpu_percent())
-                memory_usage.set(psutil.Process().memory_info().rss)
-            except:
-                pass  # Ignore if psutil is not available
+            request_latency.labels(method=method, endpoint=path).observe(perf_counter() - start_time)
+            in_progress.dec()
+
+
+def sample_system_metrics():
+    """Update the CPU and memory gauges."""
+    try:
+        cpu_usage.set(psutil.cpu_percent())
+        memory_usage.set(psutil.Process().memory_info().rss)
+    except Exception as e:
+        logger.warning(f"Failed to sample system metrics: {e}")
+
+
+async def run_system_metrics_sampler(interval: float = SYSTEM_METRICS_INTERVAL):
+    """Sample system metrics every ``interval`` seconds until cancelled."""
+    while True:
+        sample_system_metrics()
+        await asyncio.sleep(interval)
 
 
 # Router for metrics endpoint
@@ -147,7 +203,14 @@ async def metrics():
     
     Exposes application metrics in Prometheus format.
     """
+    if MULTIPROCESS_DIR:
+        # Aggregate the samples written by every worker process
+        collected = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collected)
+    else:
+        collected = registry
+    
     return Response(
-        content=generate_latest(registry),
+        content=generate_latest(collected),
         media_type=CONTENT_TYPE_LATEST
     )
@@ -0,0 +1,170 @@
+"""
+Keyset pagination and field selection for list endpoints.
+
+List endpoints accept three optional query parameters:
+
+- ``limit``: page size. Without it the whole list is returned.
+- ``cursor``: the ``X-Next-Cursor`` header of the previous page. The next
+  page starts after the last row of that page, so it stays stable while
+  rows are added or removed, and each page is an index range read rather
+  than an OFFSET scan.
+- ``fields``: comma-separated names of the fields to return. Only those
+  columns are selected.
+
+A list is ordered by its key columns, all descending. The last key must be
+unique (the id), so the cursor, which holds the last row's keys, identifies
+one position in the list.
+"""
+import base64
+import datetime
+import json
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel
+from sqlalchemy import DateTime, Integer, literal, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.utils.responses import fast_json_response, validate_rows
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Largest page a client can ask for
+MAX_PAGE_SIZE = 500
+
+
+class comparable_timestamp(FunctionElement):
+    """A timestamp in a form that compares correctly with bound timestamps."""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(comparable_timestamp)
+def _comparable_timestamp_default(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+@compiles(comparable_timestamp, "sqlite")
+def _comparable_timestamp_sqlite(element, compiler, **kw):
+    # SQLite keeps timestamps as text: CURRENT_TIMESTAMP defaults have no
+    # fraction, bound datetimes have six digits, so compare a common format
+    return f"strftime('%Y-%m-%d %H:%M:%f', {compiler.process(element.clauses, **kw)})"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value: Any) -> Any:
+    if isinstance(column.type, DateTime):
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(column.type, Integer):
+        if not isinstance(value, int):
+            raise ValueError("Expected an integer")
+        return value
+    return uuid.UUID(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor holding a row's key values."""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """Key values from a cursor, raising 400 if it is not one of ours."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("Wrong number of keys")
+        return [_decode_value(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _sortable(column):
+    return comparable_timestamp(column) if isinstance(column.type, DateTime) else column
+
+
+class PageParams:
+    """The ``limit``, ``cursor`` and ``fields`` query parameters of a list endpoint."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; the whole list if omitted"),
+        cursor: Optional[str] = Query(None, description=f"{NEXT_CURSOR_HEADER} header of the previous page"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name")
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+    def _field_names(self, columns: Dict[str, Any]) -> List[str]:
+        if self.fields is None:
+            return list(columns)
+        unknown = [name for name in self.fields if name not in columns]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(columns)}"
+            )
+        return list(dict.fromkeys(self.fields))
+
+    async def fetch(
+        self,
+        db,
+        query,
+        columns: Dict[str, Any],
+        keys: Sequence[str],
+        response: Response,
+        adjust: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run one page of ``query`` and return its rows as dicts of the requested fields.
+
+        ``query`` is a select with its FROM and WHERE already set; this adds
+        the columns, the keyset condition, ORDER BY and LIMIT. ``keys`` names
+        the ordering columns in ``columns``. The next page's cursor goes in
+        the response header. ``adjust``, if given, may change each row (with
+        its keys) in place after the cursor is taken, so it does not move
+        page boundaries.
+        """
+        names = self._field_names(columns)
+        key_columns = [columns[key] for key in keys]
+        selected = list(dict.fromkeys(names + list(keys)))
+        query = query.with_only_columns(
+            *[columns[name].label(name) for name in selected], maintain_column_froms=True
+        ).order_by(*[column.desc() for column in key_columns])
+
+        if self.cursor is not None:
+            values = decode_cursor(self.cursor, key_columns)
+            query = query.where(
+                tuple_(*[_sortable(column) for column in key_columns])
+                < tuple_(*[_sortable(literal(value, column.type)) for column, value in zip(key_columns, values)])
+            )
+        if self.limit is not None:
+            # One extra row tells whether there is a next page
+            query = query.limit(self.limit + 1)
+
+        rows = [dict(row._mapping) for row in await db.execute(query)]
+        if self.limit is not None and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor([rows[-1][key] for key in keys])
+        if adjust is not None:
+            for row in rows:
+                adjust(row)
+
+        return [{name: row[name] for name in names} for row in rows]
+
+    def render(self, rows: List[Dict[str, Any]], model: Type[BaseModel], response: Response) -> Response:
+        """Full rows as a list of ``model``; selected fields as plain JSON objects."""
+        if self.fields is None:
+            return fast_json_response(validate_rows(model, rows), List[model], response=response)
+        # Partial rows do not fit the response model; the columns' own types serialize as-is
+        return fast_json_response(rows, List[Dict[str, Any]], response=response)
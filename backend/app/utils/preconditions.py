@@ -0,0 +1,55 @@
+"""
+Optimistic concurrency for encounter and preset writes.
+
+Encounters and presets carry a ``version`` that every change bumps and
+that is part of their ETag (see app.utils.responses). Writes return the
+new ETag, and a client that sends it back in If-Match only overwrites the
+row if nobody has changed it since:
+
+- The ETag is compared when the row is loaded.
+- The row's UPDATE carries ``WHERE version = ?`` (the models map
+  ``version`` as the ORM's ``version_id_col``), so a write landing
+  between the load and the UPDATE makes that one statement match no row
+  rather than being overwritten.
+
+Either way the client gets 412 Precondition Failed and should refetch
+and reapply its edit. Writes without If-Match stay last-write-wins; only
+losing the race inside a request returns 409.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm.exc import StaleDataError
+
+
+def precondition_failed(what: str) -> HTTPException:
+    """412 for a write whose If-Match no longer names the current ``what``."""
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=f"{what} was changed by another request; reload it and try again"
+    )
+
+
+def check_if_match(if_match: Optional[str], etag: str, what: str) -> None:
+    """Raise 412 unless If-Match is absent, ``*`` or names ``etag``.
+
+    If-Match uses strong comparison, so weak W/ tags never match.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return
+    if etag not in (tag.strip() for tag in if_match.split(",")):
+        raise precondition_failed(what)
+
+
+async def commit_versioned(db, if_match: Optional[str], what: str) -> None:
+    """Commit, turning an UPDATE that lost the version race into 412 (or 409 without If-Match)."""
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        if if_match is not None:
+            raise precondition_failed(what)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{what} was changed by another request; try again"
+        )
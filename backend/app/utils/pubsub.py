@@ -0,0 +1,189 @@
+"""
+Cross-worker change notifications.
+
+Writers call ``await pubsub.publish(topic, message)`` after committing.
+The message is handled in the publishing worker straight away and sent
+to every other worker through the backend:
+
+- ``PostgresBackend``: one asyncpg connection per worker that LISTENs on
+  a channel and sends NOTIFY. No separate broker is needed.
+- ``InMemoryBackend``: an in-process bus for SQLite, tests and single
+  worker deployments.
+
+Delivery is at most once. When the Postgres listener loses its
+connection, notifications sent meanwhile are gone, so after reconnecting
+every topic's resync callback runs and local caches start over.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# LISTEN/NOTIFY channel shared by all workers
+CHANNEL = "app_changes"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+# Seconds between listener health checks and reconnect attempts
+RECONNECT_INTERVAL = 5.0
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class InMemoryBackend:
+    """Bus connecting PubSub instances in the same process."""
+
+    def __init__(self):
+        self._receivers: List[Callable[[str], None]] = []
+
+    async def start(self, receive: Callable[[str], None], on_reconnect: Callable[[], None]) -> None:
+        self._receivers.append(receive)
+
+    async def stop(self) -> None:
+        self._receivers.clear()
+
+    async def notify(self, payload: str) -> None:
+        for receive in list(self._receivers):
+            receive(payload)
+
+
+class PostgresBackend:
+    """LISTEN/NOTIFY over a dedicated asyncpg connection."""
+
+    def __init__(self, dsn: str, channel: str = CHANNEL, reconnect_interval: float = RECONNECT_INTERVAL):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._supervisor: Optional[asyncio.Task] = None
+
+    async def _connect(self, receive: Callable[[str], None]) -> None:
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(self.channel, lambda conn, pid, channel, payload: receive(payload))
+        self._connection = connection
+
+    async def start(self, receive: Callable[[str], None], on_reconnect: Callable[[], None]) -> None:
+        await self._connect(receive)
+        self._supervisor = asyncio.create_task(self._supervise(receive, on_reconnect))
+
+    async def _supervise(self, receive: Callable[[str], None], on_reconnect: Callable[[], None]) -> None:
+        """Reconnect the listener whenever its connection drops."""
+        while True:
+            await asyncio.sleep(self.reconnect_interval)
+            if self._connection is not None and not self._connection.is_closed():
+                continue
+            try:
+                await self._connect(receive)
+            except Exception as e:
+                logger.warning(f"Pub/sub listener reconnect failed: {e}")
+                continue
+            logger.info("Pub/sub listener reconnected")
+            on_reconnect()
+
+    async def stop(self) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+        self._connection = None
+
+    async def notify(self, payload: str) -> None:
+        if self._connection is None or self._connection.is_closed():
+            logger.warning("Pub/sub connection unavailable; notification not sent to other workers")
+            return
+        # One connection serves every request in the worker
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+
+class PubSub:
+    """Topic-based dispatch of change notifications to local handlers."""
+
+    def __init__(self):
+        self.backend = None
+        # Identifies this worker so its own notifications are not handled twice
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._resync: Dict[str, List[Callable[[], None]]] = {}
+
+    def subscribe(self, topic: str, handler: Handler, resync: Optional[Callable[[], None]] = None) -> None:
+        """Call ``handler(message)`` for each message on ``topic``.
+
+        ``resync`` is called when messages may have been missed.
+        """
+        self._handlers.setdefault(topic, []).append(handler)
+        if resync is not None:
+            self._resync.setdefault(topic, []).append(resync)
+
+    def _dispatch(self, topic: str, message: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Pub/sub handler for '{topic}' failed: {e}")
+
+    def _receive(self, payload: str) -> None:
+        """Handle a notification from the backend."""
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed pub/sub payload")
+            return
+        if envelope.get("origin") == self.origin:
+            return
+        if envelope.get("resync"):
+            self._resync_topic(envelope["topic"])
+            return
+        self._dispatch(envelope["topic"], envelope["message"])
+
+    def _resync_topic(self, topic: str) -> None:
+        for resync in self._resync.get(topic, ()):
+            resync()
+
+    def resync_all(self) -> None:
+        """Tell every topic that messages may have been missed."""
+        for topic in self._resync:
+            self._resync_topic(topic)
+
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        """Handle a message locally and forward it to the other workers."""
+        self._dispatch(topic, message)
+        if self.backend is None:
+            return
+
+        payload = json.dumps({"origin": self.origin, "topic": topic, "message": message})
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            # Too large for NOTIFY; have the other workers resync the topic instead
+            payload = json.dumps({"origin": self.origin, "topic": topic, "resync": True})
+        try:
+            await self.backend.notify(payload)
+        except Exception as e:
+            logger.warning(f"Failed to publish '{topic}' notification: {e}")
+
+    async def start(self, backend) -> None:
+        """Connect the backend and start receiving notifications."""
+        await backend.start(self._receive, self.resync_all)
+        self.backend = backend
+
+    async def stop(self) -> None:
+        if self.backend is not None:
+            await self.backend.stop()
+        self.backend = None
+
+
+def create_backend(database_url: str, backend: str = "auto"):
+    """Pick the pub/sub backend for a database URL ("auto", "postgres" or "memory")."""
+    is_postgres = database_url.startswith(("postgres://", "postgresql://", "postgresql+"))
+    if backend == "postgres" or (backend == "auto" and is_postgres):
+        scheme, rest = database_url.split("://", 1)
+        return PostgresBackend(f"postgresql://{rest}")
+    return InMemoryBackend()
+
+
+# Global pub/sub instance
+pubsub = PubSub()
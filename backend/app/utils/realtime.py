@@ -0,0 +1,102 @@
+"""
+Fan-out of encounter change events to push subscribers (WebSocket/SSE).
+
+Routers publish a small delta event after each committed mutation. It
+travels to every worker over pub/sub, and each worker hands it to its
+open push connections for that encounter through their bounded queues.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, Optional, Set
+
+from app.utils.pubsub import pubsub
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Event types
+ENCOUNTER_UPDATED = "encounter.updated"
+ENCOUNTER_DELETED = "encounter.deleted"
+CREATURE_ADDED = "creature.added"
+CREATURE_UPDATED = "creature.updated"
+CREATURE_REMOVED = "creature.removed"
+# Many creatures added, updated and removed at once by the batch endpoint
+CREATURES_CHANGED = "creatures.changed"
+SNAPSHOT = "snapshot"
+# Sent instead of the backlog to a subscriber that fell behind, or when
+# events may have been lost between workers; the client should refetch
+RESYNC = "resync"
+
+# Pub/sub topic carrying encounter events between workers
+ENCOUNTER_TOPIC = "encounter"
+
+
+def make_event(event_type: str, encounter_id: uuid.UUID, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build the JSON-ready event sent to subscribers."""
+    return {"type": event_type, "encounter_id": str(encounter_id), "data": data or {}}
+
+
+class EncounterEvents:
+    """Per-encounter sets of subscriber queues in this worker."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, encounter_id: uuid.UUID) -> asyncio.Queue:
+        """Register a new subscriber queue for an encounter."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(str(encounter_id), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, encounter_id: uuid.UUID, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue."""
+        key = str(encounter_id)
+        queues = self._subscribers.get(key)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[key]
+
+    def subscriber_count(self, encounter_id: uuid.UUID) -> int:
+        """Number of open subscriptions for an encounter."""
+        return len(self._subscribers.get(str(encounter_id), ()))
+
+    async def publish(self, encounter_id: uuid.UUID, event_type: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Send an event to the encounter's subscribers in every worker."""
+        await pubsub.publish(ENCOUNTER_TOPIC, make_event(event_type, encounter_id, data))
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to this worker's subscribers without blocking."""
+        queues = self._subscribers.get(event["encounter_id"])
+        if not queues:
+            return
+
+        for queue in list(queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._resync_queue(queue, event["encounter_id"])
+                logger.warning(f"Push subscriber for encounter {event['encounter_id']} fell behind; sent resync")
+
+    def resync(self) -> None:
+        """Ask every subscriber in this worker to refetch."""
+        for encounter_id, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self._resync_queue(queue, encounter_id)
+
+    @staticmethod
+    def _resync_queue(queue: asyncio.Queue, encounter_id: str) -> None:
+        """Replace a subscriber's backlog with a single resync event."""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(make_event(RESYNC, encounter_id))
+
+
+# Global encounter events instance
+encounter_events = EncounterEvents()
+pubsub.subscribe(ENCOUNTER_TOPIC, encounter_events.dispatch, resync=encounter_events.resync)
@@ -0,0 +1,89 @@
+"""
+Fast JSON responses for endpoints returning many rows.
+
+When an endpoint returns models, FastAPI validates them against
+``response_model`` again, turns them into dicts and encodes those with the
+stdlib ``json`` module. Endpoints on the fast path instead validate their
+rows once into the response type and let pydantic-core write the JSON
+bytes directly. The returned Response is passed through untouched;
+``response_model`` stays on the route for the OpenAPI schema.
+
+Single-resource reads also carry a strong ETag built from the row's
+``version`` counter and ``updated_at``. A client revalidating with
+If-None-Match gets 304 Not Modified after one indexed lookup of those two
+columns, before any child rows are loaded or anything is serialized.
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+# Cached copies may be kept but must be revalidated with If-None-Match before reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+class FastJSONResponse(Response):
+    """Pre-serialized JSON body."""
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_type: Any) -> TypeAdapter:
+    """The cached TypeAdapter for a response type; building one compiles its schema."""
+    return TypeAdapter(response_type)
+
+
+def validate_rows(model: Any, rows: Iterable[Any]) -> List[Any]:
+    """Validate ORM objects or row dicts into ``model`` instances in one pydantic-core call."""
+    return type_adapter(List[model]).validate_python(list(rows), from_attributes=True)
+
+
+def fast_json_response(
+    content: Any,
+    response_type: Any,
+    status_code: int = 200,
+    response: Optional[Response] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> FastJSONResponse:
+    """Serialize validated ``content`` of ``response_type`` (e.g. ``List[CreatureResponse]``).
+
+    Headers already set on the endpoint's injected ``response`` are kept.
+    """
+    all_headers = dict(response.headers) if response is not None else {}
+    all_headers.update(headers or {})
+    return FastJSONResponse(
+        type_adapter(response_type).dump_json(content),
+        status_code=status_code,
+        headers=all_headers
+    )
+
+
+def row_etag(version: int, updated_at: Optional[datetime], *parts: Any) -> str:
+    """Strong ETag of a row from its version counter and update time, plus any ``parts``."""
+    stamp = updated_at.strftime("%Y%m%d%H%M%S%f") if updated_at else "0"
+    return '"' + "-".join([str(version), stamp, *map(str, parts)]) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag``.
+
+    If-None-Match uses weak comparison, so a W/ prefix added by a proxy
+    still matches.
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Headers of a response that clients should revalidate by ETag."""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    """304 Not Modified for a client whose copy still has ``etag``."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
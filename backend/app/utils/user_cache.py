@@ -0,0 +1,98 @@
+"""
+In-process cache of authenticated users, keyed by access token.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.models.models import User
+from app.utils.pubsub import pubsub
+
+# Pub/sub topic announcing users whose cached tokens must be dropped
+USER_TOPIC = "user"
+
+
+class UserCache:
+    """Bounded LRU cache mapping a verified token to a snapshot of its user.
+
+    Entries expire after ``ttl`` seconds or at the token's own ``exp``,
+    whichever comes first. The cache is per worker process, so a deleted
+    account may stay valid in other workers for at most ``ttl`` seconds.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[User]:
+        """Return a detached copy of the cached user for this token, if any."""
+        if not self.enabled:
+            return None
+
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, values = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, token: str, user: User, token_exp: Optional[float] = None) -> None:
+        """Cache the user's column values until the TTL or token expiry."""
+        if not self.enabled:
+            return
+
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        key = self._key(token)
+        self._entries[key] = (expires_at, values)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id) -> None:
+        """Drop every cached token belonging to the given user."""
+        stale = [key for key, (_, values) in self._entries.items() if str(values["id"]) == str(user_id)]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global user cache instance
+user_cache = UserCache(
+    max_size=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
+pubsub.subscribe(
+    USER_TOPIC, lambda message: user_cache.invalidate_user(message["user_id"]), resync=user_cache.clear
+)
@@ -0,0 +1,85 @@
+"""
+Size and time of compressing a 1000-entry creature catalog response.
+
+Builds the body GET /api/creature-images/list_all_creatures returns for a
+catalog of ``entries`` creatures and compresses it at several gzip levels
+(and brotli qualities, if the Brotli package is installed). The levels used
+by app.utils.compression are marked; they should be close to the best
+ratio at a small fraction of its time.
+
+Usage (from the backend directory):
+    python benchmarks/bench_compression.py [entries] [repeats]
+"""
+import gzip
+import json
+import os
+import sys
+import time
+from random import Random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from app.utils.compression import BROTLI_AVAILABLE, BROTLI_QUALITY, GZIP_LEVEL
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+
+ADJECTIVES = ["ancient", "young", "giant", "dire", "elder", "shadow", "frost", "flame", "swamp", "cave",
+              "spectral", "armored", "feral", "winged", "undead", "crystal", "storm", "blood", "iron", "plague"]
+MONSTERS = ["dragon", "troll", "goblin", "orc", "wolf", "spider", "wyvern", "lich", "beholder", "ogre",
+            "kobold", "hag", "wraith", "golem", "basilisk", "manticore", "harpy", "gnoll", "mimic", "owlbear",
+            "hydra", "minotaur", "chimera", "banshee", "ghoul", "imp", "naga", "yeti", "drake", "treant"]
+
+
+def catalog_body(entries: int) -> bytes:
+    """The list_all_creatures response for a catalog of made-up creatures, in name order."""
+    random = Random(5)
+    names = set()
+    while len(names) < entries:
+        variant = f" {random.randint(2, 99)}" if len(names) >= 400 else ""
+        names.add(f"{random.choice(ADJECTIVES)} {random.choice(MONSTERS)}{variant}")
+    creatures = []
+    for name in sorted(names):
+        local = random.random() < 0.6
+        image = name.replace(" ", "_") + random.choice([".png", ".jpg", ".webp"])
+        creatures.append({
+            "name": name,
+            "image_url": f"/database_images/{image}" if local else f"https://images.example.com/{random.getrandbits(64):016x}/{image}",
+            "source": "local" if local else "database"
+        })
+    local = sum(1 for c in creatures if c["source"] == "local")
+    return json.dumps({
+        "creatures": creatures, "total": entries, "local_count": local, "database_count": entries - local
+    }).encode()
+
+
+def time_per_call(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    body = catalog_body(entries)
+    print(f"{entries}-entry catalog, {len(body)} bytes uncompressed")
+
+    candidates = [(f"gzip {level}", level == GZIP_LEVEL, lambda level=level: gzip.compress(body, level, mtime=0))
+                  for level in (1, 3, 5, 6, 9)]
+    if BROTLI_AVAILABLE:
+        candidates += [(f"br {quality}", quality == BROTLI_QUALITY,
+                        lambda quality=quality: brotli.compress(body, quality=quality))
+                       for quality in (1, 4, 6, 11)]
+    for name, used, function in candidates:
+        size = len(function())
+        print(f"  {name:8s} {size:7d} bytes ({size / len(body):5.1%}) {time_per_call(function, repeats) * 1e3:7.2f} ms"
+              f"{'  <- used' if used else ''}")
+
+
+if __name__ == "__main__":
+    main()
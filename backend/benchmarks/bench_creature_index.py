@@ -0,0 +1,86 @@
+"""
+Lookup time of the creature name index on a synthetic catalog.
+
+Builds a CreatureIndex over ``names`` made-up creature names that share
+words and trigrams the way a real monster catalog does ("young red
+dragon", "adult red dragon", ...), then times fuzzy lookups of catalog
+names with one typo, names with an extra word, and names that match
+nothing. Common trigrams ("dra", "gon", ...) appear in thousands of names,
+which is what makes unbounded scoring slow.
+
+Usage (from the backend directory):
+    python benchmarks/bench_creature_index.py [names] [lookups]
+"""
+import os
+import sys
+import time
+from random import Random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from app.utils.creature_catalog import CreatureIndex
+
+AGES = ["", "young ", "adult ", "ancient ", "greater ", "lesser "]
+ADJECTIVES = ["red", "blue", "green", "black", "white", "shadow", "frost", "flame", "swamp", "cave",
+              "spectral", "armored", "feral", "winged", "undead", "crystal", "storm", "blood", "iron", "plague"]
+MONSTERS = ["dragon", "troll", "goblin", "orc", "wolf", "spider", "wyvern", "lich", "beholder", "ogre",
+            "kobold", "hag", "wraith", "golem", "basilisk", "manticore", "harpy", "gnoll", "mimic", "owlbear",
+            "hydra", "minotaur", "chimera", "banshee", "ghoul", "imp", "naga", "yeti", "drake", "treant"]
+ROLES = ["", " warrior", " shaman", " chieftain", " brute", " mage", " king", " queen", " spawn", " lord"]
+
+
+def catalog_names(count: int, random: Random) -> list:
+    """``count`` distinct creature names."""
+    names = sorted({
+        f"{age}{adjective} {monster}{role}"
+        for age in AGES for adjective in ADJECTIVES for monster in MONSTERS for role in ROLES
+    })
+    return random.sample(names, min(count, len(names)))
+
+
+def with_typo(name: str, random: Random) -> str:
+    position = random.randrange(len(name))
+    return name[:position] + random.choice("abcdefghijklmnopqrstuvwxyz") + name[position + 1:]
+
+
+def lookups(names: list, count: int, random: Random) -> list:
+    """A mix of misspelled names, names with an extra word, and names that match nothing."""
+    queries = []
+    for i in range(count):
+        name = random.choice(names)
+        if i % 3 == 0:
+            queries.append(with_typo(name, random))
+        elif i % 3 == 1:
+            queries.append(f"{name} {random.choice(['elite', 'minion', 'boss'])} {i % 5 + 1}")
+        else:
+            queries.append(f"zzq{i} unknown")
+    return queries
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    lookup_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    random = Random(5)
+    names = catalog_names(count, random)
+    queries = lookups(names, lookup_count, random)
+
+    start = time.perf_counter()
+    index = CreatureIndex(names)
+    print(f"{len(names)}-name catalog, index built in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, limit=5)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    print(f"  {len(queries)} lookups: mean {mean * 1e3:.3f} ms, "
+          f"p50 {timings[len(timings) // 2] * 1e3:.3f} ms, p99 {timings[int(len(timings) * 0.99)] * 1e3:.3f} ms, "
+          f"max {timings[-1] * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
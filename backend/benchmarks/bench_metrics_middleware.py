@@ -0,0 +1,109 @@
+"""
+Per-request overhead of the Prometheus metrics middleware.
+
+Compares a bare app, the previous BaseHTTPMiddleware implementation (raw
+path labels, psutil sampled on every request) and the current ASGI
+PrometheusMiddleware. Requests are driven straight through the ASGI
+interface so only middleware cost is measured.
+
+Usage (from the backend directory):
+    python benchmarks/bench_metrics_middleware.py [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.utils.metrics import PrometheusMiddleware, request_count, request_latency
+
+
+class LegacyPrometheusMiddleware(BaseHTTPMiddleware):
+    """The metrics middleware as it was before the ASGI rewrite."""
+
+    async def dispatch(self, request, call_next):
+        path = request.url.path
+        start_time = time.time()
+        try:
+            response = await call_next(request)
+            request_count.labels(method=request.method, endpoint=path, status_code=response.status_code).inc()
+            return response
+        finally:
+            request_latency.labels(method=request.method, endpoint=path).observe(time.time() - start_time)
+            cpu_percent = psutil.cpu_percent()
+            rss = psutil.Process().memory_info().rss
+
+
+def build_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/encounters/{encounter_id}")
+    async def get_encounter(encounter_id: int):
+        return {"id": encounter_id}
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    """Send ``requests`` GETs through the ASGI app; return seconds per request."""
+    start = time.perf_counter()
+    for i in range(requests):
+        body_sent = False
+        response_done = asyncio.Event()
+
+        async def receive():
+            nonlocal body_sent
+            if body_sent:
+                # Like a server: report the disconnect once the response is out
+                await response_done.wait()
+                return {"type": "http.disconnect"}
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                response_done.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/encounters/{i}",
+            "raw_path": f"/encounters/{i}".encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    variants = [
+        ("no middleware", build_app()),
+        ("BaseHTTPMiddleware + psutil (before)", build_app(LegacyPrometheusMiddleware)),
+        ("ASGI PrometheusMiddleware (after)", build_app(PrometheusMiddleware)),
+    ]
+
+    baseline = None
+    for name, app in variants:
+        asyncio.run(drive(app, 200))  # warm up
+        per_request = asyncio.run(drive(app, requests))
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:40s} {per_request * 1e6:8.1f} us/request  (+{(per_request - baseline) * 1e6:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
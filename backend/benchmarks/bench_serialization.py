@@ -0,0 +1,96 @@
+"""
+Cost of serializing a 500-creature encounter response.
+
+Compares the default FastAPI path (a model returned from the endpoint is
+validated again against response_model, dumped to dicts and encoded with
+the stdlib json module) with the fast path in app.utils.responses (one
+validation, JSON written by pydantic-core). Both are measured on their
+own and end to end through the ASGI app, without a database.
+
+Usage (from the backend directory):
+    python benchmarks/bench_serialization.py [requests] [creatures]
+"""
+import asyncio
+import datetime
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.enums import CreatureType
+from app.models.models import Creature, Encounter
+from app.models.schemas import EncounterResponse
+from app.utils.responses import fast_json_response
+from bench_metrics_middleware import drive
+
+
+def build_encounter(creature_count: int) -> Encounter:
+    """A loaded-looking encounter with ``creature_count`` creatures, not bound to a session."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    encounter = Encounter(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), name="Benchmark", background_image="/uploads/map.png",
+        round_number=3, created_at=now, updated_at=now
+    )
+    encounter.creatures = [
+        Creature(
+            id=uuid.uuid4(), encounter_id=encounter.id, name=f"Goblin {i}", initiative=20 - i % 20,
+            creature_type=CreatureType.ENEMY, image_url=f"/uploads/goblin_{i % 7}.png", created_at=now
+        )
+        for i in range(creature_count)
+    ]
+    encounter.current_creature_id = encounter.creatures[7 % creature_count].id if creature_count else None
+    return encounter
+
+
+def build_app(encounter: Encounter, fast: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/encounters/{encounter_id}", response_model=EncounterResponse)
+    async def get_encounter(encounter_id: int):
+        response = EncounterResponse.model_validate(encounter)
+        return fast_json_response(response, EncounterResponse) if fast else response
+
+    return app
+
+
+def time_per_call(function, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    creatures = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    encounter = build_encounter(creatures)
+    field = create_response_field(name="response", type_=EncounterResponse)
+
+    def default_path():
+        content = asyncio.run(serialize_response(
+            field=field, response_content=EncounterResponse.model_validate(encounter)
+        ))
+        return JSONResponse(content).body
+
+    def fast_path():
+        return fast_json_response(EncounterResponse.model_validate(encounter), EncounterResponse).body
+
+    print(f"{creatures}-creature encounter, {len(fast_path())} bytes")
+    for name, function in [("default response_model path (before)", default_path), ("fast_json_response (after)", fast_path)]:
+        time_per_call(function, 20)  # warm up
+        print(f"  serialize  {name:40s} {time_per_call(function, requests) * 1e3:7.2f} ms")
+    for name, fast in [("default response_model path (before)", False), ("fast_json_response (after)", True)]:
+        app = build_app(encounter, fast)
+        asyncio.run(drive(app, 20))  # warm up
+        print(f"  ASGI GET   {name:40s} {asyncio.run(drive(app, requests)) * 1e3:7.2f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
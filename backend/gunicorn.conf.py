@@ -0,0 +1,28 @@
+"""
+Gunicorn settings.
+
+Workers share Prometheus metrics through PROMETHEUS_MULTIPROC_DIR so that
+/api/metrics reports all of them, not just the worker serving the scrape.
+"""
+import os
+import shutil
+
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = "0.0.0.0:8000"
+timeout = 600
+
+# Must be set before the workers import prometheus_client
+multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+
+def on_starting(server):
+    """Start each run with an empty metrics directory."""
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
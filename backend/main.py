@@ -1,17 +1,24 @@
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from functools import partial
+from typing import AsyncIterator, Callable
+import asyncio
 import os
 import time
 
 from app.config import settings
-from app.models.database import engine, get_db
+from app.models.database import engine, async_engine, get_db
 from app.models import models
-from app.routers import auth, users, encounters, creatures, uploads, presets, simple_creature_images, health
-from app.utils.metrics import PrometheusMiddleware, router as metrics_router
+from app.routers import auth, users, encounters, encounter_events, creatures, uploads, presets, simple_creature_images, health
+from app.utils.compression import CompressionMiddleware, PrecompressedStaticFiles, precompress_directory
+from app.utils.creature_catalog import creature_catalog
+from app.utils.pubsub import pubsub, create_backend
+from app.utils.live_sessions import live_sessions, run_flusher
+from app.utils.metrics import PrometheusMiddleware, run_system_metrics_sampler, router as metrics_router
 import logging
 
 # Configure logging
@@ -23,6 +30,8 @@ app = FastAPI(
     description="API for managing D&D encounters and initiative tracking",
     version="1.0.1"
 )
+# Database sessions for work outside requests (catalog load, live session flushes)
+app.state.db_sessions = get_db
 
 # Create database tables - with error handling
 try:
@@ -58,6 +67,9 @@ app.add_middleware(
     max_age=86400,  # Cache preflight for 24 hours
 )
 
+# Compress JSON and text responses for clients that accept gzip or brotli
+app.add_middleware(CompressionMiddleware)
+
 # Add Prometheus metrics middleware
 app.add_middleware(PrometheusMiddleware)
 
@@ -80,12 +92,13 @@ upload_path = settings.UPLOAD_DIR
 if not os.path.exists(upload_path):
     os.makedirs(upload_path)
 
-app.mount("/uploads", StaticFiles(directory=upload_path), name="uploads")
+# Compressible files are served from sidecars built at startup
+app.mount("/uploads", PrecompressedStaticFiles(directory=upload_path), name="uploads")
 
 # Mount database images directory if it exists
 database_images_path = os.getenv("DATABASE_IMAGES_DIR", "database_images")
 if os.path.exists(database_images_path):
-    app.mount("/database_images", StaticFiles(directory=database_images_path), name="database_images")
+    app.mount("/database_images", PrecompressedStaticFiles(directory=database_images_path), name="database_images")
 
 # Include routers
 app.include_router(health.router, tags=["Health"])
@@ -93,6 +106,7 @@ app.include_router(metrics_router, tags=["Metrics"])
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(encounters.router, prefix="/encounters", tags=["Encounters"])
+app.include_router(encounter_events.router, prefix="/encounters", tags=["Encounter Events"])
 app.include_router(creatures.router, prefix="/creatures", tags=["Creatures"])
 app.include_router(presets.router, prefix="/presets", tags=["Presets"])
 app.include_router(uploads.router, prefix="/upload", tags=["File Upload"])
@@ -120,30 +134,69 @@ async def test_cors(request: Request):
         "cors_origins": settings.CORS_ORIGINS
     }
 
-# Initialize JSON-based creature database
+async def flush_live_sessions(db_sessions: Callable[[], AsyncIterator[AsyncSession]] = get_db) -> int:
+    """Write pending live session changes to the database, in a session from ``db_sessions``."""
+    flushed = 0
+    async for db in db_sessions():
+        flushed = await live_sessions.flush(db)
+    return flushed
+
+# Initialize the creature image catalog
 @app.on_event("startup")
 async def startup_event():
     """Initialize the creature database."""
-    import json
     import os
-    
-    # Ensure creature database exists
-    creature_db_path = "./creature_database.json"
-    if not os.path.exists(creature_db_path):
-        default_db = {
-            "dragon": "/database_images/dragon.jpg",
-            "orc": "/database_images/orc.jpg", 
-            "skeleton": "/database_images/skeleton.png"
-        }
-        with open(creature_db_path, 'w') as f:
-            json.dump(default_db, f, indent=2)
-        print(f"Created default creature database: {creature_db_path}")
-    
+
     # Ensure database images directory exists
     database_images_dir = "./database_images"
     os.makedirs(database_images_dir, exist_ok=True)
     print(f"Database images directory ready: {database_images_dir}")
 
+    # Precompress static files that changed since the last start
+    for directory in (upload_path, database_images_path):
+        try:
+            await asyncio.to_thread(precompress_directory, directory)
+        except Exception as e:
+            logger.warning(f"Static files under {directory} not precompressed: {e}")
+
+    # Build the in-memory creature catalog once per worker
+    try:
+        async for db in app.state.db_sessions():
+            await creature_catalog.load(db)
+    except Exception as e:
+        logger.warning(f"Creature catalog not loaded at startup: {e}")
+
+    # One change-notification listener per worker
+    try:
+        await pubsub.start(create_backend(settings.DATABASE_URL, settings.PUBSUB_BACKEND))
+    except Exception as e:
+        logger.warning(f"Pub/sub listener not started; changes will not reach other workers: {e}")
+
+    # Sample CPU/memory gauges in the background instead of per request
+    app.state.system_metrics_task = asyncio.create_task(run_system_metrics_sampler())
+
+    # Recover live session changes left by a crashed worker, then flush periodically
+    try:
+        await flush_live_sessions(app.state.db_sessions)
+    except Exception as e:
+        logger.warning(f"Live session recovery flush failed; the flusher will retry: {e}")
+    app.state.live_session_flusher = asyncio.create_task(
+        run_flusher(partial(flush_live_sessions, app.state.db_sessions), settings.LIVE_SESSION_FLUSH_INTERVAL)
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and close pooled async database connections."""
+    app.state.system_metrics_task.cancel()
+    app.state.live_session_flusher.cancel()
+    try:
+        await flush_live_sessions(app.state.db_sessions)
+    except Exception as e:
+        logger.error(f"Live session changes not flushed at shutdown; they stay in {settings.LIVE_SESSION_STORE}: {e}")
+    await pubsub.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,38 @@
+"""
+Import the legacy creature_database.json and database_images/ directory
+into the creature_images table.
+
+Usage (from the backend directory):
+    python migrations/import_creature_images.py [creature_database.json] [database_images]
+
+Safe to run repeatedly; existing rows are updated in place.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.creature_image import CreatureImageDB
+from app.models.database import Base, SessionLocal, SyncSessionAdapter, engine
+from app.utils.creature_catalog import import_creature_catalog
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else None
+    images_dir = sys.argv[2] if len(sys.argv) > 2 else None
+
+    print("Ensuring creature_images table exists...")
+    Base.metadata.create_all(bind=engine, tables=[CreatureImageDB.__table__])
+
+    db = SyncSessionAdapter(SessionLocal())
+    try:
+        counts = asyncio.run(import_creature_catalog(db, db_path, images_dir))
+    finally:
+        asyncio.run(db.close())
+
+    print(f"Imported {counts['database']} database entries and {counts['local']} local images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Check and repair the denormalized creature counts on encounters and presets.
+
+Usage (from the backend directory):
+    python migrations/repair_creature_counts.py [--check]
+
+With --check nothing is changed; the exit status is 1 if any count is wrong.
+Safe to run at any time; only wrong counts are rewritten.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.database import SessionLocal, SyncSessionAdapter
+from app.utils.creature_counts import check_creature_counts, repair_creature_counts
+
+
+def main():
+    check_only = "--check" in sys.argv[1:]
+
+    db = SyncSessionAdapter(SessionLocal())
+    try:
+        if check_only:
+            counts = asyncio.run(check_creature_counts(db))
+        else:
+            counts = asyncio.run(repair_creature_counts(db))
+    finally:
+        asyncio.run(db.close())
+
+    verb = "Wrong" if check_only else "Repaired"
+    print(f"{verb} creature counts: {counts['encounters']} encounters, {counts['presets']} presets")
+    if check_only and any(counts.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
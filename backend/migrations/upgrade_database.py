@@ -0,0 +1,25 @@
+"""
+Create missing tables and apply the Alembic migrations up to head.
+
+Usage (from the backend directory):
+    python migrations/upgrade_database.py
+
+startup.sh runs this before gunicorn, so workers never start against a
+schema missing columns the models use. Safe to run repeatedly.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.database import upgrade_schema
+
+
+def main():
+    print("Upgrading database schema...")
+    upgrade_schema()
+    print("Database schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
 #!/bin/bash
+set -e
 cd /home/site/wwwroot
-gunicorn -w 4 -k uvicorn.workers.UvicornWorker main:app --bind=0.0.0.0:8000 --timeout=600
+# Add new columns and indexes before any worker queries them
+python migrations/upgrade_database.py
+exec gunicorn -c gunicorn.conf.py main:app
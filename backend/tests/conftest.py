@@ -5,28 +5,35 @@ from pathlib import Path
 from typing import Generator
 
 import pytest
+from fastapi import status
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 # Add the parent directory to the path so we can import the app
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from app.models.database import Base, get_db
+from app.utils.creature_catalog import creature_catalog
+from app.utils.live_sessions import live_sessions
+from app.utils.user_cache import user_cache
 from main import app
 
 
-# Test database setup
-TEST_DATABASE_URL = "sqlite:///:memory:"
+@pytest.fixture(scope="function")
+def test_db_path(tmp_path) -> Path:
+    """Path of the SQLite file shared by the sync and async test engines."""
+    return tmp_path / "test.db"
 
 
 @pytest.fixture(scope="function")
-def test_db_engine():
+def test_db_engine(test_db_path):
     """Create a test database engine."""
     engine = create_engine(
-        TEST_DATABASE_URL,
+        f"sqlite:///{test_db_path}",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
@@ -50,21 +57,54 @@ def test_db_session(test_db_engine) -> Generator[Session, None, None]:
 
 
 @pytest.fixture(scope="function")
-def client(test_db_session) -> TestClient:
+def test_async_sessionmaker(test_db_engine, test_db_path) -> async_sessionmaker:
+    """Create an async session factory over the test database."""
+    # NullPool: each session opens its connection on the event loop that uses it
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{test_db_path}",
+        poolclass=NullPool,
+    )
+    return async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
+@pytest.fixture(scope="function")
+def client(test_async_sessionmaker, tmp_path) -> TestClient:
     """Create a test client with a test database session."""
     
-    def override_get_db():
-        try:
-            yield test_db_session
-        finally:
-            pass
+    async def override_get_db():
+        async with test_async_sessionmaker() as session:
+            yield session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.state.db_sessions = override_get_db
+    user_cache.clear()
+    creature_catalog.invalidate()
+    live_sessions.open(str(tmp_path / "live_sessions.db"))
     
     with TestClient(app) as test_client:
         yield test_client
     
     app.dependency_overrides.clear()
+    app.state.db_sessions = get_db
+    user_cache.clear()
+    creature_catalog.invalidate()
+    live_sessions.close()
+
+
+@pytest.fixture(scope="function")
+def sql_statements(test_async_sessionmaker) -> Generator[list, None, None]:
+    """Record the SQL statements the test client runs against the database."""
+    engine = test_async_sessionmaker.kw["bind"].sync_engine
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
 
 
 @pytest.fixture
@@ -108,3 +148,43 @@ def authenticated_headers(client, sample_user_data):
     token = response.json()["access_token"]
     
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def creature_payloads():
+    """Factory for creature request bodies.
+
+    ``creature_payloads(3)`` is Goblin 0-2 with initiative 0-2;
+    ``initiatives`` gives one creature per value instead.
+    """
+    def payloads(count=0, name="Goblin", initiatives=None, creature_type="enemy"):
+        if initiatives is None:
+            initiatives = range(count)
+        return [
+            {"name": f"{name} {i}", "initiative": initiative, "creature_type": creature_type}
+            for i, initiative in enumerate(initiatives)
+        ]
+    return payloads
+
+
+def _creating(client, path, creature_payloads):
+    def create(headers, creatures=0, name="Test", **fields):
+        """POST ``fields`` to ``path``; ``creatures`` is a list of payloads or a number of goblins."""
+        if isinstance(creatures, int):
+            creatures = creature_payloads(creatures)
+        response = client.post(path, json={"name": name, **fields, "creatures": list(creatures)}, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+    return create
+
+
+@pytest.fixture
+def create_encounter(client, creature_payloads):
+    """Factory creating an encounter through the API: ``create_encounter(headers, creatures, **fields)``."""
+    return _creating(client, "/encounters", creature_payloads)
+
+
+@pytest.fixture
+def create_preset(client, creature_payloads):
+    """Factory creating a preset through the API: ``create_preset(headers, creatures, **fields)``."""
+    return _creating(client, "/presets", creature_payloads)
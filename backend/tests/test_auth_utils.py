@@ -1,6 +1,9 @@
 """Unit tests for authentication utilities."""
+import asyncio
+import threading
 import pytest
 from datetime import datetime, timedelta
+from fastapi import HTTPException
 from jose import jwt
 from app.utils import auth
 from app.config import settings
@@ -37,6 +40,42 @@ class TestPasswordHashing:
         assert auth.verify_password(password, hash2) is True
 
 
+@pytest.mark.unit
+class TestPasswordWorkerPool:
+    """Tests for the bounded password hashing pool."""
+    
+    def test_async_hash_and_verify(self):
+        """Test hashing and verification on the worker pool."""
+        password = "TestPassword123!"
+        
+        async def roundtrip():
+            hashed = await auth.hash_password_async(password)
+            return await auth.verify_password_async(password, hashed)
+        
+        assert asyncio.run(roundtrip()) is True
+    
+    def test_saturated_pool_rejects_with_503(self):
+        """Test that jobs beyond workers + queue fail fast."""
+        pool = auth.PasswordWorkerPool(max_workers=1, max_queue=0)
+        release = threading.Event()
+        
+        async def saturate():
+            blocker = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0)
+            try:
+                with pytest.raises(HTTPException) as exc_info:
+                    await pool.run(auth.hash_password, "secret")
+            finally:
+                release.set()
+                await blocker
+            return exc_info.value
+        
+        error = asyncio.run(saturate())
+        
+        assert error.status_code == 503
+        assert pool.in_flight == 0
+
+
 @pytest.mark.unit
 class TestJWTTokens:
     """Tests for JWT token creation and verification."""
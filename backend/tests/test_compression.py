@@ -0,0 +1,159 @@
+"""Tests for negotiated response compression and precompressed static files."""
+import gzip
+import json
+import os
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.models.creature_image import CreatureImageDB
+from app.utils.creature_catalog import creature_catalog
+from app.utils.compression import ENCODINGS, PrecompressedStaticFiles, negotiate_encoding, precompress_directory
+
+CATALOG_URL = "/api/creature-images/list_all_creatures"
+
+
+@pytest.fixture
+def large_catalog(test_db_session):
+    """A 1000-entry creature catalog."""
+    test_db_session.add_all([
+        CreatureImageDB(creature_name=f"creature {i:04d}", image_url=f"/database_images/creature_{i:04d}.png")
+        for i in range(1000)
+    ])
+    test_db_session.commit()
+    creature_catalog.invalidate()
+
+
+class TestCompressionMiddleware:
+    """Test API responses are compressed for clients that accept it."""
+
+    def test_large_catalog_is_gzipped(self, client, large_catalog):
+        """Test the 1000-entry catalog goes out gzip-encoded at a fraction of its size."""
+        response = client.get(CATALOG_URL, headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert response.json()["total"] == 1000
+        assert response.num_bytes_downloaded < len(response.content) / 5
+
+    def test_uncompressed_without_accept_encoding(self, client, large_catalog):
+        """Test clients that do not accept gzip get the plain body."""
+        response = client.get(CATALOG_URL, headers={"Accept-Encoding": "identity"})
+
+        assert "Content-Encoding" not in response.headers
+        assert response.num_bytes_downloaded == len(response.content)
+
+    def test_small_response_not_compressed(self, client):
+        """Test bodies under the size threshold are sent as they are."""
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "Content-Encoding" not in response.headers
+
+    def test_compressed_etag_revalidates(self, client, large_catalog):
+        """Test the encoding-suffixed ETag of a compressed body still gets 304."""
+        listed = client.get(CATALOG_URL, headers={"Accept-Encoding": "gzip"})
+        etag = listed.headers["ETag"]
+
+        revalidated = client.get(CATALOG_URL, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+        assert etag.endswith('-gzip"')
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+        assert revalidated.headers["ETag"] == etag
+
+    def test_large_catalog_is_brotli_encoded(self, client, large_catalog):
+        """Test clients preferring brotli get a brotli body, smaller than gzip's."""
+        pytest.importorskip("brotli")
+        response = client.get(CATALOG_URL, headers={"Accept-Encoding": "br, gzip"})
+        gzipped = client.get(CATALOG_URL, headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "br"
+        assert response.headers["ETag"].endswith('-br"')
+        assert response.num_bytes_downloaded < gzipped.num_bytes_downloaded
+        assert response.json() == gzipped.json()
+
+        revalidated = client.get(
+            CATALOG_URL, headers={"Accept-Encoding": "br", "If-None-Match": response.headers["ETag"]}
+        )
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    @pytest.mark.parametrize("header, encoding", [
+        ("gzip, deflate", "gzip"),
+        ("deflate, gzip;q=0.5", "gzip"),
+        ("*", ENCODINGS[0]),
+        ("gzip;q=0", None),
+        ("identity", None),
+        ("", None),
+    ])
+    def test_negotiation(self, header, encoding):
+        """Test Accept-Encoding weights and wildcards."""
+        assert negotiate_encoding(header) == encoding
+
+
+class TestPrecompressedStaticFiles:
+    """Test sidecar files are built once and served in place of the originals."""
+
+    @pytest.fixture
+    def static_dir(self, tmp_path):
+        """A static directory with a compressible file and an image."""
+        (tmp_path / "monsters.json").write_text(json.dumps([{"name": f"Goblin {i}"} for i in range(500)]))
+        (tmp_path / "goblin.png").write_bytes(os.urandom(2048))
+        return tmp_path
+
+    def static_client(self, directory):
+        """A client for an app serving ``directory`` with sidecars."""
+        app = FastAPI()
+        app.mount("/static", PrecompressedStaticFiles(directory=str(directory)), name="static")
+        return TestClient(app)
+
+    def test_sidecars_built_for_compressible_files(self, static_dir):
+        """Test only text files get sidecars, and a second pass writes nothing."""
+        assert precompress_directory(str(static_dir)) >= 1
+        assert (static_dir / "monsters.json.gz").exists()
+        assert not (static_dir / "goblin.png.gz").exists()
+        assert precompress_directory(str(static_dir)) == 0
+
+    def test_sidecar_served(self, static_dir):
+        """Test a client accepting gzip gets the sidecar with the original's content type."""
+        precompress_directory(str(static_dir))
+        client = self.static_client(static_dir)
+
+        response = client.get("/static/monsters.json", headers={"Accept-Encoding": "gzip"})
+        plain = client.get("/static/monsters.json", headers={"Accept-Encoding": "identity"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.num_bytes_downloaded == (static_dir / "monsters.json.gz").stat().st_size
+        assert response.content == plain.content == (static_dir / "monsters.json").read_bytes()
+        revalidated = client.get(
+            "/static/monsters.json", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]}
+        )
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_brotli_sidecar_served(self, static_dir):
+        """Test a brotli sidecar is built and preferred over the gzip one."""
+        brotli = pytest.importorskip("brotli")
+        precompress_directory(str(static_dir))
+        sidecar = static_dir / "monsters.json.br"
+
+        response = self.static_client(static_dir).get("/static/monsters.json", headers={"Accept-Encoding": "gzip, br"})
+
+        assert brotli.decompress(sidecar.read_bytes()) == (static_dir / "monsters.json").read_bytes()
+        assert not (static_dir / "goblin.png.br").exists()
+        assert response.headers["Content-Encoding"] == "br"
+        assert response.num_bytes_downloaded == sidecar.stat().st_size
+        assert response.content == (static_dir / "monsters.json").read_bytes()
+
+    def test_outdated_sidecar_ignored(self, static_dir):
+        """Test a file changed after its sidecar was built is served from the file itself."""
+        precompress_directory(str(static_dir))
+        sidecar = static_dir / "monsters.json.gz"
+        os.utime(sidecar, (0, 0))
+        (static_dir / "monsters.json").write_text("[]")
+
+        response = self.static_client(static_dir).get("/static/monsters.json", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+        assert response.json() == []
+        assert gzip.decompress(sidecar.read_bytes()) != b"[]"
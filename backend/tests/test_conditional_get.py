@@ -0,0 +1,222 @@
+"""Tests for ETags: 304 Not Modified on reads and If-Match on writes."""
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+
+from app.models.models import Encounter
+from app.utils.preconditions import commit_versioned
+from app.utils.responses import CACHE_CONTROL, etag_matches
+
+
+def revalidate(client, headers, url, etag):
+    """GET ``url`` with If-None-Match set to ``etag``."""
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+class TestEncounterETags:
+    """Test conditional GET of a single encounter."""
+
+    def test_not_modified_is_one_lookup(self, client, authenticated_headers, sql_statements, create_encounter):
+        """Test an unchanged encounter is answered with an empty 304 after one SELECT of its version."""
+        encounter = create_encounter(authenticated_headers, 50, name="Cached")
+        url = f"/encounters/{encounter['id']}"
+        first = client.get(url, headers=authenticated_headers)
+
+        sql_statements.clear()
+        response = revalidate(client, authenticated_headers, url, first.headers["ETag"])
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == first.headers["ETag"]
+        assert first.headers["Cache-Control"] == CACHE_CONTROL
+        statements = [s for s in sql_statements if s.split()[0].upper() not in ("BEGIN", "COMMIT")]
+        assert len(statements) == 1
+        assert "creatures" not in statements[0]
+
+    @pytest.mark.parametrize("method, path, body", [
+        ("put", "", {"name": "Renamed"}),
+        ("patch", "/round", {"round_number": 4}),
+        ("post", "/advance", None),
+        ("post", "/creatures", {"name": "Wolf", "initiative": 7, "creature_type": "enemy"}),
+        ("put", "/creatures/{creature}", {"name": "Renamed"}),
+        ("delete", "/creatures/{creature}", None),
+        ("post", "/creatures/batch", {"create": [], "update": [{"id": "{creature}", "initiative": 20}], "delete": []}),
+    ])
+    def test_changes_move_etag(self, client, authenticated_headers, method, path, body, create_encounter):
+        """Test every kind of change gives the encounter a new ETag and the new body."""
+        encounter = create_encounter(authenticated_headers, 3, name="Cached")
+        url = f"/encounters/{encounter['id']}"
+        creature_id = encounter["creatures"][0]["id"]
+        etag = client.get(url, headers=authenticated_headers).headers["ETag"]
+        if isinstance(body, dict) and "update" in body:
+            body["update"][0]["id"] = creature_id
+
+        response = client.request(
+            method, url + path.format(creature=creature_id), json=body, headers=authenticated_headers
+        )
+        assert response.status_code < 300
+        revalidated = revalidate(client, authenticated_headers, url, etag)
+
+        assert revalidated.status_code == status.HTTP_200_OK
+        assert revalidated.headers["ETag"] != etag
+        assert revalidated.json() == client.get(url, headers=authenticated_headers).json()
+
+    def test_live_session_changes_move_etag(self, client, authenticated_headers, create_encounter):
+        """Test live turn and initiative changes, which are written behind, still change the ETag."""
+        encounter = create_encounter(authenticated_headers, 3, name="Live")
+        url = f"/encounters/{encounter['id']}"
+        etags = [client.get(url, headers=authenticated_headers).headers["ETag"]]
+
+        client.post(f"{url}/live", headers=authenticated_headers)
+        etags.append(client.get(url, headers=authenticated_headers).headers["ETag"])
+        client.put(
+            f"{url}/creatures/{encounter['creatures'][0]['id']}", json={"initiative": 0}, headers=authenticated_headers
+        )
+        etags.append(client.get(url, headers=authenticated_headers).headers["ETag"])
+        client.delete(f"{url}/live", headers=authenticated_headers)
+        etags.append(client.get(url, headers=authenticated_headers).headers["ETag"])
+
+        assert len(set(etags)) == 4
+        assert revalidate(client, authenticated_headers, url, etags[-1]).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_unknown_encounter(self, client, authenticated_headers):
+        """Test revalidating an encounter the user does not have is still a 404."""
+        response = revalidate(client, authenticated_headers, "/encounters/00000000-0000-0000-0000-000000000000", "*")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestPresetETags:
+    """Test conditional GET of a single preset."""
+
+    def test_not_modified_until_changed(self, client, authenticated_headers, create_preset):
+        """Test a preset revalidates with 304 until its creatures change."""
+        preset = create_preset(authenticated_headers, 3, name="Cached")
+        url = f"/presets/{preset['id']}"
+        etag = client.get(url, headers=authenticated_headers).headers["ETag"]
+
+        unchanged = revalidate(client, authenticated_headers, url, etag)
+        client.patch(
+            url, json=[{"op": "replace", "path": "/creatures/0/initiative", "value": 15}], headers=authenticated_headers
+        )
+        changed = revalidate(client, authenticated_headers, url, etag)
+
+        assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed.json()["creatures"][0]["initiative"] == 15
+        revalidated = revalidate(client, authenticated_headers, url, changed.headers["ETag"])
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+class TestETagMatching:
+    """Test If-None-Match parsing."""
+
+    @pytest.mark.parametrize("header, matches", [
+        ('"3-1"', True),
+        ('W/"3-1"', True),
+        ('"2-1", "3-1"', True),
+        ("*", True),
+        ('"3-2"', False),
+        (None, False),
+    ])
+    def test_etag_matches(self, header, matches):
+        """Test lists, weak tags and the wildcard are handled."""
+        assert etag_matches(header, '"3-1"') is matches
+
+
+class TestIfMatch:
+    """Test optimistic concurrency on encounter and preset writes."""
+
+    @pytest.mark.parametrize("method, path, body", [
+        ("put", "/encounters/{id}", {"name": "Renamed"}),
+        ("patch", "/encounters/{id}/round", {"round_number": 5}),
+        ("put", "/presets/{id}", {"name": "Renamed"}),
+        ("patch", "/presets/{id}", [{"op": "replace", "path": "/name", "value": "Renamed"}]),
+    ])
+    def test_stale_write_rejected(self, client, authenticated_headers, method, path, body):
+        """Test a write with the current ETag succeeds, returns the next ETag, and a stale one gets 412."""
+        collection = path.split("/")[1]
+        item = client.post(f"/{collection}", json={"name": "Shared"}, headers=authenticated_headers).json()
+        url = path.format(id=item["id"])
+        etag = client.get(f"/{collection}/{item['id']}", headers=authenticated_headers).headers["ETag"]
+
+        first = client.request(method, url, json=body, headers={**authenticated_headers, "If-Match": etag})
+        second = client.request(method, url, json=body, headers={**authenticated_headers, "If-Match": etag})
+
+        assert first.status_code == status.HTTP_200_OK
+        assert first.headers["ETag"] != etag
+        assert second.status_code == status.HTTP_412_PRECONDITION_FAILED
+        chained = client.request(
+            method, url, json=body, headers={**authenticated_headers, "If-Match": first.headers["ETag"]}
+        )
+        assert chained.status_code == status.HTTP_200_OK
+        current = client.get(f"/{collection}/{item['id']}", headers=authenticated_headers)
+        assert current.headers["ETag"] == chained.headers["ETag"]
+
+    def test_creature_change_invalidates_if_match(self, client, authenticated_headers, creature_payloads):
+        """Test a creature added from another device makes an encounter edit based on the old copy fail."""
+        encounter = client.post("/encounters", json={"name": "Shared"}, headers=authenticated_headers)
+        url = f"/encounters/{encounter.json()['id']}"
+        client.post(f"{url}/creatures", json=creature_payloads(1)[0], headers=authenticated_headers)
+
+        response = client.put(
+            url, json={"name": "Renamed"}, headers={**authenticated_headers, "If-Match": encounter.headers["ETag"]}
+        )
+
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert client.get(url, headers=authenticated_headers).json()["name"] == "Shared"
+
+    def test_live_round_if_match(self, client, authenticated_headers, create_encounter):
+        """Test If-Match on a live round change compares the live session's version too."""
+        encounter = create_encounter(authenticated_headers, 2, name="Live")
+        url = f"/encounters/{encounter['id']}"
+        etag = client.post(f"{url}/live", headers=authenticated_headers).headers["ETag"]
+        client.post(f"{url}/advance", headers=authenticated_headers)
+
+        stale = client.patch(
+            f"{url}/round", json={"round_number": 9}, headers={**authenticated_headers, "If-Match": etag}
+        )
+        current = client.get(url, headers=authenticated_headers).headers["ETag"]
+        fresh = client.patch(
+            f"{url}/round", json={"round_number": 9}, headers={**authenticated_headers, "If-Match": current}
+        )
+
+        assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert fresh.status_code == status.HTTP_200_OK
+        assert fresh.json()["round_number"] == 9
+        revalidated = revalidate(client, authenticated_headers, url, fresh.headers["ETag"])
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_update_is_conditional_on_version(self, client, authenticated_headers, sql_statements):
+        """Test the encounter UPDATE itself carries the version it was read at."""
+        encounter = client.post("/encounters", json={"name": "Shared"}, headers=authenticated_headers).json()
+
+        sql_statements.clear()
+        client.put(f"/encounters/{encounter['id']}", json={"name": "Renamed"}, headers=authenticated_headers)
+
+        update_statement = next(s for s in sql_statements if s.startswith("UPDATE encounters"))
+        assert "encounters.version = ?" in update_statement.split("WHERE")[1]
+
+    def test_race_after_load(self, client, authenticated_headers, test_db_session, test_async_sessionmaker):
+        """Test a change landing between loading and writing a row fails the write with 412."""
+        created = client.post("/encounters", json={"name": "Shared"}, headers=authenticated_headers)
+        encounter_id = uuid.UUID(created.json()["id"])
+
+        async def write():
+            async with test_async_sessionmaker() as db:
+                encounter = await db.scalar(select(Encounter).where(Encounter.id == encounter_id))
+                test_db_session.execute(
+                    update(Encounter).where(Encounter.id == encounter_id).values(version=Encounter.version + 1)
+                )
+                test_db_session.commit()
+                encounter.name = "Lost update"
+                await commit_versioned(db, '"etag"', "Encounter")
+
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(write())
+
+        assert raised.value.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert test_db_session.scalar(select(Encounter.name).where(Encounter.id == encounter_id)) == "Shared"
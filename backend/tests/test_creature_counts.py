@@ -0,0 +1,114 @@
+"""Tests for the denormalized creature counts on encounters and presets."""
+import asyncio
+import uuid
+
+from fastapi import status
+from sqlalchemy import select, update
+
+from app.models.models import Encounter, Preset
+from app.utils.creature_counts import check_creature_counts, repair_creature_counts
+
+
+def listed_count(client, headers, path, item_id):
+    """The creature_count shown for an item in a listing."""
+    return {item["id"]: item["creature_count"] for item in client.get(path, headers=headers).json()}[item_id]
+
+
+def run(sessionmaker, function):
+    """Run a creature count function against the test database."""
+    async def main():
+        async with sessionmaker() as db:
+            return await function(db)
+    return asyncio.run(main())
+
+
+class TestEncounterCreatureCounts:
+    """Test every creature write path keeps the encounter count in step."""
+
+    def test_count_follows_creature_changes(self, client, authenticated_headers, creature_payloads, create_encounter):
+        """Test adding, batching and deleting creatures moves the listed count."""
+        headers = authenticated_headers
+        encounter = create_encounter(headers, 3, name="Counted")
+        url = f"/encounters/{encounter['id']}"
+        assert listed_count(client, headers, "/encounters", encounter["id"]) == 3
+
+        client.post(f"{url}/creatures", json=creature_payloads(1, "Wolf")[0], headers=headers)
+        added = client.post("/creatures", json={"encounter_id": encounter["id"], **creature_payloads(1, "Bat")[0]}, headers=headers).json()
+        assert listed_count(client, headers, "/encounters", encounter["id"]) == 5
+
+        client.post(
+            f"{url}/creatures/batch",
+            json={"create": creature_payloads(2, "Rat"), "update": [], "delete": [encounter["creatures"][0]["id"]]},
+            headers=headers,
+        )
+        assert listed_count(client, headers, "/encounters", encounter["id"]) == 6
+
+        client.delete(f"{url}/creatures/{encounter['creatures'][1]['id']}", headers=headers)
+        client.delete(f"/creatures/{added['id']}", headers=headers)
+        assert listed_count(client, headers, "/encounters", encounter["id"]) == 4
+        assert len(client.get(f"{url}/creatures", headers=headers).json()) == 4
+
+    def test_failed_batch_keeps_count(self, client, authenticated_headers, creature_payloads, create_encounter):
+        """Test a batch rolled back for a missing creature leaves the count alone."""
+        encounter = create_encounter(authenticated_headers, 2, name="Counted")
+
+        response = client.post(
+            f"/encounters/{encounter['id']}/creatures/batch",
+            json={"create": creature_payloads(3), "update": [], "delete": [str(uuid.uuid4())]},
+            headers=authenticated_headers,
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert listed_count(client, authenticated_headers, "/encounters", encounter["id"]) == 2
+
+    def test_other_users_encounter_not_counted(self, client, authenticated_headers, test_db_session, creature_payloads):
+        """Test adding a creature to an unknown encounter changes no count."""
+        response = client.post(
+            f"/encounters/{uuid.uuid4()}/creatures", json=creature_payloads(1)[0], headers=authenticated_headers
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert test_db_session.scalar(select(Encounter.creature_count).where(Encounter.creature_count != 0)) is None
+
+
+class TestPresetCreatureCounts:
+    """Test preset writes keep the preset count in step."""
+
+    def test_count_follows_preset_edits(self, client, authenticated_headers, creature_payloads, create_preset):
+        """Test creating, updating and patching a preset moves the listed count."""
+        headers = authenticated_headers
+        preset = create_preset(headers, 3, name="Counted")
+        assert listed_count(client, headers, "/presets", preset["id"]) == 3
+
+        client.put(f"/presets/{preset['id']}", json={"creatures": preset["creatures"][:1] + creature_payloads(3, "Wolf")}, headers=headers)
+        assert listed_count(client, headers, "/presets", preset["id"]) == 4
+
+        client.patch(f"/presets/{preset['id']}", json=[{"op": "remove", "path": "/creatures/0"}], headers=headers)
+        assert listed_count(client, headers, "/presets", preset["id"]) == 3
+
+    def test_instantiated_encounter_count(self, client, authenticated_headers, create_preset):
+        """Test an encounter created from a preset starts with the preset's count."""
+        preset = create_preset(authenticated_headers, 4, name="Counted")
+
+        encounter = client.post(f"/presets/{preset['id']}/instantiate", headers=authenticated_headers).json()
+
+        assert listed_count(client, authenticated_headers, "/encounters", encounter["id"]) == 4
+
+
+class TestRepairCreatureCounts:
+    """Test the consistency check and repair command."""
+
+    def test_check_and_repair(self, client, authenticated_headers, test_db_session, test_async_sessionmaker, create_encounter, create_preset):
+        """Test drifted counts are reported, then recounted from the creature tables."""
+        encounter = create_encounter(authenticated_headers, 3, name="Drifted")
+        preset = create_preset(authenticated_headers, 2, name="Drifted")
+        create_encounter(authenticated_headers, 1, name="Fine")
+        test_db_session.execute(update(Encounter).where(Encounter.id == uuid.UUID(encounter["id"])).values(creature_count=7))
+        test_db_session.execute(update(Preset).where(Preset.id == uuid.UUID(preset["id"])).values(creature_count=0))
+        test_db_session.commit()
+
+        assert run(test_async_sessionmaker, check_creature_counts) == {"encounters": 1, "presets": 1}
+        assert run(test_async_sessionmaker, repair_creature_counts) == {"encounters": 1, "presets": 1}
+        assert run(test_async_sessionmaker, check_creature_counts) == {"encounters": 0, "presets": 0}
+        assert listed_count(client, authenticated_headers, "/encounters", encounter["id"]) == 3
+        assert listed_count(client, authenticated_headers, "/presets", preset["id"]) == 2
@@ -0,0 +1,384 @@
+"""Tests for the creature image catalog and endpoints."""
+import asyncio
+import json
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.models.creature_image import CreatureImageDB
+from app.models.database import SyncSessionAdapter
+from app.utils.creature_catalog import (
+    MAX_SCORED_NAMES, CreatureCatalog, CreatureIndex, creature_catalog, import_creature_catalog, upsert_creature_image
+)
+
+
+def write_catalog(tmp_path, entries, images=()):
+    """Write a JSON creature database and image files under tmp_path."""
+    db_path = tmp_path / "creature_database.json"
+    images_dir = tmp_path / "database_images"
+    images_dir.mkdir(exist_ok=True)
+    db_path.write_text(json.dumps(entries))
+    for filename in images:
+        (images_dir / filename).write_bytes(b"image")
+    return str(db_path), str(images_dir)
+
+
+@pytest.fixture
+def catalog_files(tmp_path, test_db_session):
+    """Import a temporary JSON catalog and images directory into creature_images."""
+    db_path, images_dir = write_catalog(
+        tmp_path,
+        {"Dragon": "/database_images/dragon.jpg", "orc": "/database_images/orc.jpg"},
+        images=["ancient_red_dragon.png", "skeleton.webp", "notes.txt"],
+    )
+    asyncio.run(import_creature_catalog(SyncSessionAdapter(test_db_session), db_path, images_dir))
+    creature_catalog.invalidate()
+    yield creature_catalog
+    creature_catalog.invalidate()
+
+
+@pytest.mark.unit
+class TestCreatureCatalog:
+    """Tests for the creature_images-backed catalog."""
+
+    def test_import_merges_sources(self, tmp_path, test_db_session):
+        """Test JSON entries and local images are imported with lowercase names."""
+        db_path, images_dir = write_catalog(
+            tmp_path,
+            {"Dragon": "/db/dragon.jpg", "skeleton": "/db/skeleton.jpg"},
+            images=["skeleton.png", "hill_giant.jpg", "readme.md"],
+        )
+        db = SyncSessionAdapter(test_db_session)
+        catalog = CreatureCatalog()
+
+        counts = asyncio.run(import_creature_catalog(db, db_path, images_dir))
+        asyncio.run(catalog.load(db))
+
+        assert counts == {"database": 2, "local": 2}
+        assert catalog.names == ["dragon", "hill giant", "skeleton"]
+        assert catalog.entries["dragon"] == "/db/dragon.jpg"
+        assert catalog.entries["skeleton"] == "/database_images/skeleton.png"
+        assert catalog.sources["skeleton"] == "local"
+        assert catalog.local_count == 2
+        assert catalog.database_count == 1
+
+    def test_import_is_idempotent(self, tmp_path, test_db_session):
+        """Test re-running the importer updates rows instead of duplicating them."""
+        db_path, images_dir = write_catalog(tmp_path, {"orc": "/db/orc.jpg"})
+        db = SyncSessionAdapter(test_db_session)
+
+        asyncio.run(import_creature_catalog(db, db_path, images_dir))
+        asyncio.run(import_creature_catalog(db, db_path, images_dir))
+
+        assert test_db_session.query(CreatureImageDB).count() == 1
+
+    def test_upsert_is_one_statement(self, test_db_engine, test_db_session):
+        """Test an upsert is a single INSERT ... ON CONFLICT, so concurrent adds of a name cannot race."""
+        db = SyncSessionAdapter(test_db_session)
+        asyncio.run(upsert_creature_image(db, "orc", "/db/orc.jpg"))
+        test_db_session.commit()
+        statements = []
+        event.listen(test_db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        row = asyncio.run(upsert_creature_image(db, "Orc ", "/db/orc-2.jpg"))
+        test_db_session.commit()
+
+        assert len(statements) == 1
+        assert "ON CONFLICT" in statements[0]
+        assert row.image_url == "/db/orc-2.jpg"
+        assert test_db_session.query(CreatureImageDB).count() == 1
+
+    def test_refresh_skips_unchanged_table(self, test_db_session):
+        """Test the catalog is not rebuilt when the table did not change."""
+        db = SyncSessionAdapter(test_db_session)
+        asyncio.run(upsert_creature_image(db, "orc", "/db/orc.jpg"))
+        test_db_session.commit()
+        catalog = CreatureCatalog(check_interval=0)
+        asyncio.run(catalog.load(db))
+
+        asyncio.run(catalog.refresh_if_stale(db))
+
+        assert catalog.revision == 1
+
+    def test_refresh_picks_up_table_changes(self, test_db_session):
+        """Test rows added by another writer trigger a rebuild."""
+        db = SyncSessionAdapter(test_db_session)
+        asyncio.run(upsert_creature_image(db, "orc", "/db/orc.jpg"))
+        test_db_session.commit()
+        catalog = CreatureCatalog(check_interval=0)
+        asyncio.run(catalog.load(db))
+
+        asyncio.run(upsert_creature_image(db, "Goblin", "/db/goblin.jpg"))
+        test_db_session.commit()
+        asyncio.run(catalog.refresh_if_stale(db))
+
+        assert catalog.revision == 2
+        assert catalog.entries["goblin"] == "/db/goblin.jpg"
+
+    def test_refresh_is_throttled(self, test_db_session):
+        """Test the table is checked at most once per check interval."""
+        db = SyncSessionAdapter(test_db_session)
+        catalog = CreatureCatalog(check_interval=60)
+        asyncio.run(catalog.load(db))
+
+        asyncio.run(upsert_creature_image(db, "orc", "/db/orc.jpg"))
+        test_db_session.commit()
+        asyncio.run(catalog.refresh_if_stale(db))
+        assert "orc" not in catalog.entries
+
+        catalog.invalidate()
+        asyncio.run(catalog.refresh_if_stale(db))
+        assert "orc" in catalog.entries
+
+    def test_etag_follows_contents(self, test_db_session):
+        """Test workers loading the same rows agree on the ETag, and a change moves it."""
+        db = SyncSessionAdapter(test_db_session)
+        asyncio.run(upsert_creature_image(db, "orc", "/db/orc.jpg"))
+        test_db_session.commit()
+        first, second = CreatureCatalog(), CreatureCatalog()
+        asyncio.run(first.load(db))
+        asyncio.run(second.load(db))
+        asyncio.run(second.load(db))
+
+        assert first.etag == second.etag
+        assert second.revision != first.revision
+
+        asyncio.run(upsert_creature_image(db, "orc", "/db/orc-2.jpg"))
+        test_db_session.commit()
+        asyncio.run(second.load(db))
+
+        assert first.etag != second.etag
+
+
+@pytest.mark.unit
+class TestCreatureIndex:
+    """Tests for fuzzy creature name matching."""
+
+    NAMES = sorted([
+        "adult red dragon", "ancient red dragon", "dragon", "goblin",
+        "goblin boss", "hobgoblin", "orc", "red cap", "skeleton",
+    ])
+
+    def test_exact_match_scores_highest(self):
+        """Test an exact name beats names that merely contain it."""
+        index = CreatureIndex(self.NAMES)
+
+        assert index.search("goblin") == [("goblin", 1.0)]
+
+    def test_best_match_wins_over_first_partial(self):
+        """Test the closest name is returned, not the first containing a word."""
+        index = CreatureIndex(self.NAMES)
+
+        name, _ = index.search("Ancient Red Dragon Wyrmling")[0]
+
+        assert name == "ancient red dragon"
+
+    def test_typo_tolerance(self):
+        """Test trigrams match misspelled names."""
+        index = CreatureIndex(self.NAMES)
+
+        assert index.search("skeletn")[0][0] == "skeleton"
+
+    def test_unrelated_name_has_no_match(self):
+        """Test names sharing nothing meaningful are not matched."""
+        index = CreatureIndex(self.NAMES)
+
+        assert index.search("beholder") == []
+
+    def test_top_k_is_ordered_and_deterministic(self):
+        """Test top-k candidates are sorted by score with stable tie-breaks."""
+        index = CreatureIndex(self.NAMES)
+
+        results = index.search("red dragon", limit=3)
+
+        assert [name for name, _ in results] == ["adult red dragon", "ancient red dragon", "dragon"]
+        assert results == CreatureIndex(list(reversed(self.NAMES))).search("red dragon", limit=3)
+
+    def test_common_trigrams_are_bounded(self):
+        """Test lookups score a bounded number of names and still find rare ones among common trigrams."""
+        names = [f"goblin {number}" for number in range(1000, 6000)] + ["goblin shaman"]
+        index = CreatureIndex(names)
+
+        results = index.search("goblin shamn", limit=len(names))
+
+        assert results[0][0] == "goblin shaman"
+        assert len(results) <= MAX_SCORED_NAMES
+
+
+class TestCreatureImageEndpoints:
+    """Tests for the creature image endpoints."""
+
+    def test_get_creature_image_exact_match(self, client, catalog_files):
+        """Test an exact name resolves from the catalog."""
+        response = client.get("/api/creature-images/get_creature_image", params={"name": "Skeleton"})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["image_url"] == "/database_images/skeleton.webp"
+        assert data["source"] == "local"
+        assert data["found_match"] is True
+
+    def test_get_creature_image_no_match(self, client, catalog_files):
+        """Test unknown names fall back to the default image."""
+        response = client.get("/api/creature-images/get_creature_image", params={"name": "Xyz"})
+
+        assert response.json()["found_match"] is False
+
+    def test_get_creature_image_fuzzy_match(self, client, catalog_files):
+        """Test a misspelled name resolves to its closest catalog entry."""
+        response = client.get("/api/creature-images/get_creature_image", params={"name": "Skeletn"})
+
+        data = response.json()
+        assert data["matched_name"] == "skeleton"
+        assert data["found_match"] is True
+
+    def test_get_creature_image_candidates(self, client, catalog_files):
+        """Test top-k candidates are returned when requested."""
+        response = client.get(
+            "/api/creature-images/get_creature_image",
+            params={"name": "Red Dragon", "candidates": 2},
+        )
+
+        candidates = response.json()["candidates"]
+        assert [c["name"] for c in candidates] == ["ancient red dragon", "dragon"]
+        assert candidates[0]["score"] >= candidates[1]["score"]
+
+    def test_get_creature_images_batch(self, client, catalog_files):
+        """Test a batch resolves every name in request order."""
+        response = client.post(
+            "/api/creature-images/get_creature_images",
+            json={"creatures": [
+                {"name": "Orc"},
+                {"name": "Skeleton"},
+                {"name": "Goblin Warlord", "user_image_url": "/uploads/gob.png"},
+                {"name": "Xyz"},
+            ]},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [r["name"] for r in results] == ["Orc", "Skeleton", "Goblin Warlord", "Xyz"]
+        assert [r["source"] for r in results] == ["database", "local", "user", "default"]
+        assert results[2]["image_url"] == "/uploads/gob.png"
+
+    def test_get_creature_images_batch_dedupes_names(self, client, catalog_files):
+        """Test repeated names are resolved once but returned for each entry."""
+        response = client.post(
+            "/api/creature-images/get_creature_images",
+            json={"creatures": [{"name": "Orc"}, {"name": "orc "}, {"name": "ORC"}]},
+        )
+
+        data = response.json()
+        assert data["total"] == 3
+        assert data["unique"] == 1
+        assert [r["name"] for r in data["results"]] == ["Orc", "orc ", "ORC"]
+        assert len({r["image_url"] for r in data["results"]}) == 1
+
+    def test_list_all_creatures(self, client, catalog_files):
+        """Test listing returns the merged catalog in name order."""
+        response = client.get("/api/creature-images/list_all_creatures")
+
+        data = response.json()
+        assert [c["name"] for c in data["creatures"]] == [
+            "ancient red dragon", "dragon", "orc", "skeleton"
+        ]
+        assert data["local_count"] == 2
+        assert data["database_count"] == 2
+
+    def test_list_all_creatures_not_modified(self, client, catalog_files):
+        """Test revalidating an unchanged catalog returns 304, and a changed one the new list."""
+        listed = client.get("/api/creature-images/list_all_creatures")
+        etag = listed.headers["ETag"]
+
+        unchanged = client.get("/api/creature-images/list_all_creatures", headers={"If-None-Match": etag})
+        client.delete("/api/creature-images/remove_creature/Orc")
+        changed = client.get("/api/creature-images/list_all_creatures", headers={"If-None-Match": etag})
+
+        assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+        assert unchanged.content == b""
+        assert unchanged.headers["ETag"] == etag
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["total"] == 3
+
+    def test_search_creatures(self, client, catalog_files):
+        """Test search matches substrings of catalog names."""
+        response = client.get("/api/creature-images/search_creatures", params={"query": "drag"})
+
+        assert [c["name"] for c in response.json()] == ["ancient red dragon", "dragon"]
+
+    def test_search_matches_tags(self, client, catalog_files, test_db_session):
+        """Test search also matches a creature's tags, but not across its name and tags."""
+        row = test_db_session.query(CreatureImageDB).filter_by(creature_name="orc").one()
+        row.tags = "Humanoid, Brute"
+        test_db_session.commit()
+        catalog_files.invalidate()
+
+        tagged = client.get("/api/creature-images/search_creatures", params={"query": "brute"})
+        spanning = client.get("/api/creature-images/search_creatures", params={"query": "orchum"})
+
+        assert [c["name"] for c in tagged.json()] == ["orc"]
+        assert spanning.json() == []
+
+    def test_search_is_served_from_catalog(self, client, catalog_files, sql_statements):
+        """Test search reads the in-memory trigram index instead of scanning creature_images with LIKE."""
+        client.get("/api/creature-images/search_creatures", params={"query": "drag"})
+        sql_statements.clear()
+
+        response = client.get("/api/creature-images/search_creatures", params={"query": "skel"})
+
+        assert [c["name"] for c in response.json()] == ["skeleton"]
+        # At most the catalog's freshness check, an aggregate over the table
+        assert all(s.lstrip().startswith("SELECT count(") for s in sql_statements)
+
+    @pytest.mark.parametrize("query", ["%", "_", "dr%n"])
+    def test_search_wildcards_are_literal(self, client, catalog_files, query):
+        """Test LIKE wildcards in the query match only themselves."""
+        response = client.get("/api/creature-images/search_creatures", params={"query": query})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+
+    @pytest.mark.parametrize("limit", [0, 101])
+    def test_search_limit_bounds(self, client, catalog_files, limit):
+        """Test search limits outside 1-100 are rejected."""
+        response = client.get("/api/creature-images/search_creatures", params={"query": "drag", "limit": limit})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_reload_catalog(self, client, catalog_files):
+        """Test the explicit reload endpoint bumps the catalog revision."""
+        revision = catalog_files.revision
+
+        response = client.post("/api/creature-images/reload_catalog")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["revision"] == revision + 1
+
+    def test_add_creature_is_visible_immediately(self, client, catalog_files):
+        """Test a creature added through the API resolves on the next request."""
+        response = client.post(
+            "/api/creature-images/add_creature",
+            data={"creature_name": "Beholder", "image_url": "/db/beholder.jpg"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = client.get("/api/creature-images/get_creature_image", params={"name": "beholder"})
+
+        assert response.json()["image_url"] == "/db/beholder.jpg"
+
+    def test_remove_creature(self, client, catalog_files):
+        """Test removing a creature deletes its row and drops it from the catalog."""
+        response = client.delete("/api/creature-images/remove_creature/Orc")
+        assert response.status_code == status.HTTP_200_OK
+
+        response = client.get("/api/creature-images/list_all_creatures")
+
+        assert "orc" not in [c["name"] for c in response.json()["creatures"]]
+
+    def test_remove_unknown_creature(self, client, catalog_files):
+        """Test removing a missing creature returns 404."""
+        response = client.delete("/api/creature-images/remove_creature/beholder")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
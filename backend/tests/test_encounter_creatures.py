@@ -355,3 +355,75 @@ class TestEncounterCreatureOperations:
         )
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestCreatureBatch:
+    """Test adding, updating and deleting many creatures in one request."""
+
+    def test_batch_create_update_delete(self, client, authenticated_headers, create_encounter):
+        """Test one batch applies every kind of operation and returns the new creature list."""
+        encounter = create_encounter(authenticated_headers, 3)
+        goblins = {c["name"]: c for c in encounter["creatures"]}
+
+        response = client.post(
+            f"/encounters/{encounter['id']}/creatures/batch",
+            json={
+                "create": [{"name": "Ogre", "initiative": 7, "creature_type": "enemy"}],
+                "update": [
+                    {"id": goblins["Goblin 0"]["id"], "initiative": 20},
+                    {"id": goblins["Goblin 1"]["id"], "name": "Goblin Boss", "creature_type": "ally"},
+                ],
+                "delete": [goblins["Goblin 2"]["id"]],
+            },
+            headers=authenticated_headers,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        creatures = [(c["name"], c["initiative"], c["creature_type"]) for c in response.json()]
+        assert creatures == [("Goblin 0", 20, "enemy"), ("Ogre", 7, "enemy"), ("Goblin Boss", 1, "ally")]
+        stored = client.get(f"/encounters/{encounter['id']}/creatures", headers=authenticated_headers).json()
+        assert [c["name"] for c in stored] == ["Goblin 0", "Ogre", "Goblin Boss"]
+
+    def test_batch_is_all_or_nothing(self, client, authenticated_headers, create_encounter):
+        """Test an unknown creature fails the whole batch without changing anything."""
+        encounter = create_encounter(authenticated_headers, 3)
+        other = create_encounter(authenticated_headers, 1)
+
+        response = client.post(
+            f"/encounters/{encounter['id']}/creatures/batch",
+            json={
+                "create": [{"name": "Ogre", "initiative": 7, "creature_type": "enemy"}],
+                "update": [{"id": encounter["creatures"][0]["id"], "initiative": 20}],
+                "delete": [other["creatures"][0]["id"]],
+            },
+            headers=authenticated_headers,
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        stored = client.get(f"/encounters/{encounter['id']}/creatures", headers=authenticated_headers).json()
+        assert [(c["name"], c["initiative"]) for c in stored] == [(c["name"], c["initiative"]) for c in encounter["creatures"]]
+        assert len(client.get(f"/encounters/{other['id']}", headers=authenticated_headers).json()["creatures"]) == 1
+
+    def test_batch_rejects_conflicting_operations(self, client, authenticated_headers, create_encounter):
+        """Test a creature cannot be updated and deleted in the same batch."""
+        encounter = create_encounter(authenticated_headers, 1)
+        creature_id = encounter["creatures"][0]["id"]
+
+        response = client.post(
+            f"/encounters/{encounter['id']}/creatures/batch",
+            json={"update": [{"id": creature_id, "initiative": 3}], "delete": [creature_id]},
+            headers=authenticated_headers,
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_batch_nonexistent_encounter(self, client, authenticated_headers):
+        """Test a batch for an encounter that doesn't exist."""
+        fake_id = "00000000-0000-0000-0000-000000000000"
+        response = client.post(
+            f"/encounters/{fake_id}/creatures/batch",
+            json={"create": [{"name": "Ogre", "initiative": 7, "creature_type": "enemy"}]},
+            headers=authenticated_headers,
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,165 @@
+"""Test encounter push events over WebSocket and SSE."""
+import asyncio
+import time
+
+import pytest
+from fastapi import status
+from starlette.websockets import WebSocketDisconnect
+
+from app.routers.encounter_events import sse_stream
+from app.utils.realtime import EncounterEvents, encounter_events, make_event
+
+
+def token_of(headers):
+    """Extract the bearer token from authorization headers."""
+    return headers["Authorization"].split(" ", 1)[1]
+
+
+def wait_for_unsubscribe(encounter_id, timeout=2.0):
+    """Wait for the server side of a closed connection to unsubscribe."""
+    deadline = time.monotonic() + timeout
+    while encounter_events.subscriber_count(encounter_id) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return encounter_events.subscriber_count(encounter_id)
+
+
+@pytest.fixture
+def encounter(client, authenticated_headers):
+    """An encounter with one creature."""
+    response = client.post(
+        "/encounters",
+        json={
+            "name": "Goblin Ambush",
+            "creatures": [{"name": "Goblin", "initiative": 12, "creature_type": "enemy"}],
+        },
+        headers=authenticated_headers,
+    )
+    return response.json()
+
+
+@pytest.mark.unit
+class TestEncounterEvents:
+    """Test the per-worker event fan-out."""
+
+    def test_publish_reaches_only_encounter_subscribers(self):
+        """Test events go to subscribers of the same encounter only."""
+        events = EncounterEvents()
+        mine = events.subscribe("a")
+        other = events.subscribe("b")
+
+        events.dispatch(make_event("encounter.updated", "a", {"round_number": 2}))
+
+        assert mine.get_nowait() == make_event("encounter.updated", "a", {"round_number": 2})
+        assert other.empty()
+
+    def test_unsubscribe_removes_encounter(self):
+        """Test the last unsubscribe forgets the encounter."""
+        events = EncounterEvents()
+        queue = events.subscribe("a")
+
+        events.unsubscribe("a", queue)
+
+        assert events.subscriber_count("a") == 0
+        assert events._subscribers == {}
+
+    def test_slow_subscriber_gets_resync(self):
+        """Test a full queue is replaced by a single resync event."""
+        events = EncounterEvents(queue_size=2)
+        queue = events.subscribe("a")
+
+        for round_number in range(3):
+            events.dispatch(make_event("encounter.updated", "a", {"round_number": round_number}))
+
+        assert queue.qsize() == 1
+        assert queue.get_nowait()["type"] == "resync"
+
+
+class TestEncounterWebSocket:
+    """Test the encounter WebSocket push channel."""
+
+    def test_websocket_sends_snapshot_then_deltas(self, client, authenticated_headers, encounter):
+        """Test a subscriber sees the snapshot and then each mutation."""
+        url = f"/encounters/{encounter['id']}/ws?token={token_of(authenticated_headers)}"
+
+        with client.websocket_connect(url) as websocket:
+            snapshot = websocket.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["data"]["creatures"][0]["name"] == "Goblin"
+
+            client.patch(
+                f"/encounters/{encounter['id']}/round",
+                json={"round_number": 3},
+                headers=authenticated_headers,
+            )
+            assert websocket.receive_json() == {
+                "type": "encounter.updated",
+                "encounter_id": encounter["id"],
+                "data": {"round_number": 3},
+            }
+
+            response = client.post(
+                f"/encounters/{encounter['id']}/creatures",
+                json={"name": "Orc", "initiative": 15, "creature_type": "enemy"},
+                headers=authenticated_headers,
+            )
+            added = websocket.receive_json()
+            assert added["type"] == "creature.added"
+            assert added["data"]["id"] == response.json()["id"]
+
+            client.delete(f"/creatures/{added['data']['id']}", headers=authenticated_headers)
+            assert websocket.receive_json()["data"] == {"id": added["data"]["id"]}
+
+        assert wait_for_unsubscribe(encounter["id"]) == 0
+
+    def test_websocket_rejects_bad_token(self, client, encounter):
+        """Test connections without a valid token are refused."""
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(f"/encounters/{encounter['id']}/ws?token=invalid"):
+                pass
+
+        assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+        assert encounter_events.subscriber_count(encounter["id"]) == 0
+
+    def test_websocket_rejects_other_users_encounter(self, client, authenticated_headers, encounter):
+        """Test a user cannot subscribe to someone else's encounter."""
+        response = client.post("/auth/register", json={
+            "email": "other@example.com", "password": "password123", "confirm_password": "password123"
+        })
+        token = response.json()["access_token"]
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect(f"/encounters/{encounter['id']}/ws?token={token}"):
+                pass
+
+
+class TestEncounterEventStream:
+    """Test the server-sent events fallback."""
+
+    def test_sse_stream_frames(self):
+        """Test the stream emits the snapshot, events and keep-alives as SSE frames."""
+        async def read_frames():
+            queue = encounter_events.subscribe("a")
+            stream = sse_stream("a", make_event("snapshot", "a"), queue, keepalive=0.01)
+            frames = [await stream.__anext__()]
+            await encounter_events.publish("a", "creature.removed", {"id": "c1"})
+            frames.append(await stream.__anext__())
+            frames.append(await stream.__anext__())
+            await stream.aclose()
+            return frames
+
+        frames = asyncio.run(read_frames())
+
+        assert frames[0].startswith("event: snapshot\ndata: ")
+        assert frames[1] == (
+            'event: creature.removed\n'
+            'data: {"type": "creature.removed", "encounter_id": "a", "data": {"id": "c1"}}\n\n'
+        )
+        assert frames[2] == ": keepalive\n\n"
+        assert encounter_events.subscriber_count("a") == 0
+
+    def test_sse_requires_valid_token(self, client, encounter):
+        """Test the event stream rejects an invalid token."""
+        response = client.get(f"/encounters/{encounter['id']}/events", params={"token": "invalid"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert encounter_events.subscriber_count(encounter["id"]) == 0
@@ -346,3 +346,143 @@ class TestEncounterAdvancedOperations:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["name"] == "Updated Name"
+
+
+class TestEncounterTurns:
+    """Test advancing and rewinding the persisted turn."""
+
+    def test_advance_walks_initiative_order(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test advancing steps through creatures and starts a new round after the last."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[5, 18, 11]))
+        order = [c["id"] for c in encounter["creatures"]]
+        assert encounter["current_turn"] == 0
+
+        states = [
+            client.post(f"/encounters/{encounter['id']}/advance", headers=authenticated_headers).json()
+            for _ in range(4)
+        ]
+
+        assert [(s["round_number"], s["current_turn"]) for s in states] == [(1, 1), (1, 2), (2, 0), (2, 1)]
+        assert [s["current_creature_id"] for s in states] == [order[1], order[2], order[0], order[1]]
+
+    def test_rewind_returns_to_previous_round(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test rewinding past the first creature goes back a round, but never below 1."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[5, 18, 11]))
+        url = f"/encounters/{encounter['id']}"
+        for _ in range(3):
+            client.post(f"{url}/advance", headers=authenticated_headers)
+
+        states = [
+            client.post(f"{url}/rewind", headers=authenticated_headers).json()
+            for _ in range(4)
+        ]
+
+        assert [(s["round_number"], s["current_turn"]) for s in states] == [(1, 2), (1, 1), (1, 0), (1, 2)]
+
+    def test_turn_is_persisted(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test the turn survives a reload of the encounter."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[5, 18]))
+        client.post(f"/encounters/{encounter['id']}/advance", headers=authenticated_headers)
+
+        response = client.get(f"/encounters/{encounter['id']}", headers=authenticated_headers)
+
+        assert response.json()["current_turn"] == 1
+
+    def test_advance_without_creatures(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test advancing an empty encounter leaves it unchanged."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[]))
+
+        response = client.post(f"/encounters/{encounter['id']}/advance", headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert (data["round_number"], data["current_turn"], data["current_creature_id"]) == (1, 0, None)
+
+    def test_advance_nonexistent_encounter(self, client, authenticated_headers):
+        """Test advancing an encounter that doesn't exist."""
+        fake_id = "00000000-0000-0000-0000-000000000000"
+        for action in ("advance", "rewind"):
+            response = client.post(f"/encounters/{fake_id}/{action}", headers=authenticated_headers)
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def current_creature(self, client, headers, encounter_id):
+        """The id of the creature whose turn it is, from a fresh read of the encounter."""
+        encounter = client.get(f"/encounters/{encounter_id}", headers=headers).json()
+        return encounter["creatures"][encounter["current_turn"]]["id"]
+
+    def test_adding_creature_before_current_keeps_turn(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test a creature added ahead in initiative order does not take the turn."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        current = client.post(f"{url}/advance", headers=authenticated_headers).json()["current_creature_id"]
+
+        client.post(
+            f"{url}/creatures", json={"name": "Fast", "initiative": 20, "creature_type": "enemy"},
+            headers=authenticated_headers
+        )
+        client.post(
+            "/creatures", json={"name": "Faster", "initiative": 25, "creature_type": "enemy", "encounter_id": encounter["id"]},
+            headers=authenticated_headers
+        )
+
+        assert self.current_creature(client, authenticated_headers, encounter["id"]) == current
+        state = client.post(f"{url}/advance", headers=authenticated_headers).json()
+        assert state["current_creature_id"] == encounter["creatures"][2]["id"]
+
+    @pytest.mark.parametrize("path", ["/encounters/{encounter}/creatures/{creature}", "/creatures/{creature}"])
+    def test_deleting_creature_before_current_keeps_turn(self, client, authenticated_headers, path, create_encounter, creature_payloads):
+        """Test removing a creature ahead in initiative order leaves the turn with the same creature."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/advance", headers=authenticated_headers)
+        current = client.post(f"{url}/advance", headers=authenticated_headers).json()["current_creature_id"]
+
+        response = client.delete(
+            path.format(encounter=encounter["id"], creature=encounter["creatures"][0]["id"]),
+            headers=authenticated_headers
+        )
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert self.current_creature(client, authenticated_headers, encounter["id"]) == current
+
+    @pytest.mark.parametrize("path", ["/encounters/{encounter}/creatures/{creature}", "/creatures/{creature}"])
+    def test_deleting_current_creature_passes_turn(self, client, authenticated_headers, path, create_encounter, creature_payloads):
+        """Test removing the creature whose turn it is hands the turn to the next one."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        current = client.post(f"{url}/advance", headers=authenticated_headers).json()["current_creature_id"]
+
+        client.delete(path.format(encounter=encounter["id"], creature=current), headers=authenticated_headers)
+
+        assert self.current_creature(client, authenticated_headers, encounter["id"]) == encounter["creatures"][2]["id"]
+        state = client.post(f"{url}/advance", headers=authenticated_headers).json()
+        assert (state["round_number"], state["current_creature_id"]) == (2, encounter["creatures"][0]["id"])
+
+    def test_deleting_last_creature_wraps_turn(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test removing the current creature at the end of the order hands the turn to the first."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/rewind", headers=authenticated_headers)
+
+        client.post(
+            f"{url}/creatures/batch",
+            json={"create": [], "update": [], "delete": [encounter["creatures"][2]["id"], encounter["creatures"][0]["id"]]},
+            headers=authenticated_headers
+        )
+
+        assert self.current_creature(client, authenticated_headers, encounter["id"]) == encounter["creatures"][1]["id"]
+
+    @pytest.mark.parametrize("path", ["/encounters/{encounter}/creatures/{creature}", "/creatures/{creature}"])
+    def test_initiative_change_keeps_turn(self, client, authenticated_headers, path, create_encounter, creature_payloads):
+        """Test reordering creatures leaves the turn with the creature that had it."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        current = client.post(f"{url}/advance", headers=authenticated_headers).json()["current_creature_id"]
+
+        client.put(
+            path.format(encounter=encounter["id"], creature=current), json={"initiative": 30},
+            headers=authenticated_headers
+        )
+
+        encounter = client.get(url, headers=authenticated_headers).json()
+        assert (encounter["current_turn"], encounter["creatures"][0]["id"]) == (0, current)
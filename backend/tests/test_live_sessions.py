@@ -0,0 +1,373 @@
+"""Tests for write-behind live combat sessions."""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+from fastapi import status
+from sqlalchemy import select
+
+from app.models.models import Creature, Encounter
+from app.utils.live_sessions import FLUSH_LEASE_SECONDS, LIVE_SESSION_TOPIC, LiveState, live_sessions
+from app.utils.pubsub import pubsub
+from main import app, flush_live_sessions
+
+
+def stored_turn(session, encounter_id):
+    """(round_number, current_turn) as stored in the database."""
+    session.expire_all()
+    encounter = session.get(Encounter, uuid.UUID(encounter_id))
+    return encounter.round_number, encounter.current_turn
+
+
+def stored_initiative(session, creature_id):
+    """A creature's initiative as stored in the database."""
+    return session.execute(select(Creature.initiative).where(Creature.id == uuid.UUID(creature_id))).scalar_one()
+
+
+def flush(sessionmaker, now=None):
+    """Run one flush against the test database."""
+    async def run():
+        async with sessionmaker() as db:
+            return await live_sessions.flush(db, now=now)
+    return asyncio.run(run())
+
+
+def run_and_kill(code):
+    """Run live session code in a separate worker process that is then killed with SIGKILL."""
+    script = (
+        "import os, signal, time, uuid\n"
+        "from app.utils.live_sessions import LiveSessions\n"
+        "sessions = LiveSessions()\n"
+        f"sessions.open({live_sessions.store.path!r})\n"
+        f"{code}\n"
+        "os.kill(os.getpid(), signal.SIGKILL)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], env=dict(os.environ))
+    assert result.returncode == -9
+
+
+class TestLiveSessionApi:
+    """Test live session mode through the encounter endpoints."""
+
+    def test_turn_changes_are_written_behind(self, client, authenticated_headers, test_db_session, create_encounter, creature_payloads):
+        """Test live turn moves are served from the session and reach the database on end."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+
+        started = client.post(f"{url}/live", headers=authenticated_headers)
+        for _ in range(4):
+            client.post(f"{url}/advance", headers=authenticated_headers)
+
+        assert started.json()["live"] is True
+        assert stored_turn(test_db_session, encounter["id"]) == (1, 0)
+        live = client.get(url, headers=authenticated_headers).json()
+        assert (live["round_number"], live["current_turn"], live["live"]) == (2, 1, True)
+
+        ended = client.delete(f"{url}/live", headers=authenticated_headers)
+
+        assert ended.status_code == status.HTTP_200_OK
+        assert (ended.json()["round_number"], ended.json()["current_turn"], ended.json()["live"]) == (2, 1, False)
+        assert stored_turn(test_db_session, encounter["id"]) == (2, 1)
+
+    def test_live_moves_match_database_moves(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test advance and rewind give the same results with and without a live session."""
+        plain = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        live = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        client.post(f"/encounters/{live['id']}/live", headers=authenticated_headers)
+
+        results = {}
+        for encounter in (plain, live):
+            states = []
+            for action in ["advance"] * 4 + ["rewind"] * 6:
+                state = client.post(f"/encounters/{encounter['id']}/{action}", headers=authenticated_headers).json()
+                order = [c["id"] for c in encounter["creatures"]]
+                states.append((state["round_number"], state["current_turn"], order.index(state["current_creature_id"])))
+            results[encounter["id"]] = states
+
+        assert results[plain["id"]] == results[live["id"]]
+
+    def test_live_moves_do_not_write(self, client, authenticated_headers, sql_statements, create_encounter, creature_payloads):
+        """Test live turn and round changes issue no UPDATE statements."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+
+        sql_statements.clear()
+        client.post(f"{url}/advance", headers=authenticated_headers)
+        client.post(f"{url}/rewind", headers=authenticated_headers)
+        client.patch(f"{url}/round", json={"round_number": 3}, headers=authenticated_headers)
+
+        assert not [s for s in sql_statements if s.startswith("UPDATE")]
+
+    def test_initiative_edits_are_written_behind(self, client, authenticated_headers, test_db_session, test_async_sessionmaker, create_encounter, creature_payloads):
+        """Test initiative edits show up in reads at once and in the database after a flush."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        last = encounter["creatures"][-1]
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+
+        response = client.put(f"{url}/creatures/{last['id']}", json={"initiative": 25}, headers=authenticated_headers)
+
+        assert response.json()["initiative"] == 25
+        assert client.get(url, headers=authenticated_headers).json()["creatures"][0]["id"] == last["id"]
+        assert stored_initiative(test_db_session, last["id"]) == 5
+
+        assert flush(test_async_sessionmaker) == 1
+        assert stored_initiative(test_db_session, last["id"]) == 25
+
+    def test_creatures_added_while_live_take_turns(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test creatures added and removed during a live session join and leave the turn order."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18]))
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+
+        added = client.post(
+            f"{url}/creatures",
+            json={"name": "Late Goblin", "initiative": 3, "creature_type": "enemy"},
+            headers=authenticated_headers,
+        ).json()
+        state = client.post(f"{url}/advance", headers=authenticated_headers).json()
+
+        assert (state["round_number"], state["current_creature_id"]) == (1, added["id"])
+
+        client.delete(f"{url}/creatures/{added['id']}", headers=authenticated_headers)
+        state = client.post(f"{url}/advance", headers=authenticated_headers).json()
+
+        assert (state["round_number"], state["current_turn"]) == (2, 0)
+
+    def test_turn_stays_with_creature_while_live(self, client, authenticated_headers, test_db_session, test_async_sessionmaker, create_encounter, creature_payloads):
+        """Test live additions, deletions and reorders keep the turn with its creature, and the flush stores it."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        first, middle, last = encounter["creatures"]
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+        client.post(f"{url}/advance", headers=authenticated_headers)
+
+        client.post(
+            f"{url}/creatures", json={"name": "Fast", "initiative": 20, "creature_type": "enemy"},
+            headers=authenticated_headers
+        )
+        client.delete(f"{url}/creatures/{first['id']}", headers=authenticated_headers)
+        client.put(f"{url}/creatures/{middle['id']}", json={"initiative": 30}, headers=authenticated_headers)
+        live = client.get(url, headers=authenticated_headers).json()
+
+        assert live["creatures"][live["current_turn"]]["id"] == middle["id"]
+
+        client.delete(f"{url}/creatures/{middle['id']}", headers=authenticated_headers)
+        live = client.get(url, headers=authenticated_headers).json()
+        flush(test_async_sessionmaker)
+
+        # The turn passes to the creature that followed: "Fast" at 20, now first
+        assert live["current_turn"] == 0
+        assert live["creatures"][0]["name"] == "Fast"
+        stored = test_db_session.get(Encounter, uuid.UUID(encounter["id"]))
+        assert str(stored.current_creature_id) == live["creatures"][0]["id"]
+
+    def test_creature_list_shows_live_initiatives(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test GET /creatures shows live initiatives, paged by the flushed ones."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        first, middle, last = encounter["creatures"]
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+        client.put(f"{url}/creatures/{last['id']}", json={"initiative": 25}, headers=authenticated_headers)
+
+        listed = client.get("/creatures", headers=authenticated_headers).json()
+        assert [(c["id"], c["initiative"]) for c in listed] == [(first["id"], 18), (middle["id"], 11), (last["id"], 25)]
+        page = client.get("/creatures", params={"limit": 2, "fields": "initiative"}, headers=authenticated_headers)
+        assert page.json() == [{"initiative": 18}, {"initiative": 11}]
+        rest = client.get(
+            "/creatures", params={"cursor": page.headers["X-Next-Cursor"], "fields": "initiative"}, headers=authenticated_headers
+        )
+        assert rest.json() == [{"initiative": 25}]
+
+    def test_creature_endpoints_reach_live_session(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test creatures added, edited and deleted through /creatures are reflected in the live session."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        first, middle, last = encounter["creatures"]
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+
+        added = client.post(
+            "/creatures",
+            json={"encounter_id": encounter["id"], "name": "Ogre", "initiative": 8, "creature_type": "enemy"},
+            headers=authenticated_headers,
+        ).json()
+        client.delete(f"/creatures/{middle['id']}", headers=authenticated_headers)
+        edited = client.put(f"/creatures/{first['id']}", json={"initiative": 1}, headers=authenticated_headers)
+
+        assert edited.json()["initiative"] == 1
+        assert client.get(f"/creatures/{first['id']}", headers=authenticated_headers).json()["initiative"] == 1
+        live = client.get(url, headers=authenticated_headers).json()
+        assert [c["id"] for c in live["creatures"]] == [added["id"], last["id"], first["id"]]
+        turns = [client.post(f"{url}/advance", headers=authenticated_headers).json()["current_creature_id"]
+                 for _ in range(3)]
+        assert sorted(turns) == sorted([added["id"], last["id"], first["id"]])
+
+    def test_batch_changes_reach_live_session(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test creatures changed through the batch endpoint are reflected in the live turn order."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        first, last = encounter["creatures"][0], encounter["creatures"][-1]
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+
+        response = client.post(
+            f"{url}/creatures/batch",
+            json={
+                "create": [{"name": "Ogre", "initiative": 30, "creature_type": "enemy"}],
+                "update": [{"id": last["id"], "initiative": 20}],
+                "delete": [first["id"]],
+            },
+            headers=authenticated_headers,
+        )
+
+        assert [c["initiative"] for c in response.json()] == [30, 20, 11]
+        order = [c["id"] for c in response.json()]
+        state = client.post(f"{url}/advance", headers=authenticated_headers).json()
+        assert state["current_creature_id"] == order[1]
+
+    def test_worker_flush_uses_app_sessions(self, client, authenticated_headers, test_db_session, create_encounter, creature_payloads):
+        """Test the worker's flush writes through the app's session factory, which tests point at their database."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+        client.post(f"{url}/advance", headers=authenticated_headers)
+
+        assert asyncio.run(flush_live_sessions(app.state.db_sessions)) == 1
+        assert stored_turn(test_db_session, encounter["id"]) == (1, 1)
+
+    def test_deleting_encounter_ends_session(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test a deleted encounter leaves no live session to flush."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+        client.post(f"{url}/advance", headers=authenticated_headers)
+
+        client.delete(url, headers=authenticated_headers)
+
+        assert live_sessions.store.get(encounter["id"]) is None
+
+    def test_other_users_cannot_see_session(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test a live session is only used for its owner."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        client.post(f"/encounters/{encounter['id']}/live", headers=authenticated_headers)
+
+        assert asyncio.run(live_sessions.get(uuid.UUID(encounter["id"]), uuid.uuid4())) is None
+
+    def test_store_is_only_read_for_live_encounters(self, client, authenticated_headers, monkeypatch, create_encounter, creature_payloads):
+        """Test requests for encounters that are not live never read the store."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.get(url, headers=authenticated_headers)
+
+        def no_store_reads(*args):
+            raise AssertionError("store read for an encounter that is not live")
+        monkeypatch.setattr(live_sessions.store, "get", no_store_reads)
+        monkeypatch.setattr(live_sessions.store, "modify", no_store_reads)
+
+        assert client.get(url, headers=authenticated_headers).json()["live"] is False
+        assert client.post(f"{url}/advance", headers=authenticated_headers).status_code == status.HTTP_200_OK
+        response = client.put(
+            f"{url}/creatures/{encounter['creatures'][0]['id']}", json={"initiative": 2}, headers=authenticated_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_sessions_started_by_other_workers(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test a session another worker starts is used once its notification arrives."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.get(url, headers=authenticated_headers)
+
+        state = LiveState(round_number=4, current_creature_id=None, creatures=[])
+        live_sessions.store.create(encounter["id"], encounter["user_id"], state)
+        assert client.get(url, headers=authenticated_headers).json()["live"] is False
+
+        pubsub._receive(json.dumps({
+            "origin": "other-worker", "topic": LIVE_SESSION_TOPIC,
+            "message": {"encounter_id": encounter["id"], "live": True}
+        }))
+
+        live = client.get(url, headers=authenticated_headers).json()
+        assert (live["live"], live["round_number"]) == (True, 4)
+
+    def test_live_nonexistent_encounter(self, client, authenticated_headers):
+        """Test starting a live session for an encounter that doesn't exist."""
+        fake_id = "00000000-0000-0000-0000-000000000000"
+        response = client.post(f"/encounters/{fake_id}/live", headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.integration
+class TestCrashRecovery:
+    """Test the durability guarantees when a worker dies."""
+
+    def test_killed_worker_loses_nothing(self, client, authenticated_headers, test_db_session, test_async_sessionmaker, create_encounter, creature_payloads):
+        """Test changes made by a worker killed before flushing are flushed by the next one."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        last = encounter["creatures"][-1]
+        client.post(f"/encounters/{encounter['id']}/live", headers=authenticated_headers)
+
+        run_and_kill(
+            f"encounter_id = {encounter['id']!r}\n"
+            "sessions.store.modify(encounter_id, lambda state: state.move(1))\n"
+            "sessions.store.modify(encounter_id, lambda state: state.move(1))\n"
+            f"sessions.store.modify(encounter_id, lambda state: state.set_initiative(uuid.UUID({last['id']!r}), 25))"
+        )
+
+        assert stored_turn(test_db_session, encounter["id"]) == (1, 0)
+        assert flush(test_async_sessionmaker) == 1
+        # The last creature has the turn, and its new initiative put it first
+        assert stored_turn(test_db_session, encounter["id"]) == (1, 0)
+        assert test_db_session.get(Encounter, uuid.UUID(encounter["id"])).current_creature_id == uuid.UUID(last["id"])
+        assert stored_initiative(test_db_session, last["id"]) == 25
+
+    def test_worker_killed_mid_flush(self, client, authenticated_headers, test_db_session, test_async_sessionmaker, create_encounter, creature_payloads):
+        """Test a session leased by a worker that died while flushing is taken over after the lease."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        client.post(f"/encounters/{encounter['id']}/live", headers=authenticated_headers)
+        client.post(f"/encounters/{encounter['id']}/advance", headers=authenticated_headers)
+
+        run_and_kill("assert len(sessions.store.claim(time.time())) == 1")
+
+        assert flush(test_async_sessionmaker) == 0
+        assert flush(test_async_sessionmaker, now=time.time() + FLUSH_LEASE_SECONDS + 1) == 1
+        assert stored_turn(test_db_session, encounter["id"]) == (1, 1)
+
+    def test_lost_store_keeps_last_flush(self, client, authenticated_headers, test_db_session, test_async_sessionmaker, create_encounter, creature_payloads):
+        """Test losing the store file loses only the changes since the last flush."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+        client.post(f"{url}/advance", headers=authenticated_headers)
+        flush(test_async_sessionmaker)
+        client.post(f"{url}/advance", headers=authenticated_headers)
+
+        path = live_sessions.store.path
+        live_sessions.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        live_sessions.open(path)
+
+        response = client.get(url, headers=authenticated_headers).json()
+        assert (response["current_turn"], response["live"]) == (1, False)
+        assert stored_turn(test_db_session, encounter["id"]) == (1, 1)
+
+    def test_flush_skips_deleted_rows(self, client, authenticated_headers, test_db_session, test_async_sessionmaker, create_encounter, creature_payloads):
+        """Test a flush still succeeds when a creature was deleted behind the session."""
+        encounter = create_encounter(authenticated_headers, creature_payloads(initiatives=[18, 11, 5]))
+        first, last = encounter["creatures"][0], encounter["creatures"][-1]
+        url = f"/encounters/{encounter['id']}"
+        client.post(f"{url}/live", headers=authenticated_headers)
+        for creature in (first, last):
+            client.put(f"{url}/creatures/{creature['id']}", json={"initiative": 1}, headers=authenticated_headers)
+        test_db_session.query(Creature).filter(Creature.id == uuid.UUID(first["id"])).delete()
+        test_db_session.commit()
+
+        assert flush(test_async_sessionmaker) == 1
+        assert stored_initiative(test_db_session, last["id"]) == 1
@@ -0,0 +1,126 @@
+"""Tests for keyset pagination and field selection on list endpoints."""
+import pytest
+from fastapi import status
+
+from app.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+
+
+def all_pages(client, headers, path, limit, **params):
+    """Follow the cursors of a list endpoint; returns the pages."""
+    pages, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=query, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+class TestKeysetPagination:
+    """Test list endpoints return stable pages in list order."""
+
+    @pytest.mark.parametrize("path", ["/encounters", "/presets"])
+    def test_pages_cover_list(self, client, authenticated_headers, path):
+        """Test following cursors returns every item once, in list order."""
+        for i in range(23):
+            client.post(path, json={"name": f"Item {i}"}, headers=authenticated_headers)
+        full = client.get(path, headers=authenticated_headers).json()
+
+        pages = all_pages(client, authenticated_headers, path, 10)
+
+        assert [len(page) for page in pages] == [10, 10, 3]
+        assert [item for page in pages for item in page] == full
+        created = [item["created_at"] for item in full]
+        assert created == sorted(created, reverse=True)
+
+    def test_creatures_ordered_by_initiative(self, client, authenticated_headers, create_encounter, creature_payloads):
+        """Test creature pages run across encounters by initiative with ties kept apart."""
+        for i in range(4):
+            creatures = creature_payloads(initiatives=[0, 1, 2, 3, 4, 0])
+            create_encounter(authenticated_headers, creatures, name=f"Encounter {i}")
+
+        pages = all_pages(client, authenticated_headers, "/creatures", 7)
+        creatures = [c for page in pages for c in page]
+
+        assert [len(page) for page in pages] == [7, 7, 7, 3]
+        assert len({c["id"] for c in creatures}) == 24
+        initiatives = [c["initiative"] for c in creatures]
+        assert initiatives == sorted(initiatives, reverse=True)
+
+    def test_cursor_survives_deleted_row(self, client, authenticated_headers, create_encounter):
+        """Test the next page is right even if the last row of the previous one was deleted."""
+        for i in range(5):
+            create_encounter(authenticated_headers, name=f"Encounter {i}")
+        full = client.get("/encounters", headers=authenticated_headers).json()
+        first = client.get("/encounters", params={"limit": 2}, headers=authenticated_headers)
+        client.delete(f"/encounters/{first.json()[-1]['id']}", headers=authenticated_headers)
+
+        second = client.get(
+            "/encounters",
+            params={"limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]},
+            headers=authenticated_headers,
+        )
+
+        assert second.json() == full[2:4]
+
+    def test_unpaginated_list_has_no_cursor(self, client, authenticated_headers, create_encounter):
+        """Test omitting limit returns the whole list as before."""
+        for i in range(3):
+            create_encounter(authenticated_headers, name=f"Encounter {i}")
+
+        response = client.get("/encounters", headers=authenticated_headers)
+
+        assert len(response.json()) == 3
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    @pytest.mark.parametrize("params", [
+        {"limit": 5, "cursor": "not-a-cursor"},
+        {"limit": 5, "cursor": "WyJ4Il0"},  # a valid encoding of the wrong keys
+    ])
+    def test_invalid_cursor(self, client, authenticated_headers, params):
+        """Test a cursor that was not issued by the list is rejected."""
+        response = client.get("/encounters", params=params, headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_page_size_limit(self, client, authenticated_headers):
+        """Test pages larger than the maximum are rejected."""
+        response = client.get("/creatures", params={"limit": MAX_PAGE_SIZE + 1}, headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestFieldSelection:
+    """Test the fields parameter limits both the response and the query."""
+
+    def test_only_requested_fields(self, client, authenticated_headers, sql_statements, create_encounter):
+        """Test only the requested columns, plus the ordering keys, are selected."""
+        for i in range(2):
+            create_encounter(authenticated_headers, 2, name=f"Encounter {i}")
+
+        sql_statements.clear()
+        response = client.get("/creatures", params={"fields": "id,name"}, headers=authenticated_headers)
+
+        assert all(set(c) == {"id", "name"} for c in response.json())
+        select_clause = sql_statements[-1].split("FROM")[0]
+        assert "creatures.image_url" not in select_clause
+        assert "creatures.created_at" not in select_clause
+
+    def test_fields_with_pages(self, client, authenticated_headers, create_encounter):
+        """Test cursors still work when the ordering keys are not among the fields."""
+        for i in range(5):
+            create_encounter(authenticated_headers, name=f"Encounter {i}")
+        full = client.get("/encounters", headers=authenticated_headers).json()
+
+        pages = all_pages(client, authenticated_headers, "/encounters", 2, fields="name")
+
+        assert [e for page in pages for e in page] == [{"name": e["name"]} for e in full]
+
+    def test_unknown_field(self, client, authenticated_headers):
+        """Test asking for a field the list does not have."""
+        response = client.get("/presets", params={"fields": "id,password"}, headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in response.json()["detail"]
@@ -1,4 +1,6 @@
 """Test preset endpoints."""
+import uuid
+
 import pytest
 from fastapi import status
 
@@ -194,8 +196,9 @@ class TestPresetEndpoints:
         data = response.json()
         assert data["name"] == "Updated Battle"
         assert len(data["creatures"]) == 2
-        assert data["creatures"][0]["name"] == "Orc"
-        assert data["creatures"][1]["name"] == "Knight"
+        # Creatures are returned in initiative order
+        assert data["creatures"][0]["name"] == "Knight"
+        assert data["creatures"][1]["name"] == "Orc"
         
     def test_update_nonexistent_preset(self, client, authenticated_headers):
         """Test updating a preset that doesn't exist."""
@@ -211,3 +214,166 @@ class TestPresetEndpoints:
         )
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestPresetInstantiate:
+    """Test creating encounters from presets on the server."""
+    
+    @pytest.fixture
+    def preset(self, create_preset, authenticated_headers):
+        """A preset with two creatures."""
+        return create_preset(
+            authenticated_headers,
+            [
+                {"name": "Goblin", "initiative": 12, "creature_type": "enemy", "image_url": "/uploads/goblin.png"},
+                {"name": "Knight", "initiative": 15, "creature_type": "ally"},
+            ],
+            name="Goblin Ambush",
+            background_image="/uploads/forest.png",
+        )
+    
+    def test_instantiate_copies_preset(self, client, authenticated_headers, preset):
+        """Test the new encounter gets the preset's name, background and creatures."""
+        response = client.post(f"/presets/{preset['id']}/instantiate", headers=authenticated_headers)
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert (data["name"], data["background_image"], data["round_number"]) == ("Goblin Ambush", "/uploads/forest.png", 1)
+        assert [(c["name"], c["initiative"], c["creature_type"], c["image_url"]) for c in data["creatures"]] == [
+            ("Knight", 15, "ally", None),
+            ("Goblin", 12, "enemy", "/uploads/goblin.png"),
+        ]
+        assert len({c["id"] for c in data["creatures"]}) == 2
+        assert all(uuid.UUID(c["id"]).version == 4 for c in data["creatures"])
+        stored = client.get(f"/encounters/{data['id']}", headers=authenticated_headers).json()
+        assert stored["creatures"] == data["creatures"]
+    
+    def test_instantiate_with_overrides_and_reroll(self, client, authenticated_headers, preset):
+        """Test the name can be overridden and initiative re-rolled with a d20."""
+        response = client.post(
+            f"/presets/{preset['id']}/instantiate",
+            json={"name": "Ambush at Dawn", "reroll_initiative": True},
+            headers=authenticated_headers,
+        )
+        
+        data = response.json()
+        assert data["name"] == "Ambush at Dawn"
+        assert all(1 <= c["initiative"] <= 20 for c in data["creatures"])
+        initiatives = [c["initiative"] for c in data["creatures"]]
+        assert initiatives == sorted(initiatives, reverse=True)
+    
+    def test_instantiate_nonexistent_preset(self, client, authenticated_headers):
+        """Test instantiating a preset that doesn't exist."""
+        fake_id = "00000000-0000-0000-0000-000000000000"
+        response = client.post(f"/presets/{fake_id}/instantiate", headers=authenticated_headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert client.get("/encounters", headers=authenticated_headers).json() == []
+
+
+class TestPresetCreatureDiff:
+    """Test preset updates keep creature ids and write only what changed."""
+    
+    @pytest.fixture
+    def preset(self, create_preset, authenticated_headers):
+        """A preset with three creatures."""
+        return create_preset(
+            authenticated_headers,
+            [
+                {"name": "Bandit", "initiative": 14, "creature_type": "enemy"},
+                {"name": "Captain", "initiative": 16, "creature_type": "enemy"},
+                {"name": "Guide", "initiative": 9, "creature_type": "ally"},
+            ],
+            name="Bandit Camp",
+        )
+    
+    def test_update_by_id_keeps_ids(self, client, authenticated_headers, preset):
+        """Test editing one creature by id keeps every creature's id."""
+        creatures = [dict(c) for c in preset["creatures"]]
+        creatures[2]["initiative"] = 20
+        
+        response = client.put(f"/presets/{preset['id']}", json={"creatures": creatures}, headers=authenticated_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["creatures"][0] == creatures[2]
+        assert {c["id"] for c in data["creatures"]} == {c["id"] for c in preset["creatures"]}
+    
+    def test_unchanged_creatures_without_ids_are_matched(self, client, authenticated_headers, preset):
+        """Test resending creatures without ids reuses the identical stored rows."""
+        creatures = [{k: v for k, v in c.items() if k != "id"} for c in preset["creatures"]]
+        
+        response = client.put(f"/presets/{preset['id']}", json={"creatures": creatures}, headers=authenticated_headers)
+        
+        assert response.json()["creatures"] == preset["creatures"]
+    
+    def test_added_and_removed_creatures(self, client, authenticated_headers, preset):
+        """Test creatures left out are deleted and creatures without a match are inserted."""
+        kept = preset["creatures"][0]
+        
+        response = client.put(
+            f"/presets/{preset['id']}",
+            json={"creatures": [kept, {"name": "Wolf", "initiative": 18, "creature_type": "enemy"}]},
+            headers=authenticated_headers,
+        )
+        
+        data = response.json()
+        assert [c["name"] for c in data["creatures"]] == ["Wolf", "Captain"]
+        assert data["creatures"][1]["id"] == kept["id"]
+        assert data["creatures"][0]["id"] not in {c["id"] for c in preset["creatures"]}
+    
+    def test_unknown_creature_id(self, client, authenticated_headers, preset):
+        """Test updating a creature id that is not in the preset."""
+        creatures = preset["creatures"] + [
+            {"id": str(uuid.uuid4()), "name": "Ghost", "initiative": 5, "creature_type": "enemy"}
+        ]
+        
+        response = client.put(f"/presets/{preset['id']}", json={"creatures": creatures}, headers=authenticated_headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert client.get(f"/presets/{preset['id']}", headers=authenticated_headers).json()["creatures"] == preset["creatures"]
+    
+    def test_json_patch(self, client, authenticated_headers, preset):
+        """Test a JSON Patch edits, adds and removes creatures."""
+        response = client.patch(
+            f"/presets/{preset['id']}",
+            json=[
+                {"op": "test", "path": "/creatures/0/name", "value": "Captain"},
+                {"op": "replace", "path": "/creatures/0/initiative", "value": 3},
+                {"op": "remove", "path": "/creatures/2"},
+                {"op": "add", "path": "/creatures/-", "value": {"name": "Wolf", "initiative": 12, "creature_type": "enemy"}},
+                {"op": "replace", "path": "/description", "value": "Night raid"},
+            ],
+            headers=authenticated_headers,
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["description"] == "Night raid"
+        assert [(c["name"], c["initiative"]) for c in data["creatures"]] == [("Bandit", 14), ("Wolf", 12), ("Captain", 3)]
+        assert data["creatures"][2]["id"] == preset["creatures"][0]["id"]
+    
+    def test_json_patch_failed_test(self, client, authenticated_headers, preset):
+        """Test a failed test operation rejects the whole patch with 409."""
+        response = client.patch(
+            f"/presets/{preset['id']}",
+            json=[
+                {"op": "replace", "path": "/name", "value": "Renamed"},
+                {"op": "test", "path": "/creatures/0/initiative", "value": 1},
+            ],
+            headers=authenticated_headers,
+        )
+        
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert client.get(f"/presets/{preset['id']}", headers=authenticated_headers).json()["name"] == "Bandit Camp"
+    
+    @pytest.mark.parametrize("operation", [
+        {"op": "replace", "path": "/creatures/7/name", "value": "Nobody"},
+        {"op": "replace", "path": "/creatures/0/initiative", "value": 500},
+        {"op": "remove", "path": "/name"},
+    ])
+    def test_json_patch_invalid(self, client, authenticated_headers, operation, preset):
+        """Test patches that miss the document or produce an invalid preset are rejected."""
+        response = client.patch(f"/presets/{preset['id']}", json=[operation], headers=authenticated_headers)
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,164 @@
+"""Test cross-worker change notifications."""
+import asyncio
+import json
+
+import pytest
+
+from app.utils import pubsub as pubsub_module
+from app.utils.pubsub import InMemoryBackend, PostgresBackend, PubSub, create_backend
+
+
+def start_workers(count):
+    """PubSub instances sharing one in-memory bus, like workers sharing Postgres."""
+    bus = InMemoryBackend()
+    workers = [PubSub() for _ in range(count)]
+    for worker in workers:
+        asyncio.run(worker.start(bus))
+    return workers
+
+
+class FakeConnection:
+    """Stand-in for an asyncpg connection that loops NOTIFY back to its listeners."""
+
+    def __init__(self):
+        self.listeners = {}
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def execute(self, query, channel, payload):
+        assert query == "SELECT pg_notify($1, $2)"
+        self.listeners[channel](self, 1, channel, payload)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.unit
+class TestPubSub:
+    """Test topic dispatch between workers."""
+
+    def test_message_reaches_every_worker_once(self):
+        """Test a publish is handled once locally and once by each other worker."""
+        first, second = start_workers(2)
+        received = {"first": [], "second": []}
+        first.subscribe("encounter", received["first"].append)
+        second.subscribe("encounter", received["second"].append)
+
+        asyncio.run(first.publish("encounter", {"id": 1}))
+
+        assert received == {"first": [{"id": 1}], "second": [{"id": 1}]}
+
+    def test_topics_are_independent(self):
+        """Test handlers only see their own topic."""
+        first, second = start_workers(2)
+        received = []
+        second.subscribe("preset", received.append)
+
+        asyncio.run(first.publish("encounter", {"id": 1}))
+
+        assert received == []
+
+    def test_oversized_message_becomes_resync(self, monkeypatch):
+        """Test messages too large for NOTIFY make other workers resync instead."""
+        monkeypatch.setattr(pubsub_module, "MAX_PAYLOAD_BYTES", 50)
+        first, second = start_workers(2)
+        received, resyncs = [], []
+        second.subscribe("encounter", received.append, resync=lambda: resyncs.append(True))
+
+        asyncio.run(first.publish("encounter", {"data": "x" * 100}))
+
+        assert received == []
+        assert resyncs == [True]
+
+    def test_failing_handler_does_not_stop_others(self):
+        """Test one handler raising does not prevent delivery to the rest."""
+        worker = PubSub()
+        received = []
+        worker.subscribe("encounter", lambda message: 1 / 0)
+        worker.subscribe("encounter", received.append)
+
+        asyncio.run(worker.publish("encounter", {"id": 1}))
+
+        assert received == [{"id": 1}]
+
+    def test_user_deletion_reaches_other_workers_cache(self):
+        """Test the user topic drops cached tokens in the receiving worker."""
+        import uuid
+        from app.utils.user_cache import UserCache, USER_TOPIC
+        first, second = start_workers(2)
+        cache = UserCache(max_size=10, ttl=60)
+        cache._entries["token"] = (float("inf"), {"id": uuid.UUID(int=1)})
+        second.subscribe(USER_TOPIC, lambda message: cache.invalidate_user(message["user_id"]))
+
+        asyncio.run(first.publish(USER_TOPIC, {"user_id": str(uuid.UUID(int=1))}))
+
+        assert len(cache) == 0
+
+
+@pytest.mark.unit
+class TestPostgresBackend:
+    """Test the LISTEN/NOTIFY backend against a fake asyncpg connection."""
+
+    def test_notify_round_trip(self, monkeypatch):
+        """Test notifications are sent with pg_notify and received on the channel."""
+        import asyncpg
+        connection = FakeConnection()
+
+        async def connect(dsn):
+            assert dsn == "postgresql://user:pw@db/app"
+            return connection
+
+        monkeypatch.setattr(asyncpg, "connect", connect)
+        received = []
+
+        async def run():
+            backend = PostgresBackend("postgresql://user:pw@db/app")
+            await backend.start(received.append, lambda: None)
+            await backend.notify(json.dumps({"topic": "encounter"}))
+            await backend.stop()
+
+        asyncio.run(run())
+
+        assert received == ['{"topic": "encounter"}']
+        assert connection.closed
+
+    def test_reconnect_triggers_resync(self, monkeypatch):
+        """Test a dropped listener reconnects and reports possible lost messages."""
+        import asyncpg
+        connections = []
+
+        async def connect(dsn):
+            connections.append(FakeConnection())
+            return connections[-1]
+
+        monkeypatch.setattr(asyncpg, "connect", connect)
+        resyncs = []
+
+        async def run():
+            backend = PostgresBackend("postgresql://db/app", reconnect_interval=0.01)
+            await backend.start(lambda payload: None, lambda: resyncs.append(True))
+            connections[0].closed = True
+            for _ in range(100):
+                if resyncs:
+                    break
+                await asyncio.sleep(0.01)
+            await backend.stop()
+
+        asyncio.run(run())
+
+        assert len(connections) == 2
+        assert resyncs == [True]
+
+    def test_create_backend(self):
+        """Test the backend follows the database URL unless configured."""
+        postgres = create_backend("postgresql+psycopg2://user:pw@db/app?sslmode=require")
+
+        assert isinstance(postgres, PostgresBackend)
+        assert postgres.dsn == "postgresql://user:pw@db/app?sslmode=require"
+        assert isinstance(create_backend("sqlite:///./test.db"), InMemoryBackend)
+        assert isinstance(create_backend("postgresql://db/app", "memory"), InMemoryBackend)
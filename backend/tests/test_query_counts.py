@@ -0,0 +1,229 @@
+"""Pin the number of SQL statements issued by endpoints."""
+import pytest
+from fastapi import status
+
+
+def statement_kinds(sql_statements):
+    """Each statement as "SELECT" or verb and table, e.g. "UPDATE creatures"."""
+    kinds = []
+    for statement in sql_statements:
+        words = statement.split()
+        verb = words[0].upper()
+        if verb in ("BEGIN", "COMMIT"):
+            continue
+        if verb == "SELECT":
+            kinds.append(verb)
+        else:
+            kinds.append(f"{verb} {words[1] if verb == 'UPDATE' else words[2]}")
+    return kinds
+
+
+def count_statements(client, headers, sql_statements, url):
+    """Number of SQL statements run to serve a GET request."""
+    sql_statements.clear()
+    response = client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return len(sql_statements)
+
+
+@pytest.mark.integration
+class TestReadQueryCounts:
+    """Test read endpoints run a fixed number of queries regardless of creature count."""
+
+    @pytest.mark.parametrize("path, expected", [
+        ("/encounters/{id}", 2),  # encounter + creatures
+        ("/encounters/{id}/creatures", 2),  # ownership check + creatures
+        ("/encounters", 1),
+        ("/creatures", 1),
+    ])
+    def test_encounter_reads(self, client, authenticated_headers, sql_statements, path, expected, create_encounter):
+        """Test encounter reads do not scale with the number of creatures."""
+        small = create_encounter(authenticated_headers, 1)
+        large = create_encounter(authenticated_headers, 30)
+
+        counts = [
+            count_statements(client, authenticated_headers, sql_statements, path.format(id=encounter["id"]))
+            for encounter in (small, large)
+        ]
+
+        assert counts == [expected, expected]
+
+    @pytest.mark.parametrize("path, expected", [
+        ("/presets/{id}", 2),  # preset + creatures
+        ("/presets", 1),
+    ])
+    def test_preset_reads(self, client, authenticated_headers, sql_statements, path, expected, create_preset):
+        """Test preset reads do not scale with the number of creatures."""
+        small = create_preset(authenticated_headers, 1)
+        large = create_preset(authenticated_headers, 30)
+
+        counts = [
+            count_statements(client, authenticated_headers, sql_statements, path.format(id=preset["id"]))
+            for preset in (small, large)
+        ]
+
+        assert counts == [expected, expected]
+
+
+class TestInitiativeOrdering:
+    """Test creatures are returned in turn order by the database."""
+
+    def test_encounter_creatures_ordered_by_initiative(self, client, authenticated_headers, create_encounter):
+        """Test encounter creatures come back highest initiative first."""
+        encounter = create_encounter(authenticated_headers, 12)
+
+        response = client.get(f"/encounters/{encounter['id']}", headers=authenticated_headers)
+
+        initiatives = [c["initiative"] for c in response.json()["creatures"]]
+        assert initiatives == sorted(initiatives, reverse=True)
+
+    def test_preset_creatures_ordered_by_initiative(self, client, authenticated_headers, create_preset):
+        """Test preset creatures come back highest initiative first."""
+        preset = create_preset(authenticated_headers, 12)
+
+        response = client.get(f"/presets/{preset['id']}", headers=authenticated_headers)
+
+        initiatives = [c["initiative"] for c in response.json()["creatures"]]
+        assert initiatives == sorted(initiatives, reverse=True)
+
+
+@pytest.mark.integration
+class TestTurnQueryCounts:
+    """Test moving the turn does not load the creatures."""
+
+    @pytest.mark.parametrize("action", ["advance", "rewind"])
+    def test_single_update(self, client, authenticated_headers, sql_statements, action, create_encounter):
+        """Test a turn move is a single UPDATE statement."""
+        encounter = create_encounter(authenticated_headers, 30)
+
+        sql_statements.clear()
+        response = client.post(f"/encounters/{encounter['id']}/{action}", headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        statements = [s for s in sql_statements if s.split()[0].upper() not in ("BEGIN", "COMMIT")]
+        assert len(statements) == 1
+        assert statements[0].startswith("UPDATE encounters")
+
+
+@pytest.mark.integration
+class TestBatchQueryCounts:
+    """Test the creature batch endpoint runs a fixed number of statements."""
+
+    @pytest.mark.parametrize("count", [1, 40])
+    def test_reroll_and_add(self, client, authenticated_headers, sql_statements, count, create_encounter):
+        """Test re-rolling and adding creatures does not scale with the number of creatures."""
+        encounter = create_encounter(authenticated_headers, count)
+
+        sql_statements.clear()
+        response = client.post(
+            f"/encounters/{encounter['id']}/creatures/batch",
+            json={
+                "create": [{"name": f"Orc {i}", "initiative": i, "creature_type": "enemy"} for i in range(count)],
+                "update": [{"id": c["id"], "initiative": (c["initiative"] + 7) % 20} for c in encounter["creatures"]],
+                "delete": [],
+            },
+            headers=authenticated_headers,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 2 * count
+        statements = [s for s in sql_statements if s.split()[0].upper() not in ("BEGIN", "COMMIT")]
+        # ownership check, UPDATE, INSERT, creature list
+        assert len(statements) == 4
+
+
+@pytest.mark.integration
+class TestInstantiateQueryCounts:
+    """Test instantiating a preset copies its creatures in the database."""
+
+    @pytest.mark.parametrize("count", [1, 30])
+    def test_two_inserts(self, client, authenticated_headers, sql_statements, count, create_preset):
+        """Test the encounter and its creatures are each one INSERT ... SELECT."""
+        preset = create_preset(authenticated_headers, count)
+
+        sql_statements.clear()
+        response = client.post(f"/presets/{preset['id']}/instantiate", headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.json()["creatures"]) == count
+        statements = [s for s in sql_statements if s.split()[0].upper() not in ("BEGIN", "COMMIT")]
+        assert [s.split("(")[0].strip() for s in statements] == ["INSERT INTO encounters", "INSERT INTO creatures"]
+        assert all("SELECT" in s for s in statements)
+
+
+@pytest.mark.integration
+class TestPresetUpdateQueryCounts:
+    """Test preset updates write only the creatures that changed."""
+
+    def test_one_creature_edit(self, client, authenticated_headers, sql_statements, create_preset):
+        """Test editing one creature of a large preset is one UPDATE, plus the preset's version bump."""
+        preset = create_preset(authenticated_headers, 100)
+        creatures = preset["creatures"]
+        creatures[50]["name"] = "Orc Chieftain"
+
+        sql_statements.clear()
+        response = client.put(f"/presets/{preset['id']}", json={"creatures": creatures}, headers=authenticated_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        writes = [s for s in sql_statements if s.split()[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+        assert [" ".join(s.split()[:2]) for s in writes] == ["UPDATE preset_creatures", "UPDATE presets"]
+
+
+@pytest.mark.integration
+class TestWriteQueryCounts:
+    """Test write endpoints build their responses without reading back what they wrote."""
+
+    @pytest.mark.parametrize("method, path, body, expected", [
+        ("post", "/encounters", {"name": "New", "creatures": [{"name": "Orc", "initiative": 9, "creature_type": "enemy"}] * 3},
+         ["INSERT encounters", "INSERT creatures"]),
+        ("put", "/encounters/{encounter}", {"name": "Renamed"}, ["SELECT", "SELECT", "UPDATE encounters"]),
+        ("patch", "/encounters/{encounter}/round", {"round_number": 3}, ["SELECT", "SELECT", "UPDATE encounters"]),
+        ("post", "/encounters/{encounter}/creatures", {"name": "Orc", "initiative": 9, "creature_type": "enemy"},
+         ["UPDATE encounters", "INSERT creatures"]),
+        ("put", "/encounters/{encounter}/creatures/{creature}", {"name": "Renamed"},
+         ["SELECT", "UPDATE encounters", "UPDATE creatures"]),
+        ("delete", "/encounters/{encounter}/creatures/{creature}", None,
+         ["SELECT", "UPDATE encounters", "DELETE creatures"]),
+        ("post", "/creatures", {"encounter_id": "{encounter}", "name": "Orc", "initiative": 9, "creature_type": "enemy"},
+         ["UPDATE encounters", "INSERT creatures"]),
+        ("put", "/creatures/{creature}", {"name": "Renamed"},
+         ["SELECT", "UPDATE encounters", "UPDATE creatures"]),
+        ("post", "/presets", {"name": "New", "creatures": [{"name": "Orc", "initiative": 9, "creature_type": "enemy"}] * 3},
+         ["INSERT presets", "INSERT preset_creatures"]),
+        ("put", "/presets/{preset}", {"name": "Renamed"}, ["SELECT", "SELECT", "UPDATE presets"]),
+        ("patch", "/presets/{preset}", [{"op": "replace", "path": "/name", "value": "Renamed"}],
+         ["SELECT", "SELECT", "UPDATE presets"]),
+    ])
+    def test_write_endpoints(self, client, authenticated_headers, sql_statements, method, path, body, expected, create_encounter, create_preset):
+        """Test each write runs a fixed set of statements and no SELECT after writing."""
+        encounter = create_encounter(authenticated_headers, 3)
+        preset = create_preset(authenticated_headers, 3)
+        ids = {"encounter": encounter["id"], "creature": encounter["creatures"][0]["id"], "preset": preset["id"]}
+        if isinstance(body, dict):
+            body = {key: value.format(**ids) if isinstance(value, str) else value for key, value in body.items()}
+
+        sql_statements.clear()
+        response = client.request(method.upper(), path.format(**ids), json=body, headers=authenticated_headers)
+
+        assert response.status_code < 300
+        assert statement_kinds(sql_statements) == expected
+
+    def test_register(self, client, sql_statements):
+        """Test registering looks up the email once and inserts the user."""
+        response = client.post(
+            "/auth/register",
+            json={"email": "counted@example.com", "password": "Password123!", "confirm_password": "Password123!"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["user"]["created_at"]
+        assert statement_kinds(sql_statements) == ["SELECT", "INSERT users"]
+
+    def test_returned_timestamps(self, client, authenticated_headers, create_encounter):
+        """Test server-generated timestamps in write responses match what is stored."""
+        encounter = create_encounter(authenticated_headers, 2)
+        updated = client.put(f"/encounters/{encounter['id']}", json={"name": "Renamed"}, headers=authenticated_headers)
+        stored = client.get(f"/encounters/{encounter['id']}", headers=authenticated_headers).json()
+
+        assert updated.json()["updated_at"] == stored["updated_at"]
+        assert [c["created_at"] for c in encounter["creatures"]] == [c["created_at"] for c in stored["creatures"]]
@@ -1,10 +1,18 @@
 """Tests for utility functions and configuration."""
 
+import os
+import subprocess
+import sys
+
 import pytest
 from datetime import datetime, timedelta
+from typing import List
 from app.config import Settings
+from app.models.database import SyncSessionAdapter
 from app.utils.dependencies import get_current_user
 from app.utils.auth import create_access_token, verify_token, hash_password
+from app.utils.responses import type_adapter
+from app.models.schemas import CreatureResponse, EncounterResponse
 from fastapi import HTTPException, status as http_status
 
 
@@ -55,7 +63,7 @@ class TestDependencies:
         from fastapi.security import HTTPAuthorizationCredentials
         import asyncio
         credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
-        result = asyncio.run(get_current_user(credentials=credentials, db=test_db_session))
+        result = asyncio.run(get_current_user(credentials=credentials, db=SyncSessionAdapter(test_db_session)))
         
         assert result.id == user.id
         assert result.email == user.email
@@ -68,7 +76,7 @@ class TestDependencies:
         
         credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="invalid_token")
         with pytest.raises(HTTPException) as exc_info:
-            asyncio.run(get_current_user(credentials=credentials, db=test_db_session))
+            asyncio.run(get_current_user(credentials=credentials, db=SyncSessionAdapter(test_db_session)))
         
         assert exc_info.value.status_code == http_status.HTTP_401_UNAUTHORIZED
 
@@ -84,11 +92,86 @@ class TestDependencies:
         
         credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
         with pytest.raises(HTTPException) as exc_info:
-            asyncio.run(get_current_user(credentials=credentials, db=test_db_session))
+            asyncio.run(get_current_user(credentials=credentials, db=SyncSessionAdapter(test_db_session)))
         
         assert exc_info.value.status_code == http_status.HTTP_401_UNAUTHORIZED
 
 
+class TestUserCache:
+    """Test the authenticated-user cache."""
+
+    def _user(self, email="cached@example.com"):
+        import uuid
+        from app.models.models import User
+        return User(
+            id=uuid.uuid4(),
+            email=email,
+            password_hash="hash",
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+
+    def test_cache_returns_detached_copy(self):
+        """Test a cached user is returned as a fresh detached instance."""
+        from app.utils.user_cache import UserCache
+        from sqlalchemy import inspect
+        cache = UserCache(max_size=10, ttl=60)
+        user = self._user()
+
+        cache.set("token", user)
+        cached = cache.get("token")
+
+        assert cached is not user
+        assert cached.id == user.id
+        assert cached.email == user.email
+        assert inspect(cached).detached
+
+    def test_cache_expires_at_token_exp(self):
+        """Test entries never outlive the token's exp claim."""
+        import time
+        from app.utils.user_cache import UserCache
+        cache = UserCache(max_size=10, ttl=60)
+
+        cache.set("token", self._user(), token_exp=time.time() - 1)
+
+        assert cache.get("token") is None
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test the cache stays within its size bound."""
+        from app.utils.user_cache import UserCache
+        cache = UserCache(max_size=2, ttl=60)
+
+        cache.set("a", self._user("a@example.com"))
+        cache.set("b", self._user("b@example.com"))
+        cache.get("a")
+        cache.set("c", self._user("c@example.com"))
+
+        assert len(cache) == 2
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+
+    def test_cache_invalidate_user(self):
+        """Test invalidation drops every token of a user."""
+        from app.utils.user_cache import UserCache
+        cache = UserCache(max_size=10, ttl=60)
+        user = self._user()
+
+        cache.set("first", user)
+        cache.set("second", user)
+        cache.invalidate_user(user.id)
+
+        assert len(cache) == 0
+
+    def test_deleted_account_token_rejected(self, client, authenticated_headers):
+        """Test deleting an account invalidates its cached token."""
+        assert client.get("/users/profile", headers=authenticated_headers).status_code == 200
+
+        client.delete("/users/account", headers=authenticated_headers)
+        response = client.get("/users/profile", headers=authenticated_headers)
+
+        assert response.status_code == http_status.HTTP_401_UNAUTHORIZED
+
+
 class TestAuthErrors:
     """Test authentication error handling."""
 
@@ -140,6 +223,60 @@ class TestMetrics:
         # Metrics should contain some data
         assert len(response.text) > 0
 
+    def test_metrics_label_route_templates(self, client, authenticated_headers):
+        """Test requests are labelled by route template, not by raw path."""
+        client.get("/encounters/987654", headers=authenticated_headers)
+        client.get("/no/such/path/123456")
+
+        response = client.get("/api/metrics")
+
+        assert response.status_code == http_status.HTTP_200_OK
+        assert 'endpoint="/encounters/{encounter_id}"' in response.text
+        assert 'endpoint="<unmatched>"' in response.text
+        assert "987654" not in response.text
+        assert "123456" not in response.text
+
+    def test_requests_do_not_sample_system_metrics(self, client, monkeypatch):
+        """Test psutil is not called on the request path."""
+        import psutil
+        calls = []
+        monkeypatch.setattr(psutil, "cpu_percent", lambda *args, **kwargs: calls.append(1) or 0.0)
+
+        client.get("/api/health")
+        before = len(calls)  # the startup sampler may run once
+        client.get("/api/health")
+        client.get("/no/such/path")
+
+        assert len(calls) == before
+
+    def test_sample_system_metrics(self):
+        """Test the background sampler updates the system gauges."""
+        from app.utils.metrics import memory_usage, sample_system_metrics
+
+        sample_system_metrics()
+
+        assert memory_usage._value.get() > 0
+
+    def test_metrics_aggregate_worker_processes(self, tmp_path):
+        """Test multiprocess mode reports samples written by every worker."""
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        worker = (
+            "from app.utils.metrics import request_count; "
+            "request_count.labels(method='GET', endpoint='/encounters', status_code=200).inc()"
+        )
+        scrape = (
+            "import asyncio; from app.utils.metrics import metrics; "
+            "print(asyncio.run(metrics()).body.decode())"
+        )
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+
+        output = subprocess.run(
+            [sys.executable, "-c", scrape], env=env, check=True, capture_output=True, text=True
+        ).stdout
+
+        assert 'http_requests_total{endpoint="/encounters",method="GET",status_code="200"} 2.0' in output
+
 
 class TestPasswordResetWorkflow:
     """Test password-related operations."""
@@ -168,3 +305,28 @@ class TestPasswordResetWorkflow:
         response = client.post("/auth/register", json=user_data)
         
         assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestFastJSONResponse:
+    """Test the pre-serialized JSON responses."""
+
+    def test_matches_default_serialization(self, client, authenticated_headers):
+        """Test a fast response has the same JSON as the model's default dump."""
+        created = client.post(
+            "/encounters",
+            json={
+                "name": "Serialized",
+                "creatures": [{"name": f"Orc {i}", "initiative": i, "creature_type": "enemy"} for i in range(5)],
+            },
+            headers=authenticated_headers,
+        )
+        response = client.get(f"/encounters/{created.json()['id']}", headers=authenticated_headers)
+
+        assert created.status_code == http_status.HTTP_201_CREATED
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == EncounterResponse.model_validate(response.json()).model_dump(mode="json")
+        assert response.json() == created.json()
+
+    def test_type_adapters_are_cached(self):
+        """Test each response type compiles its TypeAdapter once."""
+        assert type_adapter(List[CreatureResponse]) is type_adapter(List[CreatureResponse])
@@ -79,6 +79,10 @@ export interface UpdateEncounter {
 }
 
 // Preset types - for reusable encounter templates
+export interface PresetCreature extends CreateCreature {
+  id?: string; // Send back to keep the stored creature on update
+}
+
 export interface Preset {
   id: string;
   user_id: string;
@@ -87,7 +91,7 @@ export interface Preset {
   background_image?: string;
   created_at: string;
   updated_at: string;
-  creatures: CreateCreature[];
+  creatures: PresetCreature[];
 }
 
 export interface PresetSummary {